@@ -73,8 +73,8 @@ async def chatting(req: ChatRequest):
             "messages": req.messages if req.messages else []  # Use provided messages (role/content dicts) or empty list
         }
         
-        # Run the chat workflow
-        result_state = chat_workflow.invoke(state_input)
+        # Run the chat workflow (ainvoke keeps the sync chat node off the event loop)
+        result_state = await chat_workflow.ainvoke(state_input)
         
         # Extract response and updated messages
         response_text = result_state.get("response", "No response generated")
@@ -6,6 +6,7 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.append(str(BASE_DIR))
 
+from config import logger
 from Models import ChatState
 from nodes.Chat_node import chat_node
 
@@ -22,12 +23,9 @@ chat_workflow_graph.add_edge("ChatNode", END)
 # Compile the workflow
 chat_workflow = chat_workflow_graph.compile()
 
-print(f'Chat workflow nodes: {chat_workflow_graph.nodes}')
-print(f'Chat workflow edges: {chat_workflow_graph.edges}')
+logger.debug("Chat workflow nodes: %s", chat_workflow_graph.nodes)
+logger.debug("Chat workflow edges: %s", chat_workflow_graph.edges)
 
-# Optionally draw the workflow graph
-try:
-    chat_workflow.get_graph().draw_png("langgraph_chat_workflow.png")
-except Exception as e:
-    print(f"Could not draw workflow graph: {e}")
+# Optionally draw the workflow graph (disabled by default: it needs graphviz and slows every import)
+# chat_workflow.get_graph().draw_png("langgraph_chat_workflow.png")
 
@@ -3,7 +3,6 @@ from pathlib import Path
 
 # Add parent directory to sys.path
 parent_dir = Path(__file__).resolve().parent.parent
-print(f'parent directory: {parent_dir}')
 sys.path.append(str(parent_dir))
 
 from nodes.News_node import get_stock_news
@@ -21,7 +20,6 @@ def getnodes() -> dict:
         "StockInfoNode": get_stock_info
     }
 
-print(f'nodes: {getnodes()}')
 
 
 def _discover_tool_files() -> list[Path]:
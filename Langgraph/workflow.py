@@ -6,14 +6,14 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.append(str(BASE_DIR))
 
+from config import logger
 from Langgraph.get_nodes import getnodes
 from Models import NewsArticle,StocksInfo,State
 
 
 nodes = getnodes()
 for node_name, node in nodes.items():
-    print(f'Loaded node: {node_name} -> {node}')
-    print(f'type of node: {type(node)}')
+    logger.debug("Loaded node: %s -> %s (%s)", node_name, node, type(node))
 
 
 
@@ -34,8 +34,8 @@ workflow.add_edge("StockInfoNode", END)
 workflow.add_edge("ScreenerExtractNode", END)
 workflow.add_edge("StockNewsNode", END)
 
-print(f'Workflow nodes: {workflow.nodes}')
-print(f'Workflow edges: {workflow.edges}')
+logger.debug("Workflow nodes: %s", workflow.nodes)
+logger.debug("Workflow edges: %s", workflow.edges)
 
 workflow = workflow.compile()
 # Optionally draw the workflow graph (disabled by default)
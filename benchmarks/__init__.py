@@ -0,0 +1 @@
+"""Offline benchmarks and load tests; run each module with ``python -m benchmarks.<name>``."""
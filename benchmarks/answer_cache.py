@@ -0,0 +1,110 @@
+"""Hit rate, wrong hits and lookup cost of the semantic chat-answer cache.
+
+Replays a stream of standalone questions: users pick one of a set of intents
+about one of several stocks and phrase it in one of a few ways. A miss
+"generates" the answer (``--latency`` seconds, not slept) and stores it. A
+hit counts as wrong when the cached answer was written for a different
+intent. "paraphrase hits" is the share of first-time phrasings of an already
+answered intent that were served from the cache. Reported per similarity
+threshold.
+
+    python -m benchmarks.answer_cache --questions 5000 --thresholds 0.7 0.85 0.95
+"""
+
+import argparse
+import random
+import time
+
+from services.answer_cache import SemanticAnswerCache
+
+_INTENTS = {
+    "debt": [
+        "What is the debt level of {name}?",
+        "what's {name}'s debt level",
+        "How much debt does {name} have?",
+        "Tell me about the debt of {name}",
+    ],
+    "revenue_growth": [
+        "How fast is {name} growing its revenue?",
+        "What is the revenue growth of {name}?",
+        "revenue growth of {name}",
+        "Is {name}'s revenue growing?",
+    ],
+    "dividend": [
+        "Does {name} pay a dividend?",
+        "What is the dividend payout of {name}?",
+        "{name} dividend payout",
+    ],
+    "roe": [
+        "What is the ROE of {name}?",
+        "return on equity of {name}",
+        "How good is {name}'s return on equity?",
+    ],
+    "promoter": [
+        "How much do promoters hold in {name}?",
+        "What is the promoter holding of {name}?",
+        "promoter shareholding of {name}",
+    ],
+    "margins": [
+        "What are the operating margins of {name}?",
+        "How have {name}'s operating margins changed?",
+        "operating margin trend for {name}",
+    ],
+    "cash": [
+        "How much cash does {name} hold?",
+        "What is the cash balance of {name}?",
+        "cash on {name}'s balance sheet",
+    ],
+    "news": [
+        "What is the latest news on {name}?",
+        "Any recent news about {name}?",
+        "latest {name} news",
+    ],
+}
+_STOCKS = [("TCS", "TCS"), ("RELIANCE", "Reliance Industries"), ("INFY", "Infosys"), ("HDFCBANK", "HDFC Bank")]
+
+
+def run(questions: int, thresholds, latency: float) -> None:
+    print(
+        f"{'threshold':>10}{'hit rate':>10}{'paraphrase hits':>17}{'wrong hits':>12}"
+        f"{'lookup ms':>11}{'saved s':>10}{'entries':>9}"
+    )
+    for threshold in thresholds:
+        rng = random.Random(11)
+        cache = SemanticAnswerCache(threshold=threshold)
+        wrong = 0
+        seen, answered, paraphrases, paraphrase_hits = set(), set(), 0, 0
+        lookup_time = 0.0
+        for _ in range(questions):
+            ticker, name = rng.choice(_STOCKS)
+            intent = rng.choice(list(_INTENTS))
+            question = rng.choice(_INTENTS[intent]).format(name=name)
+            context = {"TickerSymbol": ticker, "User_stock_name": name, "screener_data": f"{ticker} page"}
+            etag = f"{ticker}-v1"
+            start = time.perf_counter()
+            cached = cache.lookup(question, context, etag)
+            lookup_time += time.perf_counter() - start
+            if (ticker, question) not in seen and (ticker, intent) in answered:
+                paraphrases += 1
+                paraphrase_hits += cached is not None
+            seen.add((ticker, question))
+            answered.add((ticker, intent))
+            if cached is None:
+                cache.store(question, context, etag, f"{ticker}:{intent}", latency)
+            elif cached.answer != f"{ticker}:{intent}":
+                wrong += 1
+        stats = cache.stats()
+        print(
+            f"{threshold:>10.2f}{stats['hit_rate']:>10.2f}{paraphrase_hits / max(1, paraphrases):>17.2f}"
+            f"{wrong / max(1, stats['hits']):>12.3f}"
+            f"{lookup_time / questions * 1e3:>11.3f}{stats['saved_seconds']:>10.0f}{stats['entries']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=5000)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.8, 0.85, 0.9, 0.95])
+    parser.add_argument("--latency", type=float, default=3.0, help="seconds one generated answer takes")
+    args = parser.parse_args()
+    run(args.questions, args.thresholds, args.latency)
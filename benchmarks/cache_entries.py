@@ -0,0 +1,115 @@
+"""Memory per cached analysis and CPU per /langgraph cache hit, objects vs JSON bytes.
+
+Builds a realistic workflow state (a synthetic Screener page with its parsed
+tables, news articles, StocksInfo) and compares:
+
+- memory: the state as pydantic objects and numpy tables (what the cache
+  held before, measured with ``tracemalloc``) vs its JSON bytes, raw and
+  gzip-compressed at a few levels
+- CPU per hit: a route returning the state dict, which FastAPI re-encodes
+  on every hit (before), vs the cached JSON bytes written into the body
+  (``get_json``, now), and ``get`` which decodes the bytes back into objects
+  for callers that need them
+
+    python -m benchmarks.cache_entries --hits 2000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+import main
+from benchmarks.fakes import stock_info_reply
+from benchmarks.load_test import _asgi_request
+from benchmarks.screener_cleaner import screener_page
+from models import NewsArticle, StocksInfo
+from nodes.screener_extract_node import _screener_update
+from services.cache import AnalysisCache, encode_json
+
+
+def sample_state(seed: int = 3) -> dict:
+    rng = random.Random(seed)
+    words = "revenue margin guidance order book capex demand quarter growth outlook".split()
+    return {
+        "User_stock_name": "Reliance Industries",
+        "ScreenerURL": "https://www.screener.in/company/RELIANCE/consolidated/",
+        "TickerSymbol": "RELIANCE",
+        "Stock_Ticker": "RELIANCE",
+        "news_articles": [
+            NewsArticle(
+                title=f"Reliance news {i}",
+                url=f"https://news.example/{i}",
+                content=" ".join(rng.choice(words) for _ in range(400)),
+            )
+            for i in range(5)
+        ],
+        "stocks_info": StocksInfo(**json.loads(stock_info_reply("RELIANCE"))),
+        **_screener_update(screener_page(rng)),
+    }
+
+
+def _retained_bytes(build) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del value
+    return retained
+
+
+async def _cpu_per_request(app, path: str, hits: int) -> float:
+    await _asgi_request("POST", path, {}, app=app)
+    start = time.process_time()
+    for _ in range(hits):
+        await _asgi_request("POST", path, {}, app=app)
+    return (time.process_time() - start) / hits * 1e3
+
+
+async def run(hits: int) -> None:
+    state = sample_state()
+    data = encode_json(state)
+
+    objects = _retained_bytes(lambda: main._decode_state(data))
+    print(f"memory per entry: objects {objects / 1024:8.1f} KB")
+    for level in (0, 1, 6):
+        cache = AnalysisCache(json_entries=True, decode=main._decode_state, compress_level=level, compress_min_bytes=0)
+        cache.set("reliance", state)
+        stats = cache.stats()
+        label = "json" if level == 0 else f"gzip {level}"
+        print(f"                  {label:<8}{stats['bytes'] / 1024:8.1f} KB ({objects / stats['bytes']:.1f}x smaller)")
+
+    cache = AnalysisCache(json_entries=True, decode=main._decode_state, compress_level=1, compress_min_bytes=4096)
+    cache.set("reliance", state)
+    app = FastAPI()
+
+    @app.post("/before")
+    async def before():
+        return {"status": "ok", "result": state, "cached": True}
+
+    @app.post("/after")
+    async def after():
+        result_json, _ = cache.get_json("reliance")
+        return Response(b'{"status":"ok","result":' + result_json + b',"cached":true}', media_type="application/json")
+
+    @app.post("/decoded")
+    async def decoded():
+        result_state, _ = cache.get("reliance")
+        return {"status": "ok", "result": result_state, "cached": True}
+
+    print(f"CPU per hit:      objects re-encoded by FastAPI {await _cpu_per_request(app, '/before', hits):7.3f} ms")
+    print(f"                  cached JSON bytes (gzip 1)    {await _cpu_per_request(app, '/after', hits):7.3f} ms")
+    print(f"                  get() decoded and re-encoded  {await _cpu_per_request(app, '/decoded', hits):7.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hits", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.hits))
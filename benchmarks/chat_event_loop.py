@@ -0,0 +1,84 @@
+"""Load test: /health latency while concurrent /chat calls are in flight.
+
+Drives the FastAPI app in-process against a fake Gemini model, so no API
+quota is used. ``--blocking`` reproduces the old behaviour of calling the
+LLM synchronously on the event loop for comparison.
+
+    python -m benchmarks.chat_event_loop --chats 100 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+import main
+from benchmarks.fakes import FakeChatModel
+from config import use_clients
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _probe_health(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> List[float]:
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/health")
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def run(chats: int, latency: float, blocking: bool) -> None:
+    fake = FakeChatModel(latency=latency, jitter=latency / 10)
+    use_clients(chat_llm=fake)
+
+    if blocking:
+        async def blocking_ainvoke(state_input):
+            reply = fake.invoke("hi")
+            return {"response": reply.content, "messages": []}
+
+        main.workflows.get_chat_workflow().ainvoke = blocking_ainvoke
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        stop = asyncio.Event()
+        idle = asyncio.ensure_future(_probe_health(client, stop, 0.01))
+        await asyncio.sleep(0.5)
+        stop.set()
+        idle_samples = await idle
+
+        stop = asyncio.Event()
+        probe = asyncio.ensure_future(_probe_health(client, stop, 0.01))
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *(client.post("/chat", json={"message": f"question {i}"}) for i in range(chats))
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        loaded_samples = await probe
+
+    ok = sum(r.status_code == 200 for r in responses)
+    print(f"mode={'blocking' if blocking else 'async'} chats={chats} ok={ok} llm_latency={latency}s")
+    print(f"chat wall time: {elapsed:.2f}s")
+    for label, samples in (("idle", idle_samples), ("under load", loaded_samples)):
+        print(
+            f"/health {label:>10}: n={len(samples):4d}  "
+            f"p50={statistics.median(samples):8.2f}ms  "
+            f"p99={_percentile(samples, 99):8.2f}ms  max={max(samples):8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM latency in seconds")
+    parser.add_argument("--blocking", action="store_true", help="call the LLM synchronously on the event loop")
+    args = parser.parse_args()
+    asyncio.run(run(args.chats, args.latency, args.blocking))
@@ -0,0 +1,78 @@
+"""Time of the vectorized metrics engine for many stocks vs one call per stock.
+
+Builds synthetic Screener tables (Profit & Loss, Balance Sheet, Cash Flow,
+Ratios with Screener's row labels) for N stocks and times
+``compute_metrics`` on all of them at once against calling it per stock,
+checking both give the same numbers.
+
+    python -m benchmarks.compare_metrics --sizes 2 10 100 500 1000
+"""
+
+import argparse
+import random
+import time
+from typing import Dict
+
+import numpy as np
+
+from models import ScreenerTable
+from services.metrics import compute_metrics
+
+_PERIODS = [f"Mar {year}" for year in range(2014, 2026)] + ["TTM"]
+
+
+def _table(rows: Dict[str, np.ndarray]) -> ScreenerTable:
+    return ScreenerTable(periods=_PERIODS, rows=list(rows), values=np.vstack(list(rows.values())))
+
+
+def synthetic_tables(rng: random.Random) -> Dict[str, ScreenerTable]:
+    n = len(_PERIODS)
+    growth = np.cumprod([1.0] + [rng.uniform(0.85, 1.3) for _ in range(n - 1)])
+    sales = rng.uniform(500, 200000) * growth
+    opm = np.array([rng.uniform(5, 35) for _ in range(n)])
+    interest = sales * rng.uniform(0.0, 0.05)
+    pbt = sales * opm / 100 - interest
+    net_profit = pbt * 0.75
+    equity = np.full(n, rng.uniform(50, 1500))
+    reserves = np.cumsum(net_profit * 0.6) + rng.uniform(100, 50000)
+    if rng.random() < 0.1:  # some pages lack a section
+        return {"profit_loss": _table({"Sales": sales, "OPM %": opm, "Net Profit": net_profit})}
+    return {
+        "profit_loss": _table(
+            {"Sales": sales, "OPM %": opm, "Interest": interest, "Profit before tax": pbt, "Net Profit": net_profit}
+        ),
+        "balance_sheet": _table({"Equity Capital": equity, "Reserves": reserves, "Borrowings": reserves * rng.uniform(0, 1.5)}),
+        "cash_flow": _table({"Cash from Operating Activity": net_profit * rng.uniform(0.4, 1.4)}),
+        "ratios": _table({"ROCE %": np.array([rng.uniform(5, 40) for _ in range(n)])}),
+    }
+
+
+def _best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(sizes, repeat: int) -> None:
+    rng = random.Random(5)
+    universe = {f"STOCK{i}": synthetic_tables(rng) for i in range(max(sizes))}
+    print(f"{'stocks':>8}{'vectorized ms':>16}{'per-stock ms':>16}{'speedup':>10}")
+    for size in sizes:
+        stocks = dict(list(universe.items())[:size])
+        batched = compute_metrics(stocks)
+        one_by_one = {name: compute_metrics({name: tables})[name] for name, tables in stocks.items()}
+        assert batched == one_by_one, "vectorized and per-stock results differ"
+        vectorized = _best_of(lambda: compute_metrics(stocks), repeat)
+        per_stock = _best_of(lambda: [compute_metrics({n: t}) for n, t in stocks.items()], repeat)
+        print(f"{size:>8}{vectorized * 1e3:>16.2f}{per_stock * 1e3:>16.2f}{per_stock / vectorized:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 10, 100, 500, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
@@ -0,0 +1,76 @@
+"""Bytes and CPU per poll of one cached analysis: POST /langgraph vs GET /analysis.
+
+A dashboard polling a stock whose analysis has not changed either downloads
+the whole state every time (``POST /langgraph``, or ``GET /analysis`` without
+headers), downloads it compressed (``Accept-Encoding``), or revalidates it
+(``If-None-Match`` with the last ETag, answered with an empty 304). The
+cache holds one realistic analysis (see ``benchmarks/cache_entries.py``) and
+every measured request is a hit. The first row is ``/langgraph`` as it was
+before cached entries became JSON bytes: the state's objects re-encoded by
+FastAPI on every poll.
+
+    python -m benchmarks.conditional_get --polls 2000
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+import main
+from benchmarks.cache_entries import sample_state
+from benchmarks.load_test import _asgi_request
+from services.http_encoding import brotli
+
+_STOCK = "Reliance Industries"
+
+
+async def _poll(app, method: str, path: str, polls: int, headers=None, payload=None):
+    status, _, body = await _asgi_request(method, path, payload, app=app, headers=headers)
+    start = time.process_time()
+    for _ in range(polls):
+        await _asgi_request(method, path, payload, app=app, headers=headers)
+    return status, len(body), (time.process_time() - start) / polls * 1e6
+
+
+async def run(polls: int) -> None:
+    main.logger.setLevel("WARNING")
+    state = sample_state()
+    entry = main._stock_cache.set(main._cache_key(_STOCK), state)
+    before = FastAPI()
+
+    @before.post("/langgraph")
+    async def langgraph_before():
+        return {"status": "ok", "result": state, "cached": True}
+
+    path = f"/analysis/{_STOCK}"  # the ASGI path is already percent-decoded
+    cases = [
+        ("POST /langgraph before", before, "POST", "/langgraph", None, {"stock_name": _STOCK}),
+        ("POST /langgraph", main.app, "POST", "/langgraph", None, {"stock_name": _STOCK}),
+        ("GET, no headers", main.app, "GET", path, None, None),
+        ("GET, gzip", main.app, "GET", path, {"Accept-Encoding": "gzip"}, None),
+    ]
+    if brotli is not None:
+        cases.append(("GET, br", main.app, "GET", path, {"Accept-Encoding": "br, gzip"}, None))
+    revalidate = {"If-None-Match": f'"{entry.etag}"', "Accept-Encoding": "gzip"}
+    cases.append(("GET, If-None-Match", main.app, "GET", path, revalidate, None))
+
+    print(f"{'request':<24}{'status':>7}{'body bytes':>12}{'CPU us':>9}")
+    baseline = None
+    for label, app, method, target, headers, payload in cases:
+        status, size, cpu = await _poll(app, method, target, polls, headers, payload)
+        baseline = baseline or (size, cpu)
+        print(
+            f"{label:<24}{status:>7}{size:>12}{cpu:>9.0f}"
+            f"   {baseline[0] / max(size, 1):6.1f}x fewer bytes, {baseline[1] / cpu:5.1f}x less CPU"
+        )
+    if brotli is None:
+        print("(brotli not installed: pip install brotli to compare it)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.polls))
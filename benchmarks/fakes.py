@@ -0,0 +1,217 @@
+"""Offline stand-ins for Gemini and Tavily used by the benchmark scripts."""
+
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from config import use_clients
+
+CANNED_STOCK_INFO = {
+    "ticker_symbol": "RELIANCE",
+    "business_model": "Integrated energy, retail and digital services conglomerate.",
+    "geographical_revenue_mix": "Predominantly India with significant export revenue.",
+    "sectoral_tailwinds_headwinds": "Tailwinds from consumption; headwinds from refining margins.",
+    "capex_expansion_plans": "New energy giga-factories and retail store expansion.",
+    "management_commentary_forward_guidance": "Management guides to steady growth across segments.",
+}
+
+CANNED_NEWS = [
+    {"title": f"Sector update {i}", "url": f"https://news.example.com/{i}", "content": "Markets moved on results. " * 20}
+    for i in range(3)
+]
+
+CANNED_SCREENER_PAGE = (
+    "# Reliance Industries Ltd\n\n"
+    "Market Cap ₹ 19,00,000 Cr. Current Price ₹ 1,400 Stock P/E 25\n\n"
+    "## Quarterly Results\n\n| | Mar 2024 | Jun 2024 | Sep 2024 |\n|---|---|---|---|\n"
+    "| Sales + | 2,40,000 | 2,31,000 | 2,35,000 |\n| Net Profit + | 21,000 | 17,400 | 19,300 |\n\n"
+    "## Profit & Loss\n\n| | Mar 2021 | Mar 2022 | Mar 2023 | Mar 2024 | TTM |\n|---|---|---|---|---|---|\n"
+    "| Sales + | 4,66,307 | 6,94,673 | 8,76,396 | 8,99,041 | 9,41,000 |\n| OPM % | 17% | 15% | 16% | 18% | 17% |\n"
+    "| Interest | 21,189 | 14,584 | 19,571 | 23,118 | 24,000 |\n"
+    "| Profit before tax | 55,461 | 84,142 | 94,464 | 1,04,727 | 1,05,000 |\n"
+    "| Net Profit + | 53,739 | 67,845 | 74,088 | 79,020 | 80,000 |\n\n"
+    "## Balance Sheet\n\n| | Mar 2021 | Mar 2022 | Mar 2023 | Mar 2024 |\n|---|---|---|---|---|\n"
+    "| Equity Capital | 6,445 | 6,765 | 6,766 | 6,766 |\n| Reserves | 6,93,727 | 7,72,720 | 7,09,106 | 7,86,715 |\n"
+    "| Borrowings + | 2,78,962 | 3,19,158 | 3,34,166 | 3,46,142 |\n\n"
+    "## Cash Flows\n\n| | Mar 2021 | Mar 2022 | Mar 2023 | Mar 2024 |\n|---|---|---|---|---|\n"
+    "| Cash from Operating Activity + | 26,958 | 1,10,654 | 1,15,032 | 1,58,788 |\n\n"
+    "## Ratios\n\n| | Mar 2021 | Mar 2022 | Mar 2023 | Mar 2024 |\n|---|---|---|---|---|\n"
+    "| ROCE % | 6% | 8% | 9% | 10% |\n"
+)
+
+
+class FakeUpstreamError(RuntimeError):
+    """Raised by the fakes at their configured ``error_rate``."""
+
+
+def sample_latency(mean: float, jitter: float, distribution: str = "normal") -> float:
+    """One latency draw: ``fixed``, ``normal`` or ``lognormal`` (long right tail
+    like real API latencies), with mean ``mean`` and standard deviation ``jitter``."""
+    if distribution == "fixed" or mean <= 0:
+        return max(0.0, mean)
+    if distribution == "lognormal":
+        sigma = math.sqrt(math.log1p((jitter / mean) ** 2))
+        return mean * random.lognormvariate(-sigma * sigma / 2, sigma)
+    return max(0.0, random.gauss(mean, jitter))
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers with a canned reply after a simulated latency.
+
+    Like a real client, ``invoke`` blocks the calling thread for the latency
+    while ``ainvoke`` only suspends the calling coroutine. ``reply_fn`` maps
+    the last prompt message to a reply when one canned answer is not enough.
+    ``astream`` yields the reply word by word, ``token_interval`` apart, after
+    the same latency; ``tokens_streamed`` counts the words actually sent.
+    ``error_rate`` of the calls raise ``FakeUpstreamError`` after the latency.
+    """
+
+    reply: str = "This is a canned benchmark answer."
+    reply_fn: Optional[Callable[[str], str]] = None
+    latency: float = 0.5
+    jitter: float = 0.1
+    distribution: str = "normal"
+    error_rate: float = 0.0
+    token_interval: float = 0.0
+    tokens_streamed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _delay(self) -> float:
+        return sample_latency(self.latency, self.jitter, self.distribution)
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        if self.error_rate and random.random() < self.error_rate:
+            raise FakeUpstreamError("fake Gemini error")
+        reply = self.reply_fn(str(messages[-1].content)) if self.reply_fn else self.reply
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+    def _generate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any
+    ) -> ChatResult:
+        time.sleep(self._delay())
+        return self._result(messages)
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any
+    ) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        return self._result(messages)
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self._delay())
+        reply = self._result(messages).generations[0].message.content
+        for token in re.findall(r"\S+\s*", reply):
+            await asyncio.sleep(self.token_interval)
+            self.tokens_streamed += 1
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+def stock_info_reply(ticker_symbol: str = "RELIANCE") -> str:
+    return json.dumps({**CANNED_STOCK_INFO, "ticker_symbol": ticker_symbol})
+
+
+class FakeAsyncTavilyClient:
+    """Async Tavily stand-in returning canned news and Screener pages."""
+
+    def __init__(
+        self,
+        search_latency: float = 0.8,
+        extract_latency: float = 1.2,
+        jitter: float = 0.0,
+        distribution: str = "normal",
+        error_rate: float = 0.0,
+        news: Optional[List[dict]] = None,
+        screener_page: str = CANNED_SCREENER_PAGE,
+    ):
+        self.search_latency = search_latency
+        self.extract_latency = extract_latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.news = CANNED_NEWS if news is None else news
+        self.screener_page = screener_page
+
+    async def _sleep(self, latency: float) -> None:
+        await asyncio.sleep(sample_latency(latency, self.jitter, self.distribution))
+        if self.error_rate and random.random() < self.error_rate:
+            raise FakeUpstreamError("fake Tavily error")
+
+    async def search(self, query: str, **kwargs: Any) -> dict:
+        await self._sleep(self.search_latency)
+        return {"query": query, "results": self.news[: kwargs.get("max_results", 3)]}
+
+    async def extract(self, urls: List[str], **kwargs: Any) -> dict:
+        await self._sleep(self.extract_latency)
+        return {"results": [{"url": url, "raw_content": self.screener_page} for url in urls], "failed_results": []}
+
+
+_TICKERS_RE = re.compile(r"Ticker symbols? - (.+?)\.?\s*$")
+
+
+def _stock_info_reply(prompt: str) -> str:
+    """StocksInfo JSON for the ticker(s) named in a single or batched StockInfo prompt."""
+    match = _TICKERS_RE.search(prompt)
+    tickers = [t.strip() for t in match.group(1).split(",")] if match else ["RELIANCE"]
+    if "Ticker symbols" in prompt:
+        return json.dumps({"stocks": [{**CANNED_STOCK_INFO, "ticker_symbol": t} for t in tickers]})
+    return stock_info_reply(tickers[0])
+
+
+@dataclass
+class FakeProfile:
+    """Latencies (seconds), streaming rate and error rate of the fake upstreams."""
+
+    llm_latency: float = 0.8
+    llm_jitter: float = 0.3
+    token_interval: float = 0.02
+    reply_words: int = 120
+    search_latency: float = 0.8
+    extract_latency: float = 1.2
+    tavily_jitter: float = 0.3
+    distribution: str = "lognormal"
+    error_rate: float = 0.0
+
+
+def install_fakes(profile: FakeProfile) -> Dict[str, Any]:
+    """Point every Gemini and Tavily user in the app at fakes built from ``profile``.
+
+    The fakes are installed with ``config.use_clients``, one model per LLM
+    caller, so ``get_llm(role)`` and ``get_async_tavily_client()`` return
+    them everywhere. Returns the fakes by role.
+    """
+    llm = dict(latency=profile.llm_latency, jitter=profile.llm_jitter, distribution=profile.distribution)
+    llm["error_rate"] = profile.error_rate
+    answer = " ".join(f"word{i}" for i in range(profile.reply_words))
+    fakes = {
+        "ticker_llm": FakeChatModel(reply='{"ticker_symbol": "RELIANCE"}', **llm),
+        "stock_info_llm": FakeChatModel(reply_fn=_stock_info_reply, **llm),
+        "chat_llm": FakeChatModel(reply=answer, token_interval=profile.token_interval, **llm),
+        "tavily": FakeAsyncTavilyClient(
+            profile.search_latency,
+            profile.extract_latency,
+            jitter=profile.tavily_jitter,
+            distribution=profile.distribution,
+            error_rate=profile.error_rate,
+        ),
+    }
+    use_clients(
+        ticker_llm=fakes["ticker_llm"],
+        stock_info_llm=fakes["stock_info_llm"],
+        chat_llm=fakes["chat_llm"],
+        async_tavily=fakes["tavily"],
+    )
+    return fakes
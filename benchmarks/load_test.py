@@ -0,0 +1,304 @@
+"""Throughput and latency of the API endpoints at increasing concurrency, offline.
+
+Gemini and Tavily are replaced by the fakes in ``benchmarks/fakes.py``
+(latency distribution, token rate and error rate set on the command line),
+and the ASGI app is called in-process, so no quota is used and runs are
+repeatable. For each scenario and concurrency level, ``concurrency`` workers
+send requests back to back for ``--duration`` seconds. The caches are
+cleared before each level. Reported per level:
+
+- requests per second, errors (non-200 responses and ``/chat/stream`` error
+  events; upstream errors a node absorbs into its empty fallback show up in
+  ``/metrics`` instead), p50/p95/p99 latency and time to first body byte
+- event-loop lag: how late a 10 ms sleep in the same loop wakes up
+- resident memory at the start, end and peak of the level
+
+Results are written as JSON. With ``--baseline`` the run is compared with an
+earlier JSON file and exits with status 1 when RPS drops or p95 rises by
+more than ``--tolerance``.
+
+    python -m benchmarks.load_test --scenarios langgraph chat_stream --concurrency 1 8 32 --duration 10
+    python -m benchmarks.load_test --out after.json --baseline before.json
+"""
+
+import argparse
+import asyncio
+import csv
+import datetime
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import main
+from benchmarks.fakes import FakeProfile, install_fakes
+from config import NSE_LISTING_PATH
+from services import get_ticker_index
+from services.upstream import get_governor
+
+_SCENARIOS = ["langgraph", "compare", "chat", "chat_stream"]
+
+# One request: (ok, seconds until the first body byte)
+Request = Callable[[int], Awaitable[Tuple[bool, float]]]
+
+
+async def _asgi_request(
+    method: str,
+    path: str,
+    payload: Optional[dict] = None,
+    app: Optional[Callable] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Tuple[int, float, bytes]:
+    """Call the app (``main.app`` by default) directly; returns status, time to first body byte and the body."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"bench")]
+        + [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+    start = time.perf_counter()
+    status, first_byte, parts = 500, 0.0, []
+    sent = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, first_byte
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            if message.get("body"):
+                if not parts:
+                    first_byte = time.perf_counter() - start
+                parts.append(message["body"])
+            if not message.get("more_body"):
+                done.set()
+
+    await (app or main.app)(scope, receive, send)
+    return status, first_byte, b"".join(parts)
+
+
+def _stock_names(limit: int) -> List[str]:
+    """Company names from the NSE listing; the local ticker index resolves them without the LLM."""
+    with open(NSE_LISTING_PATH, newline="", encoding="utf-8") as f:
+        names = [row["NAME OF COMPANY"] for row in csv.DictReader(f) if row.get("NAME OF COMPANY")]
+    return names[:limit] if limit else names
+
+
+def _scenarios(names: List[str]) -> Dict[str, Request]:
+    async def langgraph(i: int):
+        status, first, _ = await _asgi_request("POST", "/langgraph", {"stock_name": names[i % len(names)]})
+        return status == 200, first
+
+    async def compare(i: int):
+        picks = [names[(3 * i + k) % len(names)] for k in range(3)]
+        status, first, _ = await _asgi_request("POST", "/compare", {"stock_names": picks})
+        return status == 200, first
+
+    async def chat(i: int):
+        status, first, _ = await _asgi_request("POST", "/chat", {"message": f"How did quarter {i} go?"})
+        return status == 200, first
+
+    async def chat_stream(i: int):
+        status, first, body = await _asgi_request("POST", "/chat/stream", {"message": f"How did quarter {i} go?"})
+        return status == 200 and b'"status": "error"' not in body, first
+
+    return {"langgraph": langgraph, "compare": compare, "chat": chat, "chat_stream": chat_stream}
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):  # not Linux: peak RSS is the best available
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def _percentiles(samples: List[float], scale: float = 1e3) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * scale, 2)
+
+    return {"p50": pct(50), "p95": pct(95), "p99": pct(99), "max": round(ordered[-1] * scale, 2)}
+
+
+async def _monitor(stop: asyncio.Event, lags: List[float], rss: List[float], interval: float = 0.01) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+        if len(lags) % 10 == 0:
+            rss.append(_rss_mb())
+
+
+async def run_level(request: Request, concurrency: int, duration: float) -> Dict[str, Any]:
+    await main.clear_cache()
+    latencies: List[float] = []
+    first_bytes: List[float] = []
+    errors = 0
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                ok, first = await request(next(counter))
+            except Exception:
+                ok, first = False, 0.0
+            latencies.append(time.perf_counter() - start)
+            first_bytes.append(first)
+            errors += not ok
+
+    lags: List[float] = []
+    rss = [_rss_mb()]
+    stop = asyncio.Event()
+    monitor = asyncio.ensure_future(_monitor(stop, lags, rss))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    rss.append(_rss_mb())
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": _percentiles(latencies),
+        "first_byte_ms": _percentiles(first_bytes),
+        "loop_lag_ms": _percentiles(lags),
+        "rss_mb": {"start": round(rss[0], 1), "end": round(rss[-1], 1), "peak": round(max(rss), 1)},
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare_runs(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions of ``current`` against ``baseline``: RPS drop or p95 rise beyond ``tolerance``."""
+    before = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        old = before.get((row["scenario"], row["concurrency"]))
+        if old is None:
+            continue
+        label = f"{row['scenario']} x{row['concurrency']}"
+        if row["rps"] < old["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: rps {old['rps']} -> {row['rps']}")
+        p95, old_p95 = row["latency_ms"]["p95"], old["latency_ms"]["p95"]
+        if p95 is not None and old_p95 is not None and p95 > old_p95 * (1 + tolerance):
+            regressions.append(f"{label}: p95 {old_p95} ms -> {p95} ms")
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> dict:
+    profile = FakeProfile(
+        llm_latency=args.llm_latency,
+        llm_jitter=args.llm_jitter,
+        token_interval=args.token_interval,
+        reply_words=args.reply_words,
+        search_latency=args.search_latency,
+        extract_latency=args.extract_latency,
+        tavily_jitter=args.tavily_jitter,
+        distribution=args.distribution,
+        error_rate=args.error_rate,
+    )
+    install_fakes(profile)
+    get_ticker_index().learn = lambda query, symbol: False  # keep runs from writing learned aliases
+    if not args.governor:
+        for name in ("gemini", "tavily"):  # fakes have no quota; measure the app, not the rate limits
+            governor = get_governor(name)
+            governor.rate, governor.max_concurrency = 0, 1_000_000
+    main.logger.setLevel("WARNING")
+
+    scenarios = _scenarios(_stock_names(args.stocks))
+    results = []
+    print(
+        f"{'scenario':>12}{'conc':>6}{'reqs':>7}{'err':>5}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'lag p99':>9}{'rss MB':>8}"
+    )
+    for scenario in args.scenarios:
+        for concurrency in args.concurrency:
+            row = {"scenario": scenario, **await run_level(scenarios[scenario], concurrency, args.duration)}
+            results.append(row)
+            lat = row["latency_ms"]
+            print(
+                f"{scenario:>12}{concurrency:>6}{row['requests']:>7}{row['errors']:>5}{row['rps']:>9.1f}"
+                f"{lat['p50']:>9.0f}{lat['p95']:>9.0f}{lat['p99']:>9.0f}"
+                f"{row['loop_lag_ms']['p99'] or 0:>9.1f}{row['rss_mb']['peak']:>8.0f}"
+            )
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=_SCENARIOS, default=_SCENARIOS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--stocks", type=int, default=0, help="stock names to cycle through (0: whole listing)")
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    parser.add_argument("--llm-jitter", type=float, default=0.3)
+    parser.add_argument("--token-interval", type=float, default=0.02, help="seconds between streamed words")
+    parser.add_argument("--reply-words", type=int, default=120)
+    parser.add_argument("--search-latency", type=float, default=0.8)
+    parser.add_argument("--extract-latency", type=float, default=1.2)
+    parser.add_argument("--tavily-jitter", type=float, default=0.3)
+    parser.add_argument("--distribution", choices=["fixed", "normal", "lognormal"], default="lognormal")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake upstream calls that fail")
+    parser.add_argument("--governor", action="store_true", help="keep the configured upstream rate limits")
+    parser.add_argument("--out", default="load_test.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed RPS drop / p95 rise before failing")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.out}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_runs(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,194 @@
+"""Throughput of the Screener.in markdown cleaner, old multi-pass vs single-pass.
+
+Runs both cleaners over a corpus of Screener pages (synthetic pages shaped
+like Tavily's markdown extract, plus any ``*.md`` files saved under
+``--corpus``) and a set of pathological inputs, checks that the outputs are
+identical and reports throughput in MB/s. ``--fuzz N`` additionally diffs
+both cleaners on N random pages stitched together from chrome fragments;
+pages where a removed image or logo splits "Stock analysis" / "Privacy" are
+expected to differ (see ``_clean_screener_content``) and counted separately.
+
+    python -m benchmarks.screener_cleaner --corpus saved_pages/ --fuzz 20000
+"""
+
+import argparse
+import glob
+import os
+import random
+import re
+import time
+from typing import Callable, Dict, List
+
+from nodes.screener_extract_node import _NAV_LINKS, _clean_screener_content
+
+# The implementation before the single-pass rewrite, kept as the reference
+_LEGACY_NAV_LINK_PATTERNS = [
+    r"\[Chart\]\(#chart\)\s*",
+    r"\[Analysis\]\(#analysis\)\s*",
+    r"\[Peers\]\(#peers\)\s*",
+    r"\[Quarters\]\(#quarters\)\s*",
+    r"\[Profit & Loss\]\(#profit-loss\)\s*",
+    r"\[Balance Sheet\]\(#balance-sheet\)\s*",
+    r"\[Cash Flow\]\(#cash-flow\)\s*",
+    r"\[Ratios\]\(#ratios\)\s*",
+    r"\[Investors\]\(#shareholding\)\s*",
+    r"\[Documents\]\(#documents\)\s*",
+]
+
+
+def legacy_clean(raw_content: str) -> str:
+    content = re.sub(r"!\[.*?\]\(https://cdn-static\.screener\.in.*?\)", "", raw_content)
+    content = re.sub(r"#*\s*Screener Logo\s*", "", content, flags=re.IGNORECASE)
+    content = re.sub(
+        r"Stock analysis.*?Privacy.*?(Mittal Analytics.*?C-MOTS.*?Privacy.*?)?$",
+        "",
+        content,
+        flags=re.DOTALL | re.IGNORECASE,
+    )
+    content = re.sub(r"\(#top\)\s*", "", content).strip()
+    for pattern in _LEGACY_NAV_LINK_PATTERNS:
+        content = re.sub(pattern, "", content)
+    return content
+
+
+_HEADER = (
+    "![Screener Logo](https://cdn-static.screener.in/img/logo-black.f44abb4998d1.svg)\n\n"
+    "# Screener Logo\n\n"
+    "[Login](https://www.screener.in/login/) [Get free account](https://www.screener.in/register/)\n\n"
+    "# {name}\n\n"
+    + " ".join(f"[{label}](#{anchor})" for label, anchor in _NAV_LINKS)
+    + "\n\n"
+    "Market Cap ₹ {mcap:,} Cr. Current Price ₹ {price:,} High / Low ₹ {high:,} / {low:,} Stock P/E {pe}\n\n"
+    "![](https://cdn-static.screener.in/icons/pdf.svg) [Annual report](https://www.bseindia.com/x.pdf)\n\n"
+)
+_FOOTER = (
+    "\n\n[(#top)](#top)\n\n"
+    "Stock analysis and screening tool\n\nMittal Analytics Private Ltd © 2009-2025\n\n"
+    "Data provided by C-MOTS Internet Technologies Pvt Ltd\n\n[Terms](https://www.screener.in/guides/terms/) & "
+    "[Privacy](https://www.screener.in/guides/privacy/).\n"
+)
+_SECTIONS = ("Quarterly Results", "Profit & Loss", "Balance Sheet", "Cash Flows", "Ratios", "Shareholding Pattern")
+
+
+def _table(rng: random.Random, rows: int, cols: int) -> str:
+    periods = [f"Mar {2025 - cols + i}" for i in range(cols)]
+    lines = ["| | " + " | ".join(periods) + " |", "|---" * (cols + 1) + "|"]
+    for r in range(rows):
+        values = " | ".join(f"{rng.randint(-5000, 250000):,}" for _ in range(cols))
+        lines.append(f"| Row {r} + | {values} |")
+    return "\n".join(lines)
+
+
+def screener_page(rng: random.Random, rows: int = 12, cols: int = 12) -> str:
+    body = [
+        _HEADER.format(
+            name=f"Company {rng.randint(1, 999)} Ltd",
+            mcap=rng.randint(1000, 2000000),
+            price=rng.randint(10, 5000),
+            high=rng.randint(10, 5000),
+            low=rng.randint(10, 5000),
+            pe=round(rng.uniform(5, 90), 1),
+        )
+    ]
+    for section in _SECTIONS:
+        body.append(f"## {section}\n\nConsolidated Figures in Rs. Crores\n\n{_table(rng, rows, cols)}\n\n[(#top)](#top)\n")
+    return "\n".join(body) + _FOOTER
+
+
+def corpus(corpus_dir: str = "") -> Dict[str, str]:
+    rng = random.Random(7)
+    pages = {
+        "small page": screener_page(rng, rows=4, cols=4),
+        "typical page": screener_page(rng),
+        "large page": screener_page(rng, rows=200, cols=13),
+        "no chrome": _table(rng, 400, 12),
+    }
+    if corpus_dir:
+        for path in sorted(glob.glob(os.path.join(corpus_dir, "*.md"))):
+            with open(path, encoding="utf-8") as f:
+                pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def pathological(scale: int) -> Dict[str, str]:
+    """Inputs that make the lazy/DOTALL patterns of the old cleaner backtrack."""
+    rng = random.Random(11)
+    page = screener_page(rng, rows=50)
+    return {
+        # The DOTALL footer scans the rest of the page for "Privacy" once per occurrence
+        "many 'Stock analysis', no Privacy": ("Stock analysis of the quarter. " + "x" * 40 + "\n") * scale,
+        # Every whitespace offset restarts "#*\s*" and runs to the end of the run
+        "long whitespace run": "## Results" + " " * (scale * 20) + "end\n" + page,
+        # Every "![" rescans the rest of the line for the CDN target
+        "unterminated images on one line": "![chart](x) " * scale + "\n" + page,
+        "cdn image without ')'": ("![a](https://cdn-static.screener.in/" + "y" * 30) * (scale // 4) + "\n" + page,
+    }
+
+
+def fuzz_page(rng: random.Random) -> str:
+    fragments = [
+        "![Screener Logo](https://cdn-static.screener.in/logo.svg)", "![", "](https://cdn-static.screener.in/a)",
+        "![x](y)", ")", "[", "]", "Screener Logo", "screener LOGO", "#", "##", " ", "  ", "\n", "\n\n", "\t",
+        "(#top)", "[(#top)](#top)", "Stock analysis", "STOCK ANALYSIS", "Privacy", "privacy.", "Mittal Analytics",
+        "C-MOTS", "Sales", "| 1,234 |", "text", "Stock", " analysis",
+    ] + [f"[{label}](#{anchor})" for label, anchor in _NAV_LINKS]
+    return "".join(rng.choice(fragments) for _ in range(rng.randint(0, 25)))
+
+
+def _split_footer(text: str) -> bool:
+    """Whether the cleaners only disagree because image/logo removal joins a footer phrase."""
+    joined = re.sub(r"!\[.*?\]\(https://cdn-static\.screener\.in.*?\)", "", text)
+    joined = re.sub(r"#*\s*Screener Logo\s*", "", joined, flags=re.IGNORECASE)
+    return legacy_clean(text) == _clean_screener_content(joined)
+
+
+def throughput(fn: Callable[[str], str], text: str, min_time: float) -> float:
+    runs, start = 0, time.perf_counter()
+    while True:
+        fn(text)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return len(text.encode("utf-8")) * runs / elapsed / 1e6
+
+
+def run(corpus_dir: str, scale: int, min_time: float, fuzz: int) -> None:
+    inputs = {**corpus(corpus_dir), **pathological(scale)}
+    print(f"{'input':<34}{'size':>10}{'old MB/s':>12}{'new MB/s':>12}{'speedup':>9}  identical")
+    mismatches: List[str] = []
+    for name, text in inputs.items():
+        identical = legacy_clean(text) == _clean_screener_content(text)
+        if not identical:
+            mismatches.append(name)
+        old = throughput(legacy_clean, text, min_time)
+        new = throughput(_clean_screener_content, text, min_time)
+        size = f"{len(text.encode('utf-8')) / 1024:.0f} KB"
+        print(f"{name:<34}{size:>10}{old:>12.2f}{new:>12.2f}{new / old:>8.1f}x  {identical}")
+
+    if fuzz:
+        rng = random.Random(3)
+        failed, split = [], 0
+        for text in (fuzz_page(rng) for _ in range(fuzz)):
+            if legacy_clean(text) == _clean_screener_content(text):
+                continue
+            if _split_footer(text):
+                split += 1
+            else:
+                failed.append(text)
+        print(f"fuzz: {len(failed)}/{fuzz} random pages differ ({split} more with a split footer phrase)")
+        for text in failed[:5]:
+            print(f"  {text!r}\n    old={legacy_clean(text)!r}\n    new={_clean_screener_content(text)!r}")
+        mismatches += ["fuzz"] if failed else []
+
+    if mismatches:
+        raise SystemExit(f"outputs differ for: {', '.join(mismatches)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default="", help="directory of saved Screener markdown pages (*.md)")
+    parser.add_argument("--scale", type=int, default=2000, help="size knob for the pathological inputs")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to spend per measurement")
+    parser.add_argument("--fuzz", type=int, default=0, help="random pages to diff between both cleaners")
+    args = parser.parse_args()
+    run(args.corpus, args.scale, args.min_time, args.fuzz)
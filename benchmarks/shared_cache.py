@@ -0,0 +1,110 @@
+"""Upstream work and latency of N worker processes sharing one analysis cache.
+
+Each worker process runs its own ``AnalysisCache`` and asks for the same
+stocks in its own random order, ``--concurrency`` requests at a time; a miss
+"runs the workflow" (sleeps ``--latency`` seconds) and counts as one
+computation. With per-process caches every worker computes every stock;
+with the SQLite backend each stock should be computed once in total and the
+other workers wait for it and read the stored result.
+
+    python -m benchmarks.shared_cache --workers 8 --stocks 50
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from services.cache import AnalysisCache
+from services.shared_cache import make_cache_backend
+from services.singleflight import SingleFlight
+
+
+def _state(name: str) -> Dict[str, object]:
+    return {
+        "User_stock_name": name,
+        "TickerSymbol": name.upper(),
+        "screener_data": f"{name} quarterly results | " * 2000,
+        "news_articles": [{"title": f"{name} {i}", "url": f"https://news/{i}", "content": "x" * 800} for i in range(5)],
+    }
+
+
+async def _worker(index: int, args: argparse.Namespace, path: str) -> Dict[str, object]:
+    cache = AnalysisCache(
+        max_entries=1000,
+        max_bytes=1 << 30,
+        flights=SingleFlight(),
+        backend=make_cache_backend(args.backend, path),
+        json_entries=True,
+    )
+    computed = 0
+
+    async def compute(name: str):
+        nonlocal computed
+        computed += 1
+        await asyncio.sleep(args.latency)
+        return _state(name)
+
+    names = [f"stock{i}" for i in range(args.stocks)]
+    random.Random(index).shuffle(names)
+    queue = list(names * args.rounds)
+    latencies: List[float] = []
+
+    async def client():
+        while queue:
+            name = queue.pop()
+            start = time.perf_counter()
+            await cache.get_or_compute(name, lambda: compute(name))
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    return {"computed": computed, "latencies": latencies, "local_bytes": cache.stats()["bytes"]}
+
+
+def _run_worker(index, args, path, barrier, results) -> None:
+    barrier.wait()
+    results.put(asyncio.run(_worker(index, args, path)))
+
+
+def run(args: argparse.Namespace) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "analysis.sqlite3")
+        barrier, results = ctx.Barrier(args.workers + 1), ctx.Queue()
+        procs = [ctx.Process(target=_run_worker, args=(i, args, path, barrier, results)) for i in range(args.workers)]
+        for proc in procs:
+            proc.start()
+        barrier.wait()
+        start = time.perf_counter()
+        reports = [results.get() for _ in procs]
+        elapsed = time.perf_counter() - start
+        for proc in procs:
+            proc.join()
+        shared_mb = os.path.getsize(path) / 2**20 if os.path.exists(path) else 0.0
+
+    latencies = sorted(x for r in reports for x in r["latencies"])
+    computed = sum(r["computed"] for r in reports)
+    print(
+        f"{args.backend:>7}: {computed:5d} computations for {args.stocks} stocks "
+        f"({computed / args.stocks:.2f} per stock), wall {elapsed:6.2f}s, "
+        f"p50 {statistics.median(latencies) * 1e3:7.1f} ms, p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1e3:7.1f} ms, "
+        f"local cache {sum(r['local_bytes'] for r in reports) / 2**20:6.1f} MB in total, shared file {shared_mb:5.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--stocks", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3, help="times each worker asks for every stock")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight per worker")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds one workflow run takes")
+    parser.add_argument("--backend", choices=["memory", "sqlite", "both"], default="both")
+    args = parser.parse_args()
+    for backend in (["memory", "sqlite"] if args.backend == "both" else [args.backend]):
+        run(argparse.Namespace(**{**vars(args), "backend": backend}))
@@ -0,0 +1,223 @@
+"""Cost of /chat/stream frames with and without coalescing at many concurrent streams.
+
+Runs against a fake Gemini model that streams its answer word by word. By
+default the ASGI app is called in-process and the ``http.response.body``
+messages are counted (each is one socket write, i.e. one ``send`` syscall
+under uvicorn). ``--uvicorn`` serves the app from a uvicorn subprocess over
+real sockets and reports that process's CPU time, which includes the HTTP
+framing and syscalls each write costs. ``--disconnect`` makes every client
+leave after its first frame and reports how many tokens the fake model still
+produced, showing the upstream stream is cancelled.
+
+    python -m benchmarks.sse_streams --streams 1000 --tokens 100 --token-interval 0.01
+    python -m benchmarks.sse_streams --streams 1000 --uvicorn
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+from langchain_core.messages import AIMessageChunk
+
+import main
+from benchmarks.fakes import FakeChatModel
+from config import get_llm, use_clients
+from services.streaming import coalesce as coalesce_frames
+from services.upstream import get_governor
+
+_BODY = json.dumps({"message": "How did the quarter go?"}).encode()
+
+
+class TokenStream:
+    """Minimal ``astream`` stand-in: LangChain's per-chunk callback overhead would
+    otherwise dominate the CPU numbers and hide the cost of the SSE layer."""
+
+    def __init__(self, tokens: int, latency: float, token_interval: float):
+        self.tokens = [AIMessageChunk(content=f"tok{i} ") for i in range(tokens)]
+        self.latency = latency
+        self.token_interval = token_interval
+        self.tokens_streamed = 0
+
+    async def astream(self, messages):
+        await asyncio.sleep(self.latency)
+        for token in self.tokens:
+            await asyncio.sleep(self.token_interval)
+            self.tokens_streamed += 1
+            yield token
+
+
+async def _per_chunk(source, **kwargs):
+    """The previous behaviour: one frame per upstream chunk, no read-ahead."""
+    async for chunk in source:
+        yield chunk
+
+
+def _setup(streams: int, tokens: int, token_interval: float, coalesce: bool, full_model: bool):
+    if full_model:
+        reply = " ".join(f"tok{i}" for i in range(tokens))
+        fake = FakeChatModel(reply=reply, latency=0.05, jitter=0.01, token_interval=token_interval)
+    else:
+        fake = TokenStream(tokens, latency=0.05, token_interval=token_interval)
+    use_clients(chat_llm=fake)
+    governor = get_governor("gemini")  # measure the streaming path, not the rate limit
+    governor.rate, governor.max_concurrency = 0, streams
+    main.coalesce = coalesce_frames if coalesce else _per_chunk
+    main._streams = main.StreamStats()
+    main.logger.setLevel("WARNING")
+    return fake
+
+
+async def _asgi_stream(disconnect_after: int) -> dict:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/chat/stream",
+        "raw_path": b"/chat/stream",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+    counts = {"writes": 0, "bytes": 0}
+    disconnected = asyncio.Event()
+    sent_body = False
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": _BODY, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            counts["writes"] += 1
+            counts["bytes"] += len(message["body"])
+            if disconnect_after and counts["writes"] >= disconnect_after:
+                disconnected.set()
+
+    await main.app(scope, receive, send)
+    return counts
+
+
+async def run_in_process(streams: int, tokens: int, disconnect: bool) -> dict:
+    fake = get_llm("chat")
+    cpu, wall = time.process_time(), time.perf_counter()
+    results = await asyncio.gather(*(_asgi_stream(1 if disconnect else 0) for _ in range(streams)))
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    await asyncio.sleep(0.2)  # let cancelled producers finish unwinding
+    return {
+        "writes": sum(r["writes"] for r in results),
+        "bytes": sum(r["bytes"] for r in results),
+        "cpu_s": round(cpu, 2),
+        "wall_s": round(wall, 2),
+        "tokens_streamed": fake.tokens_streamed,
+        "tokens_requested": streams * tokens,
+    }
+
+
+async def _socket_stream(port: int) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        b"POST /chat/stream HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\nConnection: close\r\n"
+        + f"Content-Length: {len(_BODY)}\r\n\r\n".encode()
+        + _BODY
+    )
+    received = 0
+    while chunk := await reader.read(65536):
+        received += len(chunk)
+    writer.close()
+    return received
+
+
+async def _get_json(port: int, path: str) -> dict:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n".encode())
+    raw = await reader.read()
+    writer.close()
+    return json.loads(raw.split(b"\r\n\r\n", 1)[1])
+
+
+def run_uvicorn(streams: int, tokens: int, token_interval: float, coalesce: bool, full_model: bool) -> dict:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    args = [sys.executable, "-m", "benchmarks.sse_streams", "--serve", str(port), "--streams", str(streams)]
+    args += ["--tokens", str(tokens), "--token-interval", str(token_interval)]
+    args += ["--full-model"] * full_model + ["--per-chunk"] * (not coalesce)
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    server = subprocess.Popen(args)
+
+    async def drive() -> dict:
+        for _ in range(100):
+            try:
+                await _get_json(port, "/health")
+                break
+            except OSError:
+                await asyncio.sleep(0.1)
+        wall = time.perf_counter()
+        received = await asyncio.gather(*(_socket_stream(port) for _ in range(streams)))
+        wall = time.perf_counter() - wall
+        stats = (await _get_json(port, "/upstream/stats"))["chat_streams"]
+        return {"bytes": sum(received), "wall_s": round(wall, 2), "stream_stats": stats}
+
+    try:
+        result = asyncio.run(drive())
+    finally:
+        server.terminate()
+        server.wait()
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    stats = result.pop("stream_stats")
+    return {
+        **result,
+        "writes": stats["frames"] + 2 * streams,  # response start and final done frame per stream
+        "cpu_s": round(after.ru_utime + after.ru_stime - before.ru_utime - before.ru_stime, 2),
+        "tokens_streamed": stats["chunks"],
+        "tokens_requested": streams * tokens,
+    }
+
+
+def _report(mode: str, row: dict) -> None:
+    print(
+        f"{mode:>10}: {row['writes']:>8} writes, {row['bytes'] / 1e6:6.2f} MB, "
+        f"cpu {row['cpu_s']:6.2f}s, wall {row['wall_s']:6.2f}s, "
+        f"tokens {row['tokens_streamed']}/{row['tokens_requested']}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=1000)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--token-interval", type=float, default=0.01)
+    parser.add_argument("--disconnect", action="store_true", help="clients leave after the first frame")
+    parser.add_argument("--full-model", action="store_true", help="stream through the LangChain fake chat model")
+    parser.add_argument("--uvicorn", action="store_true", help="serve from a uvicorn subprocess over sockets")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--per-chunk", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        import uvicorn
+
+        _setup(args.streams, args.tokens, args.token_interval, not args.per_chunk, args.full_model)
+        uvicorn.run(main.app, host="127.0.0.1", port=args.serve, log_level="warning", backlog=4096)
+        sys.exit()
+
+    for coalesce in (False, True):
+        mode = "coalesced" if coalesce else "per-chunk"
+        if args.uvicorn:
+            _report(mode, run_uvicorn(args.streams, args.tokens, args.token_interval, coalesce, args.full_model))
+        else:
+            _setup(args.streams, args.tokens, args.token_interval, coalesce, args.full_model)
+            _report(mode, asyncio.run(run_in_process(args.streams, args.tokens, args.disconnect)))
@@ -0,0 +1,102 @@
+"""Cold-start cost: ``import main`` time and time to the first /health response.
+
+Each measurement runs in a fresh interpreter. ``-X importtime`` gives the
+total import time of ``main`` and its heaviest direct imports; then a
+uvicorn worker is started and ``/health`` polled until it answers, which
+is what a new worker or serverless instance pays before serving. Finally
+``POST /warmup`` reports what is still built on first use (clients, graphs,
+indexes).
+
+    python -m benchmarks.startup --runs 5
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile(module: str = "main") -> Tuple[float, List[Tuple[str, float]]]:
+    """Seconds to import ``module`` and its direct imports by cumulative seconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    )
+    total, children = 0.0, []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)) / 1e6, len(match.group(3)), match.group(4)
+        if depth == 1 and name == module:
+            total = cumulative
+        elif depth == 3:  # a direct import of ``module``
+            children.append((name, cumulative))
+    return total, sorted(children, key=lambda c: -c[1])
+
+
+def _http(port: int, method: str, path: str) -> Optional[dict]:
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=60) as sock:
+            sock.sendall(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+            raw = b""
+            while chunk := sock.recv(65536):
+                raw += chunk
+    except OSError:
+        return None
+    head, _, body = raw.partition(b"\r\n\r\n")
+    return json.loads(body) if b" 200 " in head.split(b"\r\n", 1)[0] else None
+
+
+def first_health(warmup_on_startup: bool) -> Dict[str, object]:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    env = {**os.environ, "WARMUP_ON_STARTUP": "1" if warmup_on_startup else "0"}
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while _http(port, "GET", "/health") is None:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited before answering /health")
+            time.sleep(0.005)
+        health = time.perf_counter() - start
+        warmup = _http(port, "POST", "/warmup")
+        return {"health_s": health, "warmup": (warmup or {}).get("seconds", {})}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(runs: int, top: int) -> None:
+    profiles = [import_profile() for _ in range(runs)]
+    print(f"import main: median {statistics.median(p[0] for p in profiles):.3f}s over {runs} runs")
+    for name, seconds in profiles[-1][1][:top]:
+        print(f"  {name:<32}{seconds:8.3f}s")
+
+    for warmup_on_startup in (False, True):
+        results = [first_health(warmup_on_startup) for _ in range(runs)]
+        label = "with WARMUP_ON_STARTUP" if warmup_on_startup else "lazy"
+        print(f"first /health ({label}): median {statistics.median(r['health_s'] for r in results):.3f}s")
+        steps = results[-1]["warmup"]
+        print(f"  then /warmup: {sum(steps.values()):.3f}s  {steps}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="heaviest direct imports of main to list")
+    args = parser.parse_args()
+    run(args.runs, args.top)
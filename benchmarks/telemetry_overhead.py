@@ -0,0 +1,71 @@
+"""Per-call cost of the telemetry layer and of rendering /metrics.
+
+Times a no-op async node with and without ``instrument_node``, an empty
+``upstream_slot`` block (governor only vs governor plus telemetry), and
+``render()`` after the recorded series have grown to a production-like size.
+
+    python -m benchmarks.telemetry_overhead --calls 200000
+"""
+
+import argparse
+import asyncio
+import time
+
+from services.telemetry import Telemetry, get_telemetry, instrument_node
+from services.upstream import get_governor, upstream_slot
+
+
+async def _node(state):
+    return {"screener_data": "x" * 2000, "news_articles": [1, 2, 3]}
+
+
+async def _per_call(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        await fn(None)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+async def _slot(_):
+    async with upstream_slot("gemini"):
+        pass
+
+
+async def run(calls: int) -> None:
+    bare = await _per_call(_node, calls)
+    wrapped = await _per_call(instrument_node("BenchNode", _node), calls)
+    print(f"node call:      {bare:6.2f} us bare, {wrapped:6.2f} us instrumented (+{wrapped - bare:.2f} us)")
+
+    governor = get_governor("gemini")
+    governor.rate, governor.max_concurrency = 0, 1
+    telemetry = get_telemetry()
+    telemetry.enabled = False
+    without = await _per_call(_slot, calls)
+    telemetry.enabled = True
+    with_telemetry = await _per_call(_slot, calls)
+    print(
+        f"upstream_slot:  {without:6.2f} us bare, {with_telemetry:6.2f} us recorded "
+        f"(+{with_telemetry - without:.2f} us)"
+    )
+
+    # About what a busy process accumulates: 10 nodes, 30 routes x 4 statuses, 2 upstreams
+    big = Telemetry()
+    for i in range(10):
+        big.record_node(f"Node{i}", 0.1, "ok", {"screener_data": 50_000, "news_articles": 5})
+        big.record_node(f"Node{i}", 0.1, "empty")
+    for i in range(30):
+        for status in (200, 404, 422, 500):
+            big.record_request("POST", f"/route{i}", status, 0.05)
+    for upstream in ("gemini", "tavily"):
+        big.record_upstream(upstream, 0.5, "ok")
+    start = time.perf_counter()
+    for _ in range(100):
+        text = big.render()
+    print(f"render:         {(time.perf_counter() - start) / 100 * 1e3:6.2f} ms for {len(text.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.calls))
@@ -0,0 +1,78 @@
+"""Indexing rate, query latency and IVF recall of the in-process vector index.
+
+Fills ``LocalVectorIndex`` with synthetic Screener/news-like chunks and, for
+each size, times exact search against the approximate IVF search used above
+``exact_limit`` and reports the IVF's recall@k against the exact results.
+
+    python -m benchmarks.vector_index --sizes 1000 10000 100000
+"""
+
+import argparse
+import random
+import time
+
+from services.vector_index import HashingEmbeddings, LocalVectorIndex
+
+_WORDS = (
+    "revenue sales profit margin operating ebitda debt borrowings reserves equity cash flow capex dividend "
+    "quarter annual growth guidance order book exports refinery retail telecom pharma bank deposits loans "
+    "npa provisioning interest coverage working capital inventory receivables payables promoter pledge "
+    "shareholding fii dii acquisition merger subsidiary plant capacity utilisation demand pricing raw material "
+    "steel cement power renewable solar battery semiconductor software services outsourcing rupee crude"
+).split()
+
+
+def _topics(rng: random.Random, n: int):
+    """Word pools for ``n`` topics: a few domain words plus topic-specific names and numbers."""
+    return [rng.sample(_WORDS, 12) + [f"entity{t}x{j}" for j in range(8)] for t in range(n)]
+
+
+def _chunk(rng: random.Random, topic) -> str:
+    return " ".join(rng.choice(topic) if rng.random() < 0.7 else rng.choice(_WORDS) for _ in range(rng.randint(40, 160)))
+
+
+def run(sizes, queries: int, k: int) -> None:
+    rng = random.Random(7)
+    embeddings = HashingEmbeddings()
+    topics = _topics(rng, 300)
+    questions = [" ".join(rng.choice(rng.choice(topics)) for _ in range(rng.randint(4, 10))) for _ in range(queries)]
+    print(f"{'chunks':>8}{'add/s':>10}{'exact ms':>10}{'ivf ms':>10}{'recall@' + str(k):>11}{'score ratio':>13}")
+    for size in sizes:
+        texts = [_chunk(rng, rng.choice(topics)) for _ in range(size)]
+        metadatas = [{"ticker": f"T{i % 500}", "source": "news"} for i in range(size)]
+        exact = LocalVectorIndex(embeddings, exact_limit=size)
+        start = time.perf_counter()
+        for i in range(0, size, 100):
+            exact.add_texts(texts[i : i + 100], metadatas[i : i + 100])
+        add_rate = size / (time.perf_counter() - start)
+
+        approximate = LocalVectorIndex(embeddings, exact_limit=0)
+        approximate._vectors, approximate._alive = exact._vectors, exact._alive  # same vectors, no re-embedding
+        approximate._size, approximate._ids = exact._size, exact._ids
+        approximate._texts, approximate._metadatas = exact._texts, exact._metadatas
+        approximate._row_by_id, approximate._by_value = exact._row_by_id, exact._by_value
+        approximate.similarity_search(questions[0], k)  # builds the IVF outside the timing
+
+        timings, results = {}, {}
+        for name, index in (("exact", exact), ("ivf", approximate)):
+            start = time.perf_counter()
+            results[name] = [index.similarity_search_with_score(q, k) for q in questions]
+            timings[name] = (time.perf_counter() - start) / queries * 1e3
+        hits = sum(
+            len({d.id for d, _ in e} & {d.id for d, _ in a}) for e, a in zip(results["exact"], results["ivf"])
+        )
+        # Near-ties make recall pessimistic; the score ratio shows how close the IVF answers are
+        ratio = sum(sum(s for _, s in a) / sum(s for _, s in e) for e, a in zip(results["exact"], results["ivf"]))
+        print(
+            f"{size:>8}{add_rate:>10.0f}{timings['exact']:>10.2f}{timings['ivf']:>10.2f}"
+            f"{hits / (queries * k):>11.2f}{ratio / queries:>13.3f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=4)
+    args = parser.parse_args()
+    run(args.sizes, args.queries, args.k)
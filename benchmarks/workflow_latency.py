@@ -0,0 +1,103 @@
+"""End-to-end latency of the analysis workflow topologies against fake upstreams.
+
+Compares the previous topology (every branch waits for ticker resolution),
+the current one (news in parallel with the ticker branch) and speculative
+mode, for a name the local index resolves and for names that need the LLM.
+Node caching is disabled so every run pays full upstream latency.
+
+    python -m benchmarks.workflow_latency --runs 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from langgraph.graph import StateGraph, START, END
+
+from benchmarks.fakes import FakeAsyncTavilyClient, FakeChatModel, stock_info_reply
+from config import use_clients
+from models import State
+from services import get_ticker_index
+from workflows.get_nodes import get_nodes
+from workflows.workflow import build_workflow, speculator
+
+# name -> ticker the (fake) LLM resolves it to
+_CASES = {
+    "Reliance Industries": "RELIANCE",  # local index hit
+    "reliance jio": "RELIANCE",  # LLM fallback, speculative guess correct
+    "hindustan": "HINDUNILVR",  # LLM fallback, speculative guess wrong
+}
+
+
+def _install_fakes(ticker_latency: float, info_latency: float, news_latency: float, extract_latency: float) -> None:
+    # Keep LLM answers out of the index so every run takes the same path
+    get_ticker_index().learn = lambda query, symbol: False
+
+    def ticker_reply(prompt: str) -> str:
+        name = prompt.split("stock name: ", 1)[1].split("\n", 1)[0]
+        return '{"ticker_symbol": "%s"}' % _CASES.get(name, "RELIANCE")
+
+    use_clients(
+        ticker_llm=FakeChatModel(reply_fn=ticker_reply, latency=ticker_latency, jitter=0),
+        stock_info_llm=FakeChatModel(reply=stock_info_reply(), latency=info_latency, jitter=0),
+        async_tavily=FakeAsyncTavilyClient(search_latency=news_latency, extract_latency=extract_latency),
+    )
+
+
+def _sequential_workflow(nodes: dict):
+    """The previous topology: START -> ScreenerURLNode -> [all three branches] -> END."""
+    graph = StateGraph(state_schema=State)
+    for name, fn in nodes.items():
+        graph.add_node(name, fn)
+    graph.add_edge(START, "ScreenerURLNode")
+    for name in ("StockInfoNode", "ScreenerExtractNode", "StockNewsNode"):
+        graph.add_edge("ScreenerURLNode", name)
+        graph.add_edge(name, END)
+    return graph.compile()
+
+
+async def _time(workflow, name: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await workflow.ainvoke({"User_stock_name": name})
+        samples.append(time.perf_counter() - start)
+    return statistics.mean(samples)
+
+
+async def run(runs: int, latencies: dict) -> None:
+    _install_fakes(**latencies)
+    nodes = get_nodes(cached=False)
+    topologies = {
+        "sequential (before)": _sequential_workflow(nodes),
+        "parallel news": build_workflow(nodes=nodes),
+        "parallel + speculative": build_workflow(speculative=True, nodes=nodes),
+    }
+    print("fake latencies (s): " + ", ".join(f"{k}={v}" for k, v in latencies.items()))
+    print(f"{'stock name':<22}" + "".join(f"{label:>24}" for label in topologies))
+    for name in _CASES:
+        row = [await _time(wf, name, runs) for wf in topologies.values()]
+        print(f"{name:<22}" + "".join(f"{t:>23.2f}s" for t in row))
+    print(f"speculator: {speculator.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--ticker-latency", type=float, default=1.0)
+    parser.add_argument("--info-latency", type=float, default=2.0)
+    parser.add_argument("--news-latency", type=float, default=1.5)
+    parser.add_argument("--extract-latency", type=float, default=1.2)
+    args = parser.parse_args()
+    asyncio.run(
+        run(
+            args.runs,
+            {
+                "ticker_latency": args.ticker_latency,
+                "info_latency": args.info_latency,
+                "news_latency": args.news_latency,
+                "extract_latency": args.extract_latency,
+            },
+        )
+    )
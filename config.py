@@ -3,9 +3,12 @@
 import os
 import logging
 from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from tavily import TavilyClient
+
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from tavily import AsyncTavilyClient, TavilyClient
 
 load_dotenv()
 
@@ -22,19 +25,181 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
 WEAVIATE_URL = os.getenv("WEAVIATE_URL")
 WEAVIATE_API_KEY = os.getenv("WEAVIATE_API_KEY")
 
+# Upstream governor (per process): concurrency caps and token-bucket rate
+# limits in requests per second (0 disables rate limiting)
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "32"))
+TAVILY_MAX_CONCURRENCY = int(os.getenv("TAVILY_MAX_CONCURRENCY", "16"))
+GEMINI_RATE_LIMIT = float(os.getenv("GEMINI_RATE_LIMIT", "10"))
+GEMINI_RATE_BURST = int(os.getenv("GEMINI_RATE_BURST", "20"))
+TAVILY_RATE_LIMIT = float(os.getenv("TAVILY_RATE_LIMIT", "10"))
+TAVILY_RATE_BURST = int(os.getenv("TAVILY_RATE_BURST", "20"))
+
+# Analysis cache
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "50"))
+ANALYSIS_CACHE_MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", "900"))
+ANALYSIS_CACHE_STALE_TTL = float(os.getenv("ANALYSIS_CACHE_STALE_TTL", "3600"))
+# Cached analyses are kept as JSON bytes; those of at least
+# ANALYSIS_CACHE_COMPRESS_MIN_BYTES are gzip-compressed at this level (0: never)
+ANALYSIS_CACHE_COMPRESS_LEVEL = int(os.getenv("ANALYSIS_CACHE_COMPRESS_LEVEL", "1"))
+ANALYSIS_CACHE_COMPRESS_MIN_BYTES = int(os.getenv("ANALYSIS_CACHE_COMPRESS_MIN_BYTES", "4096"))
+
+# GET /analysis/{stock_name}: bodies of at least HTTP_COMPRESS_MIN_BYTES go out
+# gzip- or brotli-compressed (brotli needs the optional `brotli` package) when
+# the client accepts it; compressed bodies kept for repeat requests, in bytes
+HTTP_COMPRESS_MIN_BYTES = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", "1024"))
+HTTP_GZIP_LEVEL = int(os.getenv("HTTP_GZIP_LEVEL", "6"))
+HTTP_BROTLI_QUALITY = int(os.getenv("HTTP_BROTLI_QUALITY", "5"))
+HTTP_ENCODED_CACHE_BYTES = int(os.getenv("HTTP_ENCODED_CACHE_BYTES", str(16 * 1024 * 1024)))
+
+# Analysis cache shared by the worker processes of one host: "memory" keeps
+# it per process, "sqlite" adds a WAL-mode SQLite file at ANALYSIS_CACHE_PATH.
+# Bounds of that file, seconds a worker trusts its own copy of an entry, and
+# the lease a worker holds while it computes a stock the others wait for
+ANALYSIS_CACHE_BACKEND = os.getenv("ANALYSIS_CACHE_BACKEND", "memory").lower()
+ANALYSIS_CACHE_PATH = os.getenv(
+    "ANALYSIS_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "analysis.sqlite3"),
+)
+ANALYSIS_CACHE_SHARED_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_SHARED_MAX_ENTRIES", "1000"))
+ANALYSIS_CACHE_SHARED_MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_SHARED_MAX_BYTES", str(512 * 1024 * 1024)))
+ANALYSIS_CACHE_LOCAL_TTL = float(os.getenv("ANALYSIS_CACHE_LOCAL_TTL", "30"))
+ANALYSIS_CACHE_LOCK_TTL = float(os.getenv("ANALYSIS_CACHE_LOCK_TTL", "120"))
+
+# Local NSE symbol index (LLM lookup is only a fallback for misses)
+NSE_LISTING_PATH = os.getenv(
+    "NSE_LISTING_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "nse_equity_list.csv"),
+)
+NSE_LEARNED_ALIASES_PATH = os.getenv("NSE_LEARNED_ALIASES_PATH")
+TICKER_FUZZY_THRESHOLD = float(os.getenv("TICKER_FUZZY_THRESHOLD", "0.8"))
+TICKER_MIN_PREFIX = int(os.getenv("TICKER_MIN_PREFIX", "4"))  # shortest name prefix used to guess a ticker for speculation
+
+# Per-node result caching (seconds; 0 disables caching for that node)
+NODE_CACHE_TTLS = {
+    "ScreenerURLNode": float(os.getenv("TICKER_CACHE_TTL", str(7 * 24 * 3600))),
+    "StockNewsNode": float(os.getenv("NEWS_CACHE_TTL", "300")),
+    "ScreenerExtractNode": float(os.getenv("SCREENER_CACHE_TTL", str(24 * 3600))),
+    "StockInfoNode": float(os.getenv("STOCK_INFO_CACHE_TTL", str(90 * 24 * 3600))),
+}
+NODE_CACHE_MAX_BYTES = int(os.getenv("NODE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Batch-analysis jobs
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(7 * 24 * 3600)))  # seconds a finished job is kept
+
+# Start StockInfoNode on a guessed ticker while ticker resolution runs
+SPECULATIVE_EXECUTION = os.getenv("SPECULATIVE_EXECUTION", "0").lower() in ("1", "true", "yes")
+
+# Stock context given to the chat LLM: token budget, table periods kept,
+# news articles kept and how long a compacted context is reused per ticker
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "1500"))
+CHAT_CONTEXT_PERIODS = int(os.getenv("CHAT_CONTEXT_PERIODS", "4"))
+CHAT_CONTEXT_NEWS = int(os.getenv("CHAT_CONTEXT_NEWS", "3"))
+CHAT_CONTEXT_CACHE_TTL = float(os.getenv("CHAT_CONTEXT_CACHE_TTL", "900"))
+
+# Server-side chat sessions: idle expiry (seconds), cap, and user + assistant messages kept per session
+CHAT_SESSION_TTL = float(os.getenv("CHAT_SESSION_TTL", "1800"))
+CHAT_SESSION_MAX = int(os.getenv("CHAT_SESSION_MAX", "10000"))
+CHAT_SESSION_MESSAGES = int(os.getenv("CHAT_SESSION_MESSAGES", "4"))
+
+# /chat/stream frame coalescing: flush after this many seconds or characters;
+# chunks read ahead of a slow client before the LLM stream is paused
+SSE_FLUSH_INTERVAL = float(os.getenv("SSE_FLUSH_INTERVAL", "0.05"))
+SSE_FLUSH_BYTES = int(os.getenv("SSE_FLUSH_BYTES", "512"))
+SSE_MAX_PENDING = int(os.getenv("SSE_MAX_PENDING", "256"))
+
+# Retrieval for chat: passages per question, their token budget and minimum
+# cosine similarity; chunk size of indexed Screener/news text; above
+# VECTOR_EXACT_LIMIT candidate chunks searches use the approximate IVF index
+CHAT_RETRIEVAL_K = int(os.getenv("CHAT_RETRIEVAL_K", "4"))
+CHAT_RETRIEVAL_TOKENS = int(os.getenv("CHAT_RETRIEVAL_TOKENS", "600"))
+CHAT_RETRIEVAL_MIN_SCORE = float(os.getenv("CHAT_RETRIEVAL_MIN_SCORE", "0.1"))
+VECTOR_CHUNK_CHARS = int(os.getenv("VECTOR_CHUNK_CHARS", "800"))
+VECTOR_EXACT_LIMIT = int(os.getenv("VECTOR_EXACT_LIMIT", "20000"))
+
+# Semantic answer cache for standalone chat questions: minimum cosine
+# similarity to reuse an answer, expiry (defaults to the analysis TTL) and cap
+CHAT_ANSWER_CACHE_THRESHOLD = float(os.getenv("CHAT_ANSWER_CACHE_THRESHOLD", "0.85"))
+CHAT_ANSWER_CACHE_TTL = float(os.getenv("CHAT_ANSWER_CACHE_TTL", str(ANALYSIS_CACHE_TTL)))
+CHAT_ANSWER_CACHE_MAX = int(os.getenv("CHAT_ANSWER_CACHE_MAX", "5000"))
+
+# Node, upstream and HTTP latency metrics served at /metrics
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "1").lower() in ("1", "true", "yes")
+
+
+# Call /warmup (or set WARMUP_ON_STARTUP) to build the clients and graphs
+# before the first request instead of on it
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "0").lower() in ("1", "true", "yes")
 
+
+# Stand-ins served by the getters below instead of the real clients; see use_clients
+_CLIENT_NAMES = ("llm", "ticker_llm", "stock_info_llm", "chat_llm", "tavily", "async_tavily")
+_client_overrides: Dict[str, Any] = {}
+
+
+def use_clients(**clients: Any) -> None:
+    """Make the client getters return stand-ins (benchmarks and tests install fakes here).
+
+    ``llm`` replaces the model for every caller, ``ticker_llm``,
+    ``stock_info_llm`` and ``chat_llm`` for one caller only; ``tavily`` and
+    ``async_tavily`` replace the Tavily clients. Passing ``None`` removes a
+    stand-in.
+    """
+    for name, client in clients.items():
+        if name not in _CLIENT_NAMES:
+            raise TypeError(f"use_clients() got an unknown client {name!r}; expected one of {_CLIENT_NAMES}")
+        if client is None:
+            _client_overrides.pop(name, None)
+        else:
+            _client_overrides[name] = client
+
+
+def get_llm(role: str = "") -> "ChatGoogleGenerativeAI":
+    """Return the shared LLM instance; ``role`` (``ticker``, ``stock_info``, ``chat``) names the caller."""
+    override = _client_overrides.get(f"{role}_llm", _client_overrides.get("llm"))
+    return override if override is not None else _gemini_llm()
+
+
+def get_tavily_client() -> "TavilyClient":
+    """Return the shared Tavily client."""
+    client = _client_overrides.get("tavily")
+    return client if client is not None else _tavily_client()
+
+
+def get_async_tavily_client() -> "AsyncTavilyClient":
+    """Return the shared async Tavily client for use from async nodes."""
+    client = _client_overrides.get("async_tavily")
+    return client if client is not None else _async_tavily_client()
+
+
+# The clients (and their SDK imports, about a second of start-up) are built on first use
 @lru_cache(maxsize=1)
-def get_llm() -> ChatGoogleGenerativeAI:
-    """Return a cached LLM instance."""
+def _gemini_llm() -> "ChatGoogleGenerativeAI":
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
     return ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7)
 
 
 @lru_cache(maxsize=1)
-def get_tavily_client() -> TavilyClient:
-    """Return a cached Tavily client."""
+def _tavily_client() -> "TavilyClient":
+    from tavily import TavilyClient
+
     return TavilyClient(api_key=TAVILY_API_KEY)
 
 
-# Convenience aliases (backwards-compatible)
-GEMINI_LLM = get_llm()
-TAVILY_CLIENT = get_tavily_client()
+@lru_cache(maxsize=1)
+def _async_tavily_client() -> "AsyncTavilyClient":
+    from tavily import AsyncTavilyClient
+
+    return AsyncTavilyClient(api_key=TAVILY_API_KEY)
+
+
+def __getattr__(name: str):
+    """Convenience aliases (backwards-compatible), built on first access."""
+    if name == "GEMINI_LLM":
+        return get_llm()
+    if name == "TAVILY_CLIENT":
+        return get_tavily_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
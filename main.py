@@ -2,26 +2,94 @@
 
 import asyncio
 import json
+import time
 import traceback
-from typing import Dict, Any
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Set, Tuple
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
-from config import GEMINI_LLM, logger
+from config import (
+    get_async_tavily_client,
+    get_llm,
+    logger,
+    ANALYSIS_CACHE_MAX_ENTRIES,
+    ANALYSIS_CACHE_MAX_BYTES,
+    ANALYSIS_CACHE_TTL,
+    ANALYSIS_CACHE_STALE_TTL,
+    ANALYSIS_CACHE_BACKEND,
+    ANALYSIS_CACHE_PATH,
+    ANALYSIS_CACHE_SHARED_MAX_ENTRIES,
+    ANALYSIS_CACHE_SHARED_MAX_BYTES,
+    ANALYSIS_CACHE_LOCAL_TTL,
+    ANALYSIS_CACHE_LOCK_TTL,
+    ANALYSIS_CACHE_COMPRESS_LEVEL,
+    ANALYSIS_CACHE_COMPRESS_MIN_BYTES,
+    HTTP_COMPRESS_MIN_BYTES,
+    HTTP_GZIP_LEVEL,
+    HTTP_BROTLI_QUALITY,
+    HTTP_ENCODED_CACHE_BYTES,
+    JOBS_DIR,
+    JOB_WORKERS,
+    JOB_RETENTION,
+    CHAT_SESSION_TTL,
+    CHAT_SESSION_MAX,
+    CHAT_SESSION_MESSAGES,
+    SSE_FLUSH_INTERVAL,
+    SSE_FLUSH_BYTES,
+    SSE_MAX_PENDING,
+    WARMUP_ON_STARTUP,
+)
 from models import (
+    State,
     LanggraphRequest,
     ChatRequest,
+    ChatSessionRequest,
     StockCompareRequest,
+    BatchJobRequest,
+)
+from services import (
+    AnalysisCache,
+    CacheEntry,
+    ChatSession,
+    JobManager,
+    ResponseEncoder,
+    SessionStore,
+    SingleFlight,
+    TelemetryMiddleware,
+    compute_metrics,
+    etag_matches,
+    get_answer_cache,
+    get_context_builder,
+    get_node_cache,
+    get_retrieval_index,
+    get_telemetry,
+    get_ticker_index,
+    make_cache_backend,
 )
-from workflows import workflow, chat_workflow
+from services.streaming import StreamStats, coalesce, replay, sse_chunk, sse_event
+from services.upstream import BATCH, INTERACTIVE, governor_stats, set_priority, upstream_slot
+import workflows
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await _jobs.start()
+    if WARMUP_ON_STARTUP:
+        # Off the event loop, but awaited: requests are accepted once everything is built
+        await asyncio.get_running_loop().run_in_executor(None, warmup)
+    yield
+    await _jobs.stop()
+
 
 app = FastAPI(
     title="KnowYourStock API",
     description="Financial analysis API powered by LangGraph and Gemini",
     version="2.0.0",
+    lifespan=lifespan,
 )
 
 # CORS — allow frontend origins
@@ -32,18 +100,139 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Request timings per route for /metrics
+app.add_middleware(TelemetryMiddleware)
 
 # ---------------------------------------------------------------------------
-# Simple in-memory cache for stock analysis results
+# In-memory TTL + LRU cache for stock analysis results. Concurrent misses for
+# the same stock share one workflow run through the in-flight table; with a
+# shared backend, across worker processes as well. Entries are JSON bytes;
+# /langgraph hits send them as they are.
 # ---------------------------------------------------------------------------
-_stock_cache: Dict[str, Any] = {}
-_CACHE_MAX = 50
+
+
+def _decode_state(data: bytes) -> Dict[str, Any]:
+    """Rebuild a cached workflow state, with its pydantic objects, from JSON."""
+    raw = json.loads(data)
+    validated = State.model_validate(raw)
+    return {field: getattr(validated, field) for field in raw}
+
+
+def _index_shared_state(entry: CacheEntry) -> None:
+    """Index a state written by another worker for chat retrieval here."""
+    get_retrieval_index().index_analysis(json.loads(entry.json()))
+
+
+_inflight = SingleFlight()
+_stock_cache = AnalysisCache(
+    max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+    max_bytes=ANALYSIS_CACHE_MAX_BYTES,
+    ttl=ANALYSIS_CACHE_TTL,
+    stale_ttl=ANALYSIS_CACHE_STALE_TTL,
+    flights=_inflight,
+    backend=make_cache_backend(
+        ANALYSIS_CACHE_BACKEND,
+        ANALYSIS_CACHE_PATH,
+        max_entries=ANALYSIS_CACHE_SHARED_MAX_ENTRIES,
+        max_bytes=ANALYSIS_CACHE_SHARED_MAX_BYTES,
+        lock_ttl=ANALYSIS_CACHE_LOCK_TTL,
+    ),
+    local_ttl=ANALYSIS_CACHE_LOCAL_TTL,
+    json_entries=True,
+    on_shared_load=_index_shared_state,
+    decode=_decode_state,
+    compress_level=ANALYSIS_CACHE_COMPRESS_LEVEL,
+    compress_min_bytes=ANALYSIS_CACHE_COMPRESS_MIN_BYTES,
+)
 
 
 def _cache_key(name: str) -> str:
     return name.strip().lower()
 
 
+async def _analyze(name: str) -> Tuple[Dict[str, Any], bool]:
+    """Return ``(state, cached)`` for a stock, running the workflow on a miss."""
+    return await _stock_cache.get_or_compute(_cache_key(name), lambda: _run_workflow(name))
+
+
+async def _analyze_json(name: str) -> Tuple[bytes, bool]:
+    """Like ``_analyze`` but returns the state as the cache's JSON bytes."""
+    return await _stock_cache.get_or_compute_json(_cache_key(name), lambda: _run_workflow(name))
+
+
+# Queues of /langgraph/stream clients following the workflow run of a stock
+_run_listeners: Dict[str, Set[asyncio.Queue]] = {}
+
+
+async def _run_workflow(name: str) -> Dict[str, Any]:
+    """One workflow run; its Screener page and news are added to the chat retrieval index.
+
+    Each node's update is also handed to the ``/langgraph/stream`` clients
+    following the run, whichever request started it.
+    """
+    key = _cache_key(name)
+    state: Dict[str, Any] = {}
+    graph = workflows.get_workflow()
+    async for namespace, mode, chunk in graph.astream(
+        {"User_stock_name": name}, stream_mode=["updates", "values"], subgraphs=True
+    ):
+        if mode == "values":
+            if not namespace:
+                state = chunk
+            continue
+        for node, update in chunk.items():
+            # The subgraph's own update only repeats its nodes' results
+            if namespace or node != "TickerBranch":
+                for listener in _run_listeners.get(key, ()):
+                    listener.put_nowait((node, update))
+    get_retrieval_index().index_analysis(state)
+    return state
+
+
+# Compressed bodies of GET /analysis responses, per ETag and encoding
+_encoder = ResponseEncoder(
+    min_bytes=HTTP_COMPRESS_MIN_BYTES,
+    gzip_level=HTTP_GZIP_LEVEL,
+    brotli_quality=HTTP_BROTLI_QUALITY,
+    max_bytes=HTTP_ENCODED_CACHE_BYTES,
+)
+
+# Batch-analysis jobs share the cache and in-flight table through _analyze
+_jobs = JobManager(_analyze, JOBS_DIR, workers=JOB_WORKERS, retention=JOB_RETENTION)
+
+# Chat sessions hold recent messages and the name of the analyzed stock; the
+# analysis itself stays in _stock_cache
+_sessions = SessionStore(
+    idle_ttl=CHAT_SESSION_TTL, max_sessions=CHAT_SESSION_MAX, max_messages=CHAT_SESSION_MESSAGES
+)
+
+
+# Counters for /chat/stream frames and disconnects
+_streams = StreamStats()
+
+
+def _get_session(session_id: Optional[str]) -> Optional[ChatSession]:
+    if session_id is None:
+        return None
+    session = _sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail={"error": f"Unknown or expired chat session '{session_id}'"})
+    return session
+
+
+async def _session_context(session: ChatSession) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """The cached analysis a session refers to and its ETag, re-analyzed if it has been evicted."""
+    if not session.stock_name:
+        return None, None
+    key = _cache_key(session.stock_name)
+    hit = await _stock_cache.fetch_entry(key, count=False)
+    if hit is not None:
+        entry = hit[0]
+    else:
+        entry, _ = await _stock_cache.get_or_compute_entry(key, lambda: _run_workflow(session.stock_name))
+    return _decode_state(entry.json()), entry.etag
+
+
 # ---------------------------------------------------------------------------
 # Endpoints
 # ---------------------------------------------------------------------------
@@ -54,6 +243,33 @@ def health_check():
     return {"status": "ok"}
 
 
+def warmup() -> Dict[str, float]:
+    """Build what the first requests would otherwise build: clients, graphs, indexes. Returns seconds per step."""
+    steps = {
+        "gemini_client": get_llm,
+        "tavily_client": get_async_tavily_client,
+        "analysis_graph": workflows.get_workflow,
+        "chat_graph": workflows.get_chat_workflow,
+        "batch_comparison": lambda: workflows.run_batch_comparison,
+        "ticker_index": get_ticker_index,
+        "retrieval_index": get_retrieval_index,
+        "answer_cache": get_answer_cache,
+    }
+    timings = {}
+    for name, step in steps.items():
+        start = time.perf_counter()
+        step()
+        timings[name] = round(time.perf_counter() - start, 3)
+    logger.info("warmup: %s", timings)
+    return timings
+
+
+@app.post("/warmup")
+def warmup_endpoint():
+    """Initialize clients, graphs and indexes now (e.g. from a readiness probe) instead of on first use."""
+    return {"status": "ok", "seconds": warmup()}
+
+
 @app.get("/")
 def root():
     return {"message": "Welcome to KnowYourStock API v2"}
@@ -63,56 +279,174 @@ def root():
 async def run_langgraph(req: LanggraphRequest):
     """Run the stock-analysis workflow (with caching)."""
     try:
-        state_input: dict = {}
         if req.stock_name:
-            state_input["User_stock_name"] = req.stock_name
-
-            # Check cache
-            key = _cache_key(req.stock_name)
-            if key in _stock_cache:
+            # The cached JSON goes into the body as it is: no pydantic objects rebuilt or re-encoded
+            result_json, cached = await _analyze_json(req.stock_name)
+            if cached:
                 logger.info("Cache hit for '%s'", req.stock_name)
-                return {"status": "ok", "result": _stock_cache[key], "cached": True}
-
-        result_state = await workflow.ainvoke(state_input)
-
-        # Store in cache
-        if req.stock_name:
-            if len(_stock_cache) >= _CACHE_MAX:
-                _stock_cache.pop(next(iter(_stock_cache)))
-            _stock_cache[_cache_key(req.stock_name)] = result_state
+                body = b'{"status":"ok","result":' + result_json + b',"cached":true}'
+            else:
+                body = b'{"status":"ok","result":' + result_json + b"}"
+            return Response(body, media_type="application/json")
 
+        result_state = await workflows.get_workflow().ainvoke({})
         return {"status": "ok", "result": result_state}
     except Exception as e:
         logger.error("langgraph error: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail={"error": str(e)})
 
 
+@app.get("/analysis/{stock_name}")
+async def get_analysis(stock_name: str, request: Request):
+    """The cached analysis state of a stock, for clients that poll it.
+
+    The body is the state itself. Its ``ETag`` is a hash of that JSON, so a
+    request whose ``If-None-Match`` still matches gets an empty 304, and
+    large bodies are sent gzip- or brotli-encoded when ``Accept-Encoding``
+    allows. ``X-Cache`` tells whether the analysis came from the cache.
+    """
+    try:
+        entry, cached = await _stock_cache.get_or_compute_entry(
+            _cache_key(stock_name), lambda: _run_workflow(stock_name)
+        )
+    except Exception as e:
+        logger.error("analysis error: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail={"error": str(e)})
+
+    etag = f'"{entry.etag}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        "X-Cache": "hit" if cached else "miss",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    body, encoding = _encoder.encode(entry, request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _sse(payload: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(jsonable_encoder(payload))}\n\n"
+
+
+@app.post("/langgraph/stream")
+async def run_langgraph_stream(req: LanggraphRequest):
+    """Stream the stock-analysis workflow as Server-Sent Events.
+
+    Emits a ``node`` event with each node's update as soon as it finishes,
+    then a ``done`` event with the merged state. Cache hits emit ``done``
+    straight away. A miss goes through the analysis cache like
+    ``/langgraph``: concurrent requests (in any worker) share one run, and a
+    client that joins a run in progress gets its updates from then on.
+    """
+
+    async def generate_stream():
+        try:
+            if not req.stock_name:
+                # Nothing to share or cache: stream a run of our own
+                merged = dict(State())
+                async for namespace, chunk in workflows.get_workflow().astream(
+                    {}, stream_mode="updates", subgraphs=True
+                ):
+                    for node, update in chunk.items():
+                        merged.update(update or {})
+                        if namespace or node != "TickerBranch":
+                            yield _sse({"status": "node", "node": node, "update": update})
+                yield _sse({"status": "done", "result": merged})
+                return
+
+            # Follow the stock's shared run (started here or by any other request)
+            key = _cache_key(req.stock_name)
+            updates: asyncio.Queue = asyncio.Queue()
+            _run_listeners.setdefault(key, set()).add(updates)
+            run = asyncio.ensure_future(
+                _stock_cache.get_or_compute_entry(key, lambda: _run_workflow(req.stock_name))
+            )
+            next_update = None
+            try:
+                while True:
+                    next_update = asyncio.ensure_future(updates.get())
+                    await asyncio.wait({next_update, run}, return_when=asyncio.FIRST_COMPLETED)
+                    if not next_update.done():
+                        break
+                    node, update = next_update.result()
+                    yield _sse({"status": "node", "node": node, "update": update})
+                while not updates.empty():
+                    node, update = updates.get_nowait()
+                    yield _sse({"status": "node", "node": node, "update": update})
+                entry, cached = run.result()
+            finally:
+                if next_update is not None:
+                    next_update.cancel()
+                run.cancel()  # the shared run itself carries on for its other followers
+                listeners = _run_listeners.get(key)
+                if listeners is not None:
+                    listeners.discard(updates)
+                    if not listeners:
+                        del _run_listeners[key]
+            flag = b"true" if cached else b"false"
+            yield b'data: {"status": "done", "result": ' + entry.json() + b', "cached": ' + flag + b"}\n\n"
+        except Exception as e:
+            logger.error("langgraph stream error: %s", e, exc_info=True)
+            yield _sse({"status": "error", "error": str(e)})
+
+    return StreamingResponse(
+        generate_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/compare")
 async def compare_stocks(req: StockCompareRequest):
-    """Compare multiple stocks side-by-side by running the workflow for each."""
+    """Compare multiple stocks side-by-side.
+
+    Uncached stocks go through the batched pipeline (one ticker resolution,
+    one Screener extract, one StocksInfo call); items it cannot complete
+    fall back to a per-stock workflow run. Each item also gets the financial
+    metrics computed from its Screener tables, for all stocks in one pass.
+    """
+    set_priority(BATCH)
     try:
-        tasks = []
+        misses = {}
         for name in req.stock_names:
             key = _cache_key(name)
-            if key in _stock_cache:
-                tasks.append(asyncio.coroutine(lambda c=_stock_cache[key]: c)())
-            else:
-                tasks.append(workflow.ainvoke({"User_stock_name": name}))
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+            if key in misses or key in _inflight:
+                continue
+            if await _stock_cache.fetch_entry(key, count=False) is None:
+                misses[key] = name
+
+        batched = set()
+        if len(misses) > 1:
+            for name, state in (await workflows.run_batch_comparison(list(misses.values()))).items():
+                if state is not None:
+                    _stock_cache.set(_cache_key(name), state)
+                    get_retrieval_index().index_analysis(state)
+                    batched.add(_cache_key(name))
+
+        results = await asyncio.gather(
+            *(_analyze(name) for name in req.stock_names),
+            return_exceptions=True,
+        )
 
         comparison = []
         for name, result in zip(req.stock_names, results):
             if isinstance(result, Exception):
                 comparison.append({"stock_name": name, "error": str(result)})
             else:
-                # Cache successful results
-                key = _cache_key(name)
-                if key not in _stock_cache:
-                    if len(_stock_cache) >= _CACHE_MAX:
-                        _stock_cache.pop(next(iter(_stock_cache)))
-                    _stock_cache[key] = result
-                comparison.append({"stock_name": name, "data": result})
+                state, cached = result
+                cached = cached and _cache_key(name) not in batched
+                comparison.append({"stock_name": name, "data": state, "cached": cached})
+
+        metrics = compute_metrics(
+            {item["stock_name"]: item["data"].get("screener_tables") for item in comparison if "data" in item}
+        )
+        for item in comparison:
+            if "data" in item:
+                item["metrics"] = metrics[item["stock_name"]]
 
         return {"status": "ok", "comparison": comparison}
     except Exception as e:
@@ -122,75 +456,158 @@ async def compare_stocks(req: StockCompareRequest):
 
 @app.post("/chat")
 async def chatting(req: ChatRequest):
-    """Chat endpoint using LangGraph chat workflow."""
+    """Chat endpoint using LangGraph chat workflow.
+
+    With ``session_id`` only ``message`` is needed: history and the stock
+    context come from the session.
+    """
+    set_priority(INTERACTIVE)
+    session = _get_session(req.session_id)
     try:
-        state_input = {
-            "current_message": req.message,
-            "context": req.context,
-            "messages": req.messages if req.messages else [],
-        }
-        result_state = chat_workflow.invoke(state_input)
+        if session is not None:
+            context, context_etag = await _session_context(session)
+            state_input = {
+                "context": context,
+                "context_etag": context_etag,
+                "messages": session.history() + [HumanMessage(content=req.message)],
+            }
+        else:
+            state_input = {
+                "context": req.context,
+                "messages": (req.messages or []) + [HumanMessage(content=req.message)],
+            }
+        result_state = await workflows.get_chat_workflow().ainvoke(state_input)
+        response = result_state.get("response", "No response generated")
+        if session is not None:
+            if result_state.get("response"):
+                session.add_turn(req.message, response)
+            return {
+                "status": "ok",
+                "session_id": session.session_id,
+                "response": response,
+                "messages": session.messages_as_dicts(),
+                "context_tokens": result_state.get("context_tokens"),
+                "answer_cache": result_state.get("answer_cache"),
+            }
         return {
             "status": "ok",
-            "response": result_state.get("response", "No response generated"),
+            "response": response,
             "messages": result_state.get("messages", []),
+            "context_tokens": result_state.get("context_tokens"),
+            "answer_cache": result_state.get("answer_cache"),
         }
     except Exception as e:
         logger.error("chat error: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail={"error": str(e)})
 
 
+async def _llm_text(messages):
+    """Text chunks of the streamed Gemini answer, holding an upstream slot until done or cancelled."""
+    async with upstream_slot("gemini"):
+        async for chunk in get_llm("chat").astream(messages):
+            if hasattr(chunk, "content") and chunk.content:
+                _streams.add(chunks=1)
+                yield chunk.content
+
+
 @app.post("/chat/stream")
 async def chatting_stream(req: ChatRequest):
     """Streaming chat endpoint returning Server-Sent Events."""
+    session = _get_session(req.session_id)
 
     async def generate_stream():
+        set_priority(INTERACTIVE)
+        _streams.opened()
+        completed = False
         try:
             messages_history = req.messages or []
             recent_messages = messages_history[-4:] if len(messages_history) > 4 else messages_history
-
-            system_prompt = (
-                "You are a helpful financial assistant with expertise in stock market analysis, "
-                "company information, and financial news. Provide accurate, informative, and concise responses.\n\n"
-                "If the user asks about a specific stock, use the provided context to give detailed answers."
-            )
-
-            if req.context:
-                stock_name = req.context.get("User_stock_name", "")
-                ticker = req.context.get("Stock_Ticker", "")
-                if stock_name:
-                    system_prompt += f"\n\nUser is asking about: {stock_name}"
-                    if ticker:
-                        system_prompt += f" (Ticker: {ticker})"
-
-            messages = [SystemMessage(content=system_prompt)]
-            for msg in recent_messages:
-                role = msg.get("role", "")
-                content = msg.get("content", "")
-                if role == "user":
-                    messages.append(HumanMessage(content=content))
-                elif role == "assistant":
-                    messages.append(AIMessage(content=content))
-            messages.append(HumanMessage(content=req.message))
+            # Only the server's own analyses (with their ETag) take part in answer caching
+            context, context_etag = await _session_context(session) if session is not None else (req.context, None)
+
+            # A standalone question already answered for this analysis is replayed from the cache
+            answers = get_answer_cache()
+            standalone = not (session.history() if session is not None else messages_history)
+            cached = answers.lookup(req.message, context, context_etag) if standalone else None
+            context_tokens = None
+            if cached:
+                frames = replay(cached.answer, SSE_FLUSH_BYTES)
+            else:
+                system_prompt = (
+                    "You are a helpful financial assistant with expertise in stock market analysis, "
+                    "company information, and financial news. Provide accurate, informative, and concise responses.\n\n"
+                    "If the user asks about a specific stock, use the provided context to give detailed answers."
+                )
+
+                compact = get_context_builder().build(context)
+                if compact.text:
+                    system_prompt += f"\n\n<Stock Context>\n{compact.text}\n</Stock Context>"
+                passages, retrieval = get_retrieval_index().retrieve(req.message, context)
+                if passages:
+                    system_prompt += f"\n\n<Retrieved Passages>\n{passages}\n</Retrieved Passages>"
+                context_tokens = {**compact.report(), "retrieval": retrieval}
+
+                messages = [SystemMessage(content=system_prompt)]
+                if session is not None:
+                    messages += session.history()
+                    recent_messages = []
+                for msg in recent_messages:
+                    role = msg.get("role", "")
+                    content = msg.get("content", "")
+                    if role == "user":
+                        messages.append(HumanMessage(content=content))
+                    elif role == "assistant":
+                        messages.append(AIMessage(content=content))
+                messages.append(HumanMessage(content=req.message))
+
+                frames = coalesce(
+                    _llm_text(messages),
+                    flush_interval=SSE_FLUSH_INTERVAL,
+                    flush_bytes=SSE_FLUSH_BYTES,
+                    max_pending=SSE_MAX_PENDING,
+                )
 
             response_parts = []
-            async for chunk in GEMINI_LLM.astream(messages):
-                if hasattr(chunk, "content") and chunk.content:
-                    response_parts.append(chunk.content)
-                    yield f"data: {json.dumps({'status': 'chunk', 'content': chunk.content})}\n\n"
+            start = time.perf_counter()
+            try:
+                async for text in frames:
+                    response_parts.append(text)
+                    _streams.add(frames=1)
+                    yield sse_chunk(text)
+            finally:
+                await frames.aclose()  # stops the LLM stream if the client disconnected mid-answer
 
             full_response = "".join(response_parts)
-            updated_messages = messages_history + [
-                {"role": "user", "content": req.message},
-                {"role": "assistant", "content": full_response},
-            ]
-            if len(updated_messages) > 4:
-                updated_messages = updated_messages[-4:]
-
-            yield f"data: {json.dumps({'status': 'done', 'messages': updated_messages})}\n\n"
+            if standalone and not cached:
+                answers.store(req.message, context, context_etag, full_response, time.perf_counter() - start)
+            if session is not None:
+                session.add_turn(req.message, full_response)
+                updated_messages = session.messages_as_dicts()
+            else:
+                updated_messages = messages_history + [
+                    {"role": "user", "content": req.message},
+                    {"role": "assistant", "content": full_response},
+                ]
+                if len(updated_messages) > 4:
+                    updated_messages = updated_messages[-4:]
+
+            done = {
+                "status": "done",
+                "messages": updated_messages,
+                "context_tokens": context_tokens,
+                "answer_cache": cached.report() if cached else {"hit": False},
+            }
+            if session is not None:
+                done["session_id"] = session.session_id
+            completed = True
+            yield sse_event(done)
 
         except Exception as e:
-            yield f"data: {json.dumps({'status': 'error', 'error': str(e)})}\n\n"
+            completed = True
+            yield sse_event({"status": "error", "error": str(e)})
+        finally:
+            # Not completed: the client went away and Starlette cancelled the stream
+            _streams.closed(completed)
 
     return StreamingResponse(
         generate_stream(),
@@ -199,13 +616,112 @@ async def chatting_stream(req: ChatRequest):
     )
 
 
+@app.post("/chat/sessions")
+async def create_chat_session(req: ChatSessionRequest):
+    """Start a chat session; later ``/chat`` calls send only ``session_id`` and ``message``."""
+    session = _sessions.create(req.stock_name.strip() if req.stock_name else None)
+    return {"status": "ok", "session_id": session.session_id, "stock_name": session.stock_name}
+
+
+@app.get("/chat/sessions/{session_id}")
+async def get_chat_session(session_id: str):
+    """The session's stock and the recent messages kept for it."""
+    session = _get_session(session_id)
+    return {
+        "status": "ok",
+        "session_id": session.session_id,
+        "stock_name": session.stock_name,
+        "messages": session.messages_as_dicts(),
+    }
+
+
+@app.delete("/chat/sessions/{session_id}")
+async def delete_chat_session(session_id: str):
+    if not _sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail={"error": f"Unknown or expired chat session '{session_id}'"})
+    return {"status": "ok", "message": "Session deleted"}
+
+
+@app.post("/jobs")
+async def create_job(req: BatchJobRequest):
+    """Queue a batch analysis of many stocks; poll ``/jobs/{job_id}`` for progress."""
+    job = await _jobs.submit(req.stock_names)
+    return {"status": "ok", "job": job.summary()}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, include_results: bool = False):
+    """Job progress, optionally with the results finished so far."""
+    job = await _jobs.load(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail={"error": f"Unknown job '{job_id}'"})
+    response = {"status": "ok", "job": job.summary()}
+    if include_results:
+        response["results"] = await _jobs.results(job_id)
+    return response
+
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str):
+    """Stream finished results as JSONL, following the job until it completes."""
+    if await _jobs.load(job_id) is None:
+        raise HTTPException(status_code=404, detail={"error": f"Unknown job '{job_id}'"})
+    return StreamingResponse(_jobs.stream_results(job_id), media_type="application/x-ndjson")
+
+
 @app.delete("/cache")
-def clear_cache():
-    """Clear the in-memory stock analysis cache."""
+async def clear_cache():
+    """Clear the analysis (including its shared store), node, chat-context and chat-answer caches and the retrieval index."""
     _stock_cache.clear()
+    get_node_cache().clear()
+    get_context_builder().clear()
+    get_retrieval_index().clear()
+    get_answer_cache().clear()
+    _encoder.clear()
     return {"status": "ok", "message": "Cache cleared"}
 
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss/eviction counters of the analysis, in-flight and node caches."""
+    return {
+        "status": "ok",
+        "stats": _stock_cache.stats(),
+        "inflight": _inflight.stats(),
+        "nodes": get_node_cache().stats(),
+        "chat_context": get_context_builder().stats(),
+        "chat_sessions": _sessions.stats(),
+        "retrieval": get_retrieval_index().stats(),
+        "chat_answers": get_answer_cache().stats(),
+        "http_bodies": _encoder.stats(),
+    }
+
+
+@app.get("/upstream/stats")
+async def upstream_stats():
+    """Admission counters and queue-wait times of the Gemini and Tavily governors, plus chat stream counters."""
+    return {"status": "ok", "upstreams": governor_stats(), "chat_streams": _streams.stats()}
+
+
+_telemetry = get_telemetry()
+_telemetry.register_collector("analysis_cache", _stock_cache.stats)
+_telemetry.register_collector("inflight", _inflight.stats)
+_telemetry.register_collector("http_bodies", _encoder.stats)
+_telemetry.register_collector("node_cache", lambda: get_node_cache().stats())
+_telemetry.register_collector("chat_context", lambda: get_context_builder().stats())
+_telemetry.register_collector("chat_sessions", _sessions.stats)
+_telemetry.register_collector("retrieval", lambda: get_retrieval_index().stats())
+_telemetry.register_collector("chat_answers", lambda: get_answer_cache().stats())
+_telemetry.register_collector("upstream", governor_stats)
+_telemetry.register_collector("chat_streams", lambda: _streams.stats())
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Node, upstream and request latencies plus cache and governor stats in Prometheus text format."""
+    return PlainTextResponse(_telemetry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,9 +1,21 @@
 """Pydantic models for state management and data structures."""
 
 from typing import Optional, List, Dict, Any, Annotated
-from pydantic import BaseModel, Field
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, field_validator
 from langchain_core.messages import BaseMessage
-from langgraph.graph.message import add_messages
+
+
+def add_messages(left, right):
+    """LangGraph's ``add_messages`` reducer, imported when a graph first merges messages.
+
+    Importing ``langgraph.graph`` here would add most of a second to every
+    import of the models.
+    """
+    from langgraph.graph.message import add_messages as merge
+
+    return merge(left, right)
 
 
 class NewsArticle(BaseModel):
@@ -21,6 +33,49 @@ class StocksInfo(BaseModel):
     management_commentary_forward_guidance: str = Field(..., description="Recent management commentary and forward-looking statements")
 
 
+class StocksInfoBatch(BaseModel):
+    """Structured LLM output covering several tickers in one call."""
+    stocks: List[StocksInfo] = Field(..., description="One entry per requested ticker symbol, in the requested order")
+
+
+class ScreenerTable(BaseModel):
+    """One Screener.in section as a numeric table: ``values[i, j]`` is row ``i`` in period ``j``.
+
+    Cells that are blank or not numbers are NaN; serialized as nested lists with ``null``.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    periods: List[str] = Field(default_factory=list, description="Column labels, e.g. 'Mar 2024'")
+    rows: List[str] = Field(default_factory=list, description="Row labels, e.g. 'Sales' or 'OPM %'")
+    values: np.ndarray = Field(default_factory=lambda: np.empty((0, 0)), description="float64 array of shape (rows, periods)")
+
+    @field_validator("values", mode="before")
+    @classmethod
+    def _as_array(cls, v: Any) -> np.ndarray:
+        values = np.asarray(v, dtype=np.float64)  # None -> NaN
+        return values if values.ndim == 2 else values.reshape(0, 0)
+
+    @field_serializer("values")
+    def _to_lists(self, values: np.ndarray) -> List[List[Optional[float]]]:
+        return [[None if np.isnan(x) else x for x in row] for row in values.tolist()]
+
+    def row(self, label: str) -> Optional[np.ndarray]:
+        """The series for ``label`` (case-insensitive), or None."""
+        label = label.lower()
+        for i, name in enumerate(self.rows):
+            if name.lower() == label:
+                return self.values[i]
+        return None
+
+    def to_compact(self, last: Optional[int] = None) -> str:
+        """Pipe-separated text of the table (optionally only the last periods) for LLM prompts."""
+        cols = slice(-last, None) if last else slice(None)
+        lines = ["|".join(["", *self.periods[cols]])]
+        for name, series in zip(self.rows, self.values[:, cols]):
+            lines.append("|".join([name, *("" if np.isnan(x) else f"{x:g}" for x in series)]))
+        return "\n".join(lines)
+
+
 class State(BaseModel):
     User_stock_name: Optional[str] = Field(default="", description="The name of the stock provided by the user")
     ScreenerURL: Optional[str] = Field(default="", description="The Screener URL of the stock")
@@ -29,13 +84,27 @@ class State(BaseModel):
     news_articles: Optional[List[NewsArticle]] = Field(default_factory=list, description="List of news articles related to the stock")
     stocks_info: Optional[StocksInfo] = Field(default=None, description="Information related to the stock")
     screener_data: Optional[str] = Field(default="", description="Extracted and cleaned data from the Screener.in page")
+    screener_tables: Optional[Dict[str, ScreenerTable]] = Field(default_factory=dict, description="Numeric tables parsed from screener_data, keyed by section")
+
+
+class TickerBranchState(BaseModel):
+    """Subset of ``State`` used by the ticker-dependent branch of the workflow."""
+    User_stock_name: Optional[str] = Field(default="", description="The name of the stock provided by the user")
+    ScreenerURL: Optional[str] = Field(default="", description="The Screener URL of the stock")
+    TickerSymbol: Optional[str] = Field(default="", description="The stock ticker symbol (canonical)")
+    stocks_info: Optional[StocksInfo] = Field(default=None, description="Information related to the stock")
+    screener_data: Optional[str] = Field(default="", description="Extracted and cleaned data from the Screener.in page")
+    screener_tables: Optional[Dict[str, ScreenerTable]] = Field(default_factory=dict, description="Numeric tables parsed from screener_data, keyed by section")
 
 
 class ChatState(BaseModel):
     messages: Annotated[List[BaseMessage], add_messages]
     message: str = Field(default="", description="Current user message")
     context: Optional[Dict[str, Any]] = Field(default=None, description="Optional context from stock search")
+    context_etag: Optional[str] = Field(default=None, description="ETag of the cached analysis in context, when the server supplied it")
     response: str = Field(default="", description="AI response")
+    context_tokens: Optional[Dict[str, Any]] = Field(default=None, description="Token report of the stock context in the prompt")
+    answer_cache: Optional[Dict[str, Any]] = Field(default=None, description="Whether the response came from the semantic answer cache")
 
 
 # --- API request/response models ---
@@ -46,10 +115,21 @@ class LanggraphRequest(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
+    session_id: Optional[str] = Field(default=None, description="Chat session; history and context are then kept server-side")
     context: Optional[Dict[str, Any]] = None
     messages: Optional[List[Dict[str, str]]] = None
 
 
+class ChatSessionRequest(BaseModel):
+    """Request model for opening a chat session about a stock."""
+    stock_name: Optional[str] = Field(default=None, description="Stock whose cached analysis is the chat context")
+
+
 class StockCompareRequest(BaseModel):
     """Request model for comparing multiple stocks."""
     stock_names: List[str] = Field(..., min_length=2, max_length=5, description="List of stock names to compare")
+
+
+class BatchJobRequest(BaseModel):
+    """Request model for a bulk batch-analysis job."""
+    stock_names: List[str] = Field(..., min_length=1, max_length=1000, description="Stock names to analyze")
@@ -1,10 +1,15 @@
 """Node that handles chat interactions with financial context."""
 
+import time
 from typing import List
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, BaseMessage
 
-from config import GEMINI_LLM as llm, logger
+from config import get_llm, logger
 from models import ChatState
+from services.answer_cache import get_answer_cache
+from services.context_builder import get_context_builder
+from services.retrieval import get_retrieval_index
+from services.upstream import upstream_slot
 
 _SYSTEM_PROMPT = (
     "You are a helpful financial assistant with expertise in stock market analysis, "
@@ -23,25 +28,47 @@ def _format_recent_messages(recent_messages: List[BaseMessage]) -> str:
     return formatted
 
 
-def chat_node(state: ChatState) -> ChatState:
+async def chat_node(state: ChatState) -> ChatState:
     try:
         system_prompt = _SYSTEM_PROMPT
+        recent_messages = state.messages[-5:] if len(state.messages) > 5 else state.messages
+        question = state.message or next(
+            (m.content for m in reversed(recent_messages) if isinstance(m, HumanMessage)), ""
+        )
 
-        # Add stock context if available
-        if state.context:
-            ticker = state.context.get("TickerSymbol", "")
-            if ticker:
-                system_prompt += f"\n\nStock: {ticker}"
+        # A standalone question may already have been answered for this analysis
+        answers = get_answer_cache()
+        standalone = len(state.messages) <= 1
+        cached = answers.lookup(question, state.context, state.context_etag) if standalone else None
+        if cached:
+            state.response = cached.answer
+            state.messages.append(AIMessage(content=cached.answer))
+            state.answer_cache = cached.report()
+            return state
+        state.answer_cache = {"hit": False}
 
-        recent_messages = state.messages[-5:] if len(state.messages) > 5 else state.messages
+        # Add the stock context, compacted to the token budget
+        compact = get_context_builder().build(state.context)
+        if compact.text:
+            system_prompt += f"\n\n<Stock Context>\n{compact.text}\n</Stock Context>"
+
+        # Passages from the indexed Screener page and news most relevant to the question
+        passages, retrieval = get_retrieval_index().retrieve(question, state.context)
+        if passages:
+            system_prompt += f"\n\n<Retrieved Passages>\n{passages}\n</Retrieved Passages>"
+        state.context_tokens = {**compact.report(), "retrieval": retrieval}
 
         llm_messages: List[BaseMessage] = [
             SystemMessage(content=system_prompt),
             HumanMessage(content=_format_recent_messages(recent_messages)),
         ]
 
-        response = llm.invoke(llm_messages)
+        start = time.perf_counter()
+        async with upstream_slot("gemini"):
+            response = await get_llm("chat").ainvoke(llm_messages)
         response_text = response.content if hasattr(response, "content") else str(response)
+        if standalone:
+            answers.store(question, state.context, state.context_etag, response_text, time.perf_counter() - start)
 
         state.response = response_text
         state.messages.append(AIMessage(content=response_text))
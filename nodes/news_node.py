@@ -1,18 +1,20 @@
 """Node that fetches latest news articles for a stock using Tavily."""
 
-from config import TAVILY_CLIENT, logger
+from config import get_async_tavily_client, logger
 from models import State, NewsArticle
+from services.upstream import upstream_slot
 
 
-def get_stock_news(state: State) -> dict:
+async def get_stock_news(state: State) -> dict:
     try:
         query = f"Latest news about {state.User_stock_name} or its sector."
-        response = TAVILY_CLIENT.search(
-            query=query,
-            topic="news",
-            max_results=3,
-            time_range="week",
-        )
+        async with upstream_slot("tavily"):
+            response = await get_async_tavily_client().search(
+                query=query,
+                topic="news",
+                max_results=3,
+                time_range="week",
+            )
         results = response["results"]
         news_articles = [
             NewsArticle(
@@ -1,54 +1,207 @@
 """Node that extracts and cleans financial data from Screener.in."""
 
 import re
+from typing import Dict, List, Optional
 
-from config import TAVILY_CLIENT, logger
+from config import get_async_tavily_client, logger
 from models import State
+from services.screener_tables import parse_screener_tables
+from services.upstream import upstream_slot
 
 
-def extract_screener_data(state: State) -> dict:
+async def extract_screener_data(state: State) -> dict:
     try:
-        response = TAVILY_CLIENT.extract(
-            urls=[state.ScreenerURL],
-            include_images=False,
-            format="markdown",
-            extract_depth="basic",
-        )
+        async with upstream_slot("tavily"):
+            response = await get_async_tavily_client().extract(
+                urls=[state.ScreenerURL],
+                include_images=False,
+                format="markdown",
+                extract_depth="basic",
+            )
         raw = response["results"][0]["raw_content"]
-        cleaned = _clean_screener_content(raw)
-        logger.info("ScreenerExtract_node: extracted %d chars", len(cleaned))
-        return {"screener_data": cleaned}
+        update = _screener_update(raw)
+        logger.info(
+            "ScreenerExtract_node: extracted %d chars, %d tables",
+            len(update["screener_data"]),
+            len(update["screener_tables"]),
+        )
+        return update
     except Exception as e:
         logger.error("Error extracting Screener data: %s", e, exc_info=True)
-        return {"screener_data": ""}
+        return {"screener_data": "", "screener_tables": {}}
+
+
+async def extract_screener_batch(urls: List[str]) -> Dict[str, dict]:
+    """Extract several Screener pages with a single Tavily call.
+
+    Returns the node's state update (cleaned markdown and parsed tables)
+    keyed by URL for the pages that succeeded.
+    """
+    if not urls:
+        return {}
+    try:
+        async with upstream_slot("tavily"):
+            response = await get_async_tavily_client().extract(
+                urls=urls,
+                include_images=False,
+                format="markdown",
+                extract_depth="basic",
+            )
+        pages = {
+            r["url"]: _screener_update(r["raw_content"])
+            for r in response.get("results", [])
+            if r.get("raw_content")
+        }
+        logger.info("ScreenerExtract_node: batch extracted %d/%d pages", len(pages), len(urls))
+        return pages
+    except Exception as e:
+        logger.error("Error extracting Screener data in batch: %s", e, exc_info=True)
+        return {}
+
+
+def _screener_update(raw_content: str) -> dict:
+    cleaned = _clean_screener_content(raw_content)
+    return {"screener_data": cleaned, "screener_tables": parse_screener_tables(cleaned)}
+
 
+# Screener.in chrome. One scan finds every candidate token; the image and
+# footer tokens are then confirmed with bounded str.find calls instead of the
+# lazy ``.*?`` patterns, which backtracked quadratically on large pages.
+_NAV_LINKS = (
+    ("Chart", "chart"),
+    ("Analysis", "analysis"),
+    ("Peers", "peers"),
+    ("Quarters", "quarters"),
+    ("Profit & Loss", "profit-loss"),
+    ("Balance Sheet", "balance-sheet"),
+    ("Cash Flow", "cash-flow"),
+    ("Ratios", "ratios"),
+    ("Investors", "shareholding"),
+    ("Documents", "documents"),
+)
+# The lookahead lets the regex engine skip ahead to the few characters that can
+# start a token ("ſ" case-folds to "s").
+_CHROME_RE = re.compile(
+    r"(?=[!(\[sSſ])(?:"
+    r"(?P<image>!\[)"
+    r"|(?P<logo>(?i:screener logo))"
+    r"|(?P<footer>(?i:stock analysis))"
+    r"|(?P<top>\(#top\))"
+    r"|(?P<nav>\[(?:" + "|".join(re.escape(f"{label}](#{anchor}") for label, anchor in _NAV_LINKS) + r")\)))"
+)
+_PRIVACY_RE = re.compile(r"(?i:privacy)")
+_CDN_IMAGE_TARGET = "](https://cdn-static.screener.in"
 
-# Patterns to strip from Screener.in markdown
-_NAV_LINK_PATTERNS = [
-    r"\[Chart\]\(#chart\)\s*",
-    r"\[Analysis\]\(#analysis\)\s*",
-    r"\[Peers\]\(#peers\)\s*",
-    r"\[Quarters\]\(#quarters\)\s*",
-    r"\[Profit & Loss\]\(#profit-loss\)\s*",
-    r"\[Balance Sheet\]\(#balance-sheet\)\s*",
-    r"\[Cash Flow\]\(#cash-flow\)\s*",
-    r"\[Ratios\]\(#ratios\)\s*",
-    r"\[Investors\]\(#shareholding\)\s*",
-    r"\[Documents\]\(#documents\)\s*",
-]
+
+def _footer_ends(text: str, pos: int) -> bool:
+    """Whether "privacy" follows ``pos`` outside the CDN image links removed before the footer."""
+    while True:
+        m = _PRIVACY_RE.search(text, pos)
+        if m is None:
+            return False
+        line_start = max(text.rfind("\n", 0, m.start()) + 1, pos)
+        line_end = text.find("\n", m.start())
+        if line_end < 0:
+            line_end = len(text)
+        # Walk the CDN images of this line up to the match; one covering it hides it
+        covered_until = -1
+        start = text.find("![", line_start, m.start())
+        while start >= 0:
+            target = text.find(_CDN_IMAGE_TARGET, start + 2, line_end)
+            close = text.find(")", target + len(_CDN_IMAGE_TARGET), line_end) if target >= 0 else -1
+            if close < 0:
+                break
+            if close >= m.start():
+                covered_until = close + 1
+                break
+            start = text.find("![", close + 1, m.start())
+        if covered_until < 0:
+            return True
+        pos = covered_until
 
 
 def _clean_screener_content(raw_content: str) -> str:
-    """Remove Screener.in chrome (logos, nav links, footers) from extracted markdown."""
-    content = re.sub(r"!\[.*?\]\(https://cdn-static\.screener\.in.*?\)", "", raw_content)
-    content = re.sub(r"#*\s*Screener Logo\s*", "", content, flags=re.IGNORECASE)
-    content = re.sub(
-        r"Stock analysis.*?Privacy.*?(Mittal Analytics.*?C-MOTS.*?Privacy.*?)?$",
-        "",
-        content,
-        flags=re.DOTALL | re.IGNORECASE,
-    )
-    content = re.sub(r"\(#top\)\s*", "", content).strip()
-    for pattern in _NAV_LINK_PATTERNS:
-        content = re.sub(pattern, "", content)
-    return content
+    """Remove Screener.in chrome (logos, nav links, footers) from extracted markdown.
+
+    Single left-to-right pass producing the same output as applying, in order:
+    CDN image links, "Screener Logo" with the hashes/whitespace around it, the
+    "Stock analysis ... Privacy" footer (to the end of the page), "(#top)",
+    strip(), then the nav links. The one difference: a footer phrase that only
+    appears once an image or logo inside it is removed does not count.
+    """
+    text = raw_content
+    out: List[str] = []
+    floor = 0  # the hashes/whitespace before a logo cannot reach past an earlier token
+    eat_ws = False  # the last token swallows the whitespace that follows it
+    nav_tail: Optional[int] = None  # nav links removed after strip() keep the space before them
+    check_footer = True
+    image_fail_until = -1  # no CDN image can start before this offset
+    target = line_end = -1
+
+    def emit(piece: str) -> None:
+        nonlocal eat_ws
+        if eat_ws:
+            piece = piece.lstrip()
+            if not piece:
+                return
+            eat_ws = False
+        if piece:
+            out.append(piece)
+
+    def blank_since(i: int) -> bool:
+        return all(piece.isspace() for piece in out[i:])
+
+    pos = 0
+    while True:
+        m = _CHROME_RE.search(text, pos)
+        if m is None:
+            emit(text[pos:])
+            break
+        start, kind = m.start(), m.lastgroup
+        emit(text[pos:start])
+
+        if kind == "image":
+            if start >= image_fail_until:
+                if line_end < start:
+                    line_end = text.find("\n", start)
+                    if line_end < 0:
+                        line_end = len(text)
+                if target < start + 2:
+                    target = text.find(_CDN_IMAGE_TARGET, start + 2)
+                    if target < 0:
+                        target = len(text)
+                close = text.find(")", target + len(_CDN_IMAGE_TARGET), line_end) if target < line_end else -1
+                if close >= 0:
+                    pos = close + 1
+                    continue
+                image_fail_until = line_end
+            emit("!")
+            pos = start + 1
+            continue
+
+        if kind == "footer":
+            if check_footer and _footer_ends(text, m.end()):
+                break
+            # No "privacy" after the first occurrence means none after later ones
+            check_footer = False
+            emit(m.group())
+            pos = m.end()
+            continue
+
+        if kind == "logo":
+            for chars in (None, "#"):
+                while len(out) > floor:
+                    piece = out[-1].rstrip(chars)
+                    if piece:
+                        out[-1] = piece
+                        break
+                    out.pop()
+        elif kind == "nav" and (nav_tail is None or not blank_since(nav_tail)):
+            nav_tail = len(out)
+        floor = len(out)
+        eat_ws = True
+        pos = m.end()
+
+    if nav_tail is not None and blank_since(nav_tail):
+        return "".join(out[:nav_tail]).lstrip()
+    return "".join(out).strip()
@@ -1,47 +1,127 @@
 """Node that resolves a stock name to its Screener.in URL and NSE ticker symbol."""
 
+from typing import Dict, List
+
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 
-from config import GEMINI_LLM as llm, logger
+from config import get_llm, logger
 from models import State
+from services import get_ticker_index
+from services.upstream import upstream_slot
 
 
 class _TickerSchema(BaseModel):
     ticker_symbol: str = Field(..., description="The official ticker symbol for the given stock")
 
 
-def get_screener_url_and_ticker_symbol(state: State) -> dict:
+class _TickerBatchItem(BaseModel):
+    stock_name: str = Field(..., description="The stock name exactly as given in the input")
+    ticker_symbol: str = Field(..., description="The official NSE ticker symbol for that stock")
+
+
+class _TickerBatchSchema(BaseModel):
+    tickers: List[_TickerBatchItem] = Field(..., description="One entry per input stock name")
+
+
+_parser = PydanticOutputParser(pydantic_object=_TickerSchema)
+_prompt_template = ChatPromptTemplate(
+    [
+        (
+            "system",
+            "You are a financial research assistant with deep expertise in Indian equities. "
+            "Given the user input, identify the official ticker symbol of the stock as per NSE "
+            "(National Stock Exchange of India).",
+        ),
+        (
+            "user",
+            "stock name: {stock_name}\n"
+            "If the input is ambiguous, choose the most prominent stock by market cap.\n"
+            "Return the result strictly in this structured format:\n{format_instructions}",
+        ),
+    ]
+).partial(format_instructions=_parser.get_format_instructions())
+
+
+def screener_url(ticker_symbol: str) -> str:
+    return f"https://www.screener.in/company/{ticker_symbol}/consolidated/"
+
+
+async def get_screener_url_and_ticker_symbol(state: State) -> dict:
     try:
-        parser = PydanticOutputParser(pydantic_object=_TickerSchema)
-        format_instructions = parser.get_format_instructions()
-
-        prompt_template = ChatPromptTemplate(
-            [
-                (
-                    "system",
-                    "You are a financial research assistant with deep expertise in Indian equities. "
-                    "Given the user input, identify the official ticker symbol of the stock as per NSE "
-                    "(National Stock Exchange of India).",
-                ),
-                (
-                    "user",
-                    "stock name: {stock_name}\n"
-                    "If the input is ambiguous, choose the most prominent stock by market cap.\n"
-                    "Return the result strictly in this structured format:\n{format_instructions}",
-                ),
-            ]
-        )
-        prompt_template = prompt_template.partial(format_instructions=format_instructions)
-        chain = prompt_template | llm | parser
-        response = chain.invoke(input={"stock_name": state.User_stock_name})
-
-        ticker_symbol = response.ticker_symbol
-        screener_url = f"https://www.screener.in/company/{ticker_symbol}/consolidated/"
-
-        logger.info("ScreenerURL_node: URL=%s  Ticker=%s", screener_url, ticker_symbol)
-        return {"ScreenerURL": screener_url, "TickerSymbol": ticker_symbol}
+        # Resolve from the local NSE index first; the LLM only handles misses.
+        index = get_ticker_index()
+        match = index.lookup(state.User_stock_name)
+        if match is not None:
+            ticker_symbol = match.symbol
+            logger.info(
+                "ScreenerURL_node: '%s' -> %s via %s index lookup",
+                state.User_stock_name, ticker_symbol, match.method,
+            )
+        else:
+            chain = _prompt_template | get_llm("ticker") | _parser
+            async with upstream_slot("gemini"):
+                response = await chain.ainvoke(input={"stock_name": state.User_stock_name})
+            ticker_symbol = response.ticker_symbol
+            # Only answers that name a listed symbol are trusted enough to keep.
+            index.learn(state.User_stock_name, ticker_symbol)
+
+        url = screener_url(ticker_symbol)
+        logger.info("ScreenerURL_node: URL=%s  Ticker=%s", url, ticker_symbol)
+        return {"ScreenerURL": url, "TickerSymbol": ticker_symbol}
     except Exception as e:
         logger.error("Error in ScreenerURL_node: %s", e, exc_info=True)
         return {"ScreenerURL": "", "TickerSymbol": ""}
+
+
+_batch_parser = PydanticOutputParser(pydantic_object=_TickerBatchSchema)
+_batch_prompt_template = ChatPromptTemplate(
+    [
+        (
+            "system",
+            "You are a financial research assistant with deep expertise in Indian equities. "
+            "For each stock name in the user input, identify the official ticker symbol as per NSE "
+            "(National Stock Exchange of India).",
+        ),
+        (
+            "user",
+            "stock names (one per line):\n{stock_names}\n"
+            "If a name is ambiguous, choose the most prominent stock by market cap.\n"
+            "Return the result strictly in this structured format:\n{format_instructions}",
+        ),
+    ]
+).partial(format_instructions=_batch_parser.get_format_instructions())
+
+
+async def resolve_ticker_symbols(stock_names: List[str]) -> Dict[str, str]:
+    """Resolve several stock names at once: index lookups, then one LLM call for the misses.
+
+    Returns ``{stock_name: ticker_symbol}`` for the names that resolved.
+    """
+    index = get_ticker_index()
+    resolved: Dict[str, str] = {}
+    misses: List[str] = []
+    for name in stock_names:
+        match = index.lookup(name)
+        if match is not None:
+            resolved[name] = match.symbol
+        else:
+            misses.append(name)
+
+    if misses:
+        try:
+            chain = _batch_prompt_template | get_llm("ticker") | _batch_parser
+            async with upstream_slot("gemini"):
+                response = await chain.ainvoke({"stock_names": "\n".join(misses)})
+            answers = {item.stock_name.strip().lower(): item.ticker_symbol for item in response.tickers}
+            for name in misses:
+                ticker_symbol = answers.get(name.strip().lower())
+                if ticker_symbol:
+                    resolved[name] = ticker_symbol
+                    index.learn(name, ticker_symbol)
+        except Exception as e:
+            logger.error("Error in ScreenerURL_node batch: %s", e, exc_info=True)
+
+    logger.info("ScreenerURL_node: batch resolved %d/%d names (%d via LLM)", len(resolved), len(stock_names), len(misses))
+    return resolved
@@ -1,16 +1,28 @@
 """Node that uses an LLM to generate structured stock information."""
 
+from typing import Dict, List
+
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 
-from config import GEMINI_LLM as llm, logger
-from models import State, StocksInfo
+from config import get_llm, logger
+from models import State, StocksInfo, StocksInfoBatch
+from services.upstream import upstream_slot
 
 _parser = PydanticOutputParser(pydantic_object=StocksInfo)
 _format_instructions = _parser.get_format_instructions()
+_batch_parser = PydanticOutputParser(pydantic_object=StocksInfoBatch)
+
+_SUMMARY_INSTRUCTIONS = (
+    "- Business Model along with Product & Revenue Mix\n"
+    "- Geographical Revenue Mix\n"
+    "- Sectoral Tailwinds & Headwinds\n"
+    "- Capex & Expansion Plans\n"
+    "- Management Commentary & Forward Guidance\n\n"
+)
 
 
-def get_stock_info(state: State) -> dict:
+async def get_stock_info(state: State) -> dict:
     try:
         prompt_template = ChatPromptTemplate.from_messages(
             [
@@ -18,21 +30,54 @@ def get_stock_info(state: State) -> dict:
                     "system",
                     "You are a financial research assistant with deep expertise in Indian equities.\n\n"
                     "Given the stock ticker symbol, extract and summarize:\n"
-                    "- Business Model along with Product & Revenue Mix\n"
-                    "- Geographical Revenue Mix\n"
-                    "- Sectoral Tailwinds & Headwinds\n"
-                    "- Capex & Expansion Plans\n"
-                    "- Management Commentary & Forward Guidance\n\n"
-                    "Return the result strictly in this structured format:\n\n{format_instructions}",
+                    + _SUMMARY_INSTRUCTIONS
+                    + "Return the result strictly in this structured format:\n\n{format_instructions}",
                 ),
                 ("user", "Ticker symbol - {ticker_symbol}."),
             ],
         ).partial(format_instructions=_format_instructions)
 
-        chain = prompt_template | llm | _parser
-        response = chain.invoke({"ticker_symbol": state.TickerSymbol})
+        chain = prompt_template | get_llm("stock_info") | _parser
+        async with upstream_slot("gemini"):
+            response = await chain.ainvoke({"ticker_symbol": state.TickerSymbol})
         logger.info("StockInfo_node: generated info for %s", state.TickerSymbol)
         return {"stocks_info": response}
     except Exception as e:
         logger.error("Error in StockInfo_node: %s", e, exc_info=True)
         return {"stocks_info": None}
+
+
+_batch_prompt_template = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "You are a financial research assistant with deep expertise in Indian equities.\n\n"
+            "For EACH of the given stock ticker symbols, extract and summarize:\n"
+            + _SUMMARY_INSTRUCTIONS
+            + "Return one entry per ticker, strictly in this structured format:\n\n{format_instructions}",
+        ),
+        ("user", "Ticker symbols - {ticker_symbols}."),
+    ],
+).partial(format_instructions=_batch_parser.get_format_instructions())
+
+
+async def get_stock_info_batch(ticker_symbols: List[str]) -> Dict[str, StocksInfo]:
+    """Generate ``StocksInfo`` for several tickers in one structured LLM call.
+
+    Returns the entries that came back, keyed by upper-case ticker; callers
+    fall back to ``get_stock_info`` for anything missing.
+    """
+    if not ticker_symbols:
+        return {}
+    try:
+        chain = _batch_prompt_template | get_llm("stock_info") | _batch_parser
+        async with upstream_slot("gemini"):
+            response = await chain.ainvoke({"ticker_symbols": ", ".join(ticker_symbols)})
+        requested = {t.upper() for t in ticker_symbols}
+        infos = {s.ticker_symbol.strip().upper(): s for s in response.stocks}
+        infos = {t: info for t, info in infos.items() if t in requested}
+        logger.info("StockInfo_node: batch generated info for %d/%d tickers", len(infos), len(ticker_symbols))
+        return infos
+    except Exception as e:
+        logger.error("Error in StockInfo_node batch: %s", e, exc_info=True)
+        return {}
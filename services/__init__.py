@@ -0,0 +1,58 @@
+"""Caching, scheduling, retrieval and telemetry services.
+
+Names are imported from their submodule on first access, so that importing
+one light service (e.g. from ``main``) does not load the vector index and
+LangChain along with it.
+"""
+
+from importlib import import_module
+
+_EXPORTS = {
+    "AnalysisCache": ".cache",
+    "CacheEntry": ".cache",
+    "SingleFlight": ".singleflight",
+    "ResponseEncoder": ".http_encoding",
+    "etag_matches": ".http_encoding",
+    "SQLiteCacheBackend": ".shared_cache",
+    "make_cache_backend": ".shared_cache",
+    "TickerIndex": ".ticker_index",
+    "TickerMatch": ".ticker_index",
+    "get_ticker_index": ".ticker_index",
+    "NodeResultCache": ".node_cache",
+    "get_node_cache": ".node_cache",
+    "Speculator": ".speculation",
+    "speculative_nodes": ".speculation",
+    "Job": ".jobs",
+    "JobManager": ".jobs",
+    "parse_screener_tables": ".screener_tables",
+    "METRICS": ".metrics",
+    "compute_metrics": ".metrics",
+    "CompactContext": ".context_builder",
+    "ContextBuilder": ".context_builder",
+    "get_context_builder": ".context_builder",
+    "ChatSession": ".sessions",
+    "SessionStore": ".sessions",
+    "HashingEmbeddings": ".vector_index",
+    "LocalVectorIndex": ".vector_index",
+    "RetrievalIndex": ".retrieval",
+    "chunk_text": ".retrieval",
+    "get_retrieval_index": ".retrieval",
+    "CachedAnswer": ".answer_cache",
+    "SemanticAnswerCache": ".answer_cache",
+    "get_answer_cache": ".answer_cache",
+    "Telemetry": ".telemetry",
+    "TelemetryMiddleware": ".telemetry",
+    "get_telemetry": ".telemetry",
+    "instrument_node": ".telemetry",
+}
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = list(_EXPORTS)
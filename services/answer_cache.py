@@ -0,0 +1,164 @@
+"""Semantic cache of chat answers, scoped to one stock analysis.
+
+A standalone question (no earlier turns) about a stock is normalized (stock
+name, ticker and filler words removed), embedded with ``HashingEmbeddings``
+and looked up among earlier questions about the same analysis: same ticker
+and same ``analysis``, the ETag of the server's cached analysis the answer
+was written from, so a refreshed analysis never serves answers written for
+the old one. Contexts without one (sent in a request body) are never
+cached. A match at or above ``threshold`` cosine similarity returns the
+stored answer, skipping the LLM call.
+"""
+
+import re
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional
+
+from config import CHAT_ANSWER_CACHE_MAX, CHAT_ANSWER_CACHE_THRESHOLD, CHAT_ANSWER_CACHE_TTL, logger
+
+_CONTRACTION_RE = re.compile(r"'(s|re|ve|ll|d|m)\b")
+_FILLER = frozenset(
+    "company company's stock share shares firm i me my we our you your please tell can could would give "
+    "explain know about like".split()
+)
+_WORD_RE = re.compile(r"[\w&%.]+")
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    question: str
+    similarity: float
+    age: float
+    saved_seconds: float
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "hit": True,
+            "similarity": round(self.similarity, 3),
+            "matched_question": self.question,
+            "age_seconds": round(self.age, 1),
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
+
+
+@dataclass
+class _Entry:
+    answer: str
+    question: str
+    created_at: float
+    latency: float
+
+
+def _ticker(context: Mapping[str, Any]) -> str:
+    return str(context.get("TickerSymbol") or context.get("Stock_Ticker") or "").strip().upper()
+
+
+class SemanticAnswerCache:
+    """Answers keyed by (ticker, analysis ETag, question embedding)."""
+
+    def __init__(self, threshold: float = 0.85, ttl: float = 3600.0, max_entries: int = 5000):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        from services.vector_index import HashingEmbeddings, LocalVectorIndex  # LangChain, loaded on first use
+
+        self.index = LocalVectorIndex(HashingEmbeddings())
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._swept_at = time.monotonic()
+        self._counters = {"lookups": 0, "hits": 0, "stores": 0, "expired": 0, "evicted": 0, "saved_seconds": 0.0}
+
+    @staticmethod
+    def normalize(question: str, context: Mapping[str, Any]) -> str:
+        """Question without the stock's own name/ticker, contractions and filler words."""
+        drop = set(_FILLER)
+        drop.update(w.lower() for w in _WORD_RE.findall(f"{_ticker(context)} {context.get('User_stock_name') or ''}"))
+        words = _WORD_RE.findall(_CONTRACTION_RE.sub("", question.lower().replace("’", "'")))
+        return " ".join(w.strip(".") for w in words if w.strip(".") and w.strip(".") not in drop)
+
+    def lookup(
+        self, question: str, context: Optional[Mapping[str, Any]], analysis: Optional[str]
+    ) -> Optional[CachedAnswer]:
+        """The answer to a similar question about the analysis with ETag ``analysis``, if any."""
+        if not analysis or not context or not _ticker(context):
+            return None
+        normalized = self.normalize(question, context)
+        if not normalized:
+            return None
+        ticker = _ticker(context)
+        self._counters["lookups"] += 1
+        if time.monotonic() - self._swept_at > 60:
+            self._expire()
+        hits = self.index.similarity_search_with_score(
+            normalized, k=1, filters={"ticker": ticker, "analysis": analysis}
+        )
+        if not hits or hits[0][1] < self.threshold:
+            return None
+        doc, score = hits[0]
+        entry = self._entries[doc.id]
+        if time.time() - entry.created_at > self.ttl:
+            self._expire()
+            return None
+        self._entries.move_to_end(doc.id)
+        self._counters["hits"] += 1
+        self._counters["saved_seconds"] += entry.latency
+        logger.info("SemanticAnswerCache: hit for %s (%.2f) %r ~ %r", ticker, score, question, entry.question)
+        return CachedAnswer(entry.answer, entry.question, score, time.time() - entry.created_at, entry.latency)
+
+    def store(
+        self, question: str, context: Optional[Mapping[str, Any]], analysis: Optional[str], answer: str, latency: float
+    ) -> None:
+        """Remember ``answer`` to a question about the analysis with ETag ``analysis``.
+
+        ``latency`` is what generating it cost, reported as saved on later hits.
+        """
+        if not answer or not analysis or not context or not _ticker(context):
+            return
+        normalized = self.normalize(question, context)
+        if not normalized:
+            return
+        ticker = _ticker(context)
+        doc_id = f"{ticker}:{analysis}:{zlib.crc32(normalized.encode()):08x}"
+        self.index.add_texts([normalized], [{"ticker": ticker, "analysis": analysis}], ids=[doc_id])
+        self._entries[doc_id] = _Entry(answer, question, time.time(), latency)
+        self._entries.move_to_end(doc_id)
+        self._counters["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            old_id, _ = self._entries.popitem(last=False)
+            self.index.delete([old_id])
+            self._counters["evicted"] += 1
+
+    def _expire(self) -> None:
+        self._swept_at = time.monotonic()
+        cutoff = time.time() - self.ttl
+        expired = [doc_id for doc_id, entry in self._entries.items() if entry.created_at < cutoff]
+        for doc_id in expired:
+            del self._entries[doc_id]
+        if expired:
+            self.index.delete(expired)
+            self._counters["expired"] += len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups, hits = self._counters["lookups"], self._counters["hits"]
+        return {
+            **self._counters,
+            "saved_seconds": round(self._counters["saved_seconds"], 3),
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+        }
+
+    def clear(self) -> None:
+        self.index.clear()
+        self._entries.clear()
+
+
+@lru_cache(maxsize=1)
+def get_answer_cache() -> SemanticAnswerCache:
+    return SemanticAnswerCache(
+        threshold=CHAT_ANSWER_CACHE_THRESHOLD, ttl=CHAT_ANSWER_CACHE_TTL, max_entries=CHAT_ANSWER_CACHE_MAX
+    )
@@ -0,0 +1,421 @@
+"""TTL + LRU cache for stock-analysis results with stale-while-revalidate.
+
+By default values are kept as the objects they are. With ``json_entries``
+they are kept as compact JSON bytes instead (gzip-compressed above a size
+threshold when ``compress_level`` is set): they take a fraction of the
+memory, their size is exact, and ``get_json`` hands them to a response
+without decoding and re-serializing, while ``get`` decodes them for callers
+that need the objects. Each JSON entry carries an ETag, a hash of its JSON,
+for conditional requests.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from config import logger
+from services.singleflight import SingleFlight
+from services.upstream import BATCH, set_priority
+
+
+@dataclass
+class CacheEntry:
+    """A cached value: the object itself, or its JSON (a gzip stream of it when ``compressed``)."""
+
+    value: Any
+    size: int
+    expires_at: float
+    payload: bytes = b""
+    compressed: bool = False
+    json_size: int = 0
+    etag: str = ""
+    stored_at: float = 0.0
+    checked_until: float = math.inf  # re-read from the shared backend after this
+
+    def json(self) -> bytes:
+        return zlib.decompress(self.payload, wbits=31) if self.compressed else self.payload
+
+
+def json_default(obj: Any) -> Any:
+    """``json.dumps`` fallback that serializes pydantic models."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate the in-memory cost of a cached object by its JSON length."""
+    try:
+        return len(json.dumps(value, default=json_default))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+def encode_json(value: Any) -> bytes:
+    """Compact UTF-8 JSON of ``value``, serializing pydantic models."""
+    return json.dumps(value, default=json_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def json_etag(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class AnalysisCache:
+    """In-process cache with per-entry TTL, LRU eviction and a byte budget.
+
+    Entries past their TTL are still served for ``stale_ttl`` seconds while a
+    background refresh recomputes them (stale-while-revalidate). When
+    ``flights`` is given, misses and refreshes for the same key share a single
+    run that stores its result even if every waiter is cancelled. With
+    ``json_entries`` values are stored as ``encode_json`` bytes and read back
+    through ``decode``; otherwise the objects themselves are kept.
+
+    A shared ``backend`` (see ``services/shared_cache.py``; it needs
+    ``json_entries``) lets worker processes reuse each other's results:
+    entries are written through to it and local misses are read from it,
+    always on the backend's executor so the event loop never waits on
+    SQLite. The sync ``get`` family therefore only sees this process's
+    entries; ``fetch``, ``fetch_entry`` and ``get_or_compute`` also read the
+    backend. A local copy is trusted for ``local_ttl`` seconds before it is
+    re-read, and ``on_shared_load`` is called with each entry copied in from
+    the backend. Misses then also take the backend's cross-process lock, so
+    one process computes a key while the others wait for its result.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 50,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 900.0,
+        stale_ttl: float = 3600.0,
+        flights: Optional[SingleFlight] = None,
+        backend: Optional[Any] = None,
+        local_ttl: float = 30.0,
+        json_entries: bool = False,
+        on_shared_load: Optional[Callable[[CacheEntry], None]] = None,
+        decode: Callable[[bytes], Any] = json.loads,
+        compress_level: int = 0,
+        compress_min_bytes: int = 4096,
+    ):
+        if backend is not None and not json_entries:
+            raise ValueError("AnalysisCache: a shared backend stores JSON, pass json_entries=True")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.flights = flights
+        self.backend = backend
+        self.local_ttl = local_ttl
+        self.json_entries = json_entries
+        self.on_shared_load = on_shared_load
+        self.decode = decode
+        self.compress_level = compress_level
+        self.compress_min_bytes = compress_min_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._json_bytes = 0
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Future] = set()
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "shared_hits": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, count: bool = True) -> Optional[Tuple[Any, bool]]:
+        """Return ``(value, is_stale)`` or ``None`` when absent or fully expired here."""
+        hit = self._lookup(key, count)
+        return None if hit is None else (self._value(hit[0]), hit[1])
+
+    def get_json(self, key: str, count: bool = True) -> Optional[Tuple[bytes, bool]]:
+        """Like ``get`` but returns the value's stored JSON bytes, without decoding them."""
+        self._require_json("get_json")
+        hit = self._lookup(key, count)
+        return None if hit is None else (hit[0].json(), hit[1])
+
+    def get_entry(self, key: str, count: bool = True) -> Optional[Tuple[CacheEntry, bool]]:
+        """Like ``get`` but returns the stored entry: its ETag and (compressed) JSON."""
+        self._require_json("get_entry")
+        return self._lookup(key, count)
+
+    async def fetch(self, key: str, count: bool = True) -> Optional[Tuple[Any, bool]]:
+        """Like ``get``, falling back to the shared backend on a local miss."""
+        hit = await self._fetch(key, count)
+        return None if hit is None else (self._value(hit[0]), hit[1])
+
+    async def fetch_entry(self, key: str, count: bool = True) -> Optional[Tuple[CacheEntry, bool]]:
+        """Like ``get_entry``, falling back to the shared backend on a local miss."""
+        self._require_json("fetch_entry")
+        return await self._fetch(key, count)
+
+    def _value(self, entry: CacheEntry) -> Any:
+        return self.decode(entry.json()) if self.json_entries else entry.value
+
+    def _require_json(self, method: str) -> None:
+        if not self.json_entries:
+            raise TypeError(f"AnalysisCache.{method} needs a cache created with json_entries=True")
+
+    def _lookup(self, key: str, count: bool) -> Optional[Tuple[CacheEntry, bool]]:
+        return self._check(key, self._local(key), count)
+
+    async def _fetch(self, key: str, count: bool) -> Optional[Tuple[CacheEntry, bool]]:
+        entry = self._local(key)
+        if entry is None and self.backend is not None:
+            entry = await self._get_shared(key)
+        return self._check(key, entry, count)
+
+    def _local(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() >= entry.checked_until:
+            self._remove(key)
+            return None
+        return entry
+
+    def _check(self, key: str, entry: Optional[CacheEntry], count: bool) -> Optional[Tuple[CacheEntry, bool]]:
+        now = time.monotonic()
+        if entry is None:
+            if count:
+                self._counters["misses"] += 1
+            return None
+        if now >= entry.expires_at + self.stale_ttl:
+            self._remove(key)
+            self._counters["expirations"] += 1
+            if count:
+                self._counters["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        is_stale = now >= entry.expires_at
+        if count:
+            self._counters["stale_hits" if is_stale else "hits"] += 1
+        return entry, is_stale
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> CacheEntry:
+        """Store ``value``; returns its entry (also when it is too large to be kept).
+
+        The write to a shared backend runs in the background when called
+        from the event loop; ``store`` waits for it.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        entry = self._make_entry(value, ttl)
+        if self.backend is not None:
+            self._write_shared(self.backend.set, *self._shared_row(key, entry, ttl))
+        self._set_local(key, entry)
+        return entry
+
+    async def store(self, key: str, value: Any, ttl: Optional[float] = None) -> CacheEntry:
+        """Like ``set`` but returns once the entry is written to the shared backend."""
+        ttl = self.ttl if ttl is None else ttl
+        entry = self._make_entry(value, ttl)
+        if self.backend is not None:
+            try:
+                await self.backend.run(self.backend.set, *self._shared_row(key, entry, ttl))
+            except Exception as e:
+                logger.warning("AnalysisCache: writing '%s' to the shared backend failed: %s", key, e)
+        self._set_local(key, entry)
+        return entry
+
+    def _make_entry(self, value: Any, ttl: float) -> CacheEntry:
+        if not self.json_entries:
+            return CacheEntry(value, estimate_size(value), time.monotonic() + ttl)
+        data = encode_json(value)
+        payload, compressed = data, False
+        if self.compress_level and len(data) >= self.compress_min_bytes:
+            # gzip rather than raw zlib: a compressed entry is a ready ``Content-Encoding: gzip`` body
+            packer = zlib.compressobj(self.compress_level, wbits=31)
+            packed = packer.compress(data) + packer.flush()
+            if len(packed) < len(data):
+                payload, compressed = packed, True
+        return CacheEntry(None, len(payload), time.monotonic() + ttl, payload, compressed, len(data), json_etag(data))
+
+    def _shared_row(self, key: str, entry: CacheEntry, ttl: float) -> Tuple:
+        return key, entry.payload, entry.compressed, entry.json_size, entry.etag, ttl, self.stale_ttl
+
+    def _write_shared(self, method: Callable[..., None], *args: Any) -> None:
+        """Run a backend write on its executor without waiting; in place when there is no event loop."""
+
+        def write() -> None:
+            try:
+                method(*args)
+            except Exception as e:
+                logger.warning("AnalysisCache: shared backend %s failed: %s", method.__name__, e)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            write()  # e.g. a sync endpoint's worker thread, which may block
+            return
+        future = loop.run_in_executor(self.backend.executor, write)
+        self._tasks.add(future)
+        future.add_done_callback(self._tasks.discard)
+
+    def _set_local(self, key: str, entry: CacheEntry) -> bool:
+        if entry.size > self.max_bytes:
+            logger.warning("AnalysisCache: '%s' (%d bytes) exceeds budget, not cached", key, entry.size)
+            return False
+        if key in self._entries:
+            self._remove(key)
+
+        entry.stored_at = time.monotonic()
+        if self.backend is not None:
+            entry.checked_until = entry.stored_at + self.local_ttl
+        self._entries[key] = entry
+        self._bytes += entry.size
+        self._json_bytes += entry.json_size
+        self._evict()
+        return True
+
+    async def _get_shared(self, key: str) -> Optional[CacheEntry]:
+        """Copy ``key`` from the shared backend into this process, or None."""
+        try:
+            row = await self.backend.run(self.backend.get, key)
+        except Exception as e:
+            logger.warning("AnalysisCache: reading '%s' from the shared backend failed: %s", key, e)
+            return None
+        if row is None:
+            return None
+        payload, compressed, json_size, etag, expires_at = row
+        # The backend keeps wall-clock expiry; local entries use the monotonic clock
+        expires_at = time.monotonic() + (expires_at - time.time())
+        entry = CacheEntry(None, len(payload), expires_at, payload, compressed, json_size, etag)
+        if self.on_shared_load is not None:
+            try:
+                self.on_shared_load(entry)
+            except Exception as e:
+                logger.warning("AnalysisCache: on_shared_load for '%s' failed: %s", key, e)
+        if not self._set_local(key, entry):
+            return None
+        self._counters["shared_hits"] += 1
+        return entry
+
+    def delete(self, key: str) -> None:
+        if key in self._entries:
+            self._remove(key)
+        if self.backend is not None:
+            self._write_shared(self.backend.delete, key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        self._json_bytes = 0
+        if self.backend is not None:
+            self._write_shared(self.backend.clear)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["stale_hits"] + self._counters["misses"]
+        hits = self._counters["hits"] + self._counters["stale_hits"]
+        return {
+            **self._counters,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "json_bytes": self._json_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            **({"shared": self.backend.stats()} if self.backend is not None else {}),
+        }
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Return ``(value, cached)``, serving stale hits while refreshing in the background."""
+        hit = await self._fetch(key, True)
+        if hit is not None:
+            entry, is_stale = hit
+            if is_stale:
+                self._schedule_refresh(key, compute)
+            return self._value(entry), True
+
+        return (await self._load(key, compute))[0], False
+
+    async def get_or_compute_json(
+        self, key: str, compute: Callable[[], Awaitable[Any]]
+    ) -> Tuple[bytes, bool]:
+        """Like ``get_or_compute`` but returns the value's JSON bytes; hits are never decoded."""
+        self._require_json("get_or_compute_json")
+        entry, cached = await self.get_or_compute_entry(key, compute)
+        return entry.json(), cached
+
+    async def get_or_compute_entry(
+        self, key: str, compute: Callable[[], Awaitable[Any]]
+    ) -> Tuple[CacheEntry, bool]:
+        """Like ``get_or_compute`` but returns the stored entry (ETag and JSON)."""
+        self._require_json("get_or_compute_entry")
+        hit = await self._fetch(key, True)
+        if hit is not None:
+            entry, is_stale = hit
+            if is_stale:
+                self._schedule_refresh(key, compute)
+            return entry, True
+
+        return (await self._load(key, compute))[1], False
+
+    def _schedule_refresh(self, key: str, compute: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.ensure_future(self._refresh(key, compute))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, key: str, compute: Callable[[], Awaitable[Any]]) -> None:
+        # Nobody is waiting on a refresh; let interactive calls go first
+        set_priority(BATCH)
+        try:
+            await self._load(key, compute)
+            self._counters["refreshes"] += 1
+            logger.info("AnalysisCache: refreshed '%s' in background", key)
+        except Exception as e:
+            self._counters["refresh_errors"] += 1
+            logger.error("AnalysisCache: background refresh of '%s' failed: %s", key, e, exc_info=True)
+        finally:
+            self._refreshing.discard(key)
+
+    async def _load(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, CacheEntry]:
+        """Compute and store ``key``; returns the value and its entry."""
+
+        async def compute_and_store() -> Tuple[Any, CacheEntry]:
+            value = await compute()
+            return value, await self.store(key, value)
+
+        async def compute_once_across_processes() -> Tuple[Any, CacheEntry]:
+            async with self.backend.lock(key):
+                # Whoever held the lock before us may have stored a fresh result
+                entry = await self._get_shared(key)
+                if entry is not None and time.monotonic() < entry.expires_at:
+                    return self._value(entry), entry
+                return await compute_and_store()
+
+        load = compute_and_store if self.backend is None else compute_once_across_processes
+        if self.flights is None:
+            return await load()
+        return await self.flights.do(key, load)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        self._json_bytes -= entry.json_size
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            key, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self._json_bytes -= entry.json_size
+            self._counters["evictions"] += 1
+            logger.info("AnalysisCache: evicted '%s' (%d bytes)", key, entry.size)
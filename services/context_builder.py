@@ -0,0 +1,249 @@
+"""Token-budgeted stock context for chat prompts.
+
+Instead of pasting the whole Screener page and every news article into the
+prompt, the builder assembles ranked sections (identity, company summary,
+key metrics, the latest periods of the main tables, de-duplicated news, the
+remaining tables) until the token budget is used up, and reuses the result
+per ticker.
+"""
+
+import re
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from config import (
+    CHAT_CONTEXT_CACHE_TTL,
+    CHAT_CONTEXT_NEWS,
+    CHAT_CONTEXT_PERIODS,
+    CHAT_CONTEXT_TOKENS,
+    logger,
+)
+from models import ScreenerTable
+from services.cache import AnalysisCache
+from services.metrics import compute_metrics
+from services.screener_tables import parse_screener_tables
+
+_CHARS_PER_TOKEN = 4
+_MIN_SECTION_TOKENS = 40  # below this a truncated section is not worth including
+_NEWS_ARTICLE_TOKENS = 120
+
+_SUMMARY_FIELDS = (
+    ("business_model", "Business model"),
+    ("sectoral_tailwinds_headwinds", "Tailwinds/headwinds"),
+    ("management_commentary_forward_guidance", "Management guidance"),
+    ("capex_expansion_plans", "Capex plans"),
+    ("geographical_revenue_mix", "Revenue mix"),
+)
+# Tables in priority order; the first three rank above news
+_TABLES = (
+    ("profit_loss", "Profit & Loss (Rs. Cr)"),
+    ("quarters", "Quarterly results (Rs. Cr)"),
+    ("ratios", "Ratios"),
+    ("balance_sheet", "Balance sheet (Rs. Cr)"),
+    ("cash_flow", "Cash flows (Rs. Cr)"),
+    ("shareholding", "Shareholding (%)"),
+)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: about four characters per token."""
+    return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to about ``max_tokens`` at a line or word boundary, marking the cut."""
+    limit = max_tokens * _CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[: max(0, limit - 2)]
+    for sep in ("\n", " "):
+        i = cut.rfind(sep)
+        if i > limit // 2:
+            cut = cut[:i]
+            break
+    return cut.rstrip() + " …"
+
+
+def _get(obj: Any, name: str, default: Any = None) -> Any:
+    if obj is None:
+        return default
+    if isinstance(obj, Mapping):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+@dataclass
+class CompactContext:
+    text: str = ""
+    tokens: int = 0
+    raw_tokens: int = 0
+    sections: List[str] = field(default_factory=list)
+    cached: bool = False
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "raw_tokens": self.raw_tokens,
+            "context_tokens": self.tokens,
+            "saved_tokens": max(0, self.raw_tokens - self.tokens),
+            "sections": self.sections,
+            "cached": self.cached,
+        }
+
+
+class ContextBuilder:
+    """Selects and truncates context sections to fit ``budget`` tokens.
+
+    Sections are tried in priority order; one that does not fit is truncated
+    when enough budget is left, otherwise skipped in favour of later, smaller
+    ones. Results are cached per ticker and input fingerprint.
+    """
+
+    def __init__(self, budget: int = 1500, periods: int = 4, news: int = 3, cache_ttl: float = 900.0):
+        self.budget = budget
+        self.periods = periods
+        self.news = news
+        self._cache = AnalysisCache(max_entries=1000, max_bytes=16 * 1024 * 1024, ttl=cache_ttl, stale_ttl=0)
+        self._counters = {"requests": 0, "cache_hits": 0, "raw_tokens": 0, "context_tokens": 0}
+
+    def build(self, context: Optional[Mapping[str, Any]]) -> CompactContext:
+        if not context:
+            return CompactContext()
+        key = self._key(context)
+        hit = self._cache.get(key) if key else None
+        if hit is not None:
+            compact = replace(hit[0], cached=True)
+            self._counters["cache_hits"] += 1
+        else:
+            compact = self._build(context)
+            if key:
+                self._cache.set(key, compact)
+        self._counters["requests"] += 1
+        self._counters["raw_tokens"] += compact.raw_tokens
+        self._counters["context_tokens"] += compact.tokens
+        return compact
+
+    def stats(self) -> Dict[str, Any]:
+        saved = self._counters["raw_tokens"] - self._counters["context_tokens"]
+        return {**self._counters, "saved_tokens": max(0, saved), "budget": self.budget}
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    @staticmethod
+    def _key(context: Mapping[str, Any]) -> str:
+        ticker = context.get("TickerSymbol") or context.get("Stock_Ticker") or context.get("User_stock_name")
+        if not ticker:
+            return ""
+        news = tuple(_get(a, "url", "") for a in context.get("news_articles") or ())
+        fingerprint = hash((context.get("screener_data") or "", news, repr(context.get("stocks_info"))))
+        return f"{str(ticker).strip().upper()}:{fingerprint:x}"
+
+    def _build(self, context: Mapping[str, Any]) -> CompactContext:
+        sections = self._sections(context)
+        parts: List[str] = []
+        used: List[str] = []
+        remaining = self.budget
+        for name, text, truncatable in sections:
+            tokens = estimate_tokens(text) + 1  # joining newline
+            if tokens <= remaining:
+                parts.append(text)
+            elif truncatable and remaining >= _MIN_SECTION_TOKENS:
+                text = truncate_tokens(text, remaining - 1)
+                parts.append(text)
+                tokens = estimate_tokens(text) + 1
+            else:
+                continue
+            used.append(name)
+            remaining -= tokens
+
+        text = "\n".join(parts)
+        compact = CompactContext(text=text, tokens=estimate_tokens(text), raw_tokens=self._raw_tokens(context), sections=used)
+        logger.info(
+            "ContextBuilder: %s -> %d/%d tokens (%s)",
+            context.get("TickerSymbol") or context.get("User_stock_name"),
+            compact.tokens,
+            compact.raw_tokens,
+            ", ".join(used),
+        )
+        return compact
+
+    def _sections(self, context: Mapping[str, Any]) -> List[Tuple[str, str, bool]]:
+        name = context.get("User_stock_name") or ""
+        ticker = context.get("TickerSymbol") or context.get("Stock_Ticker") or ""
+        sections: List[Tuple[str, str, bool]] = []
+        if name or ticker:
+            sections.append(("stock", f"Stock: {name}" + (f" (Ticker: {ticker})" if ticker else ""), False))
+
+        info = context.get("stocks_info")
+        summary = [f"- {label}: {_get(info, attr)}" for attr, label in _SUMMARY_FIELDS if _get(info, attr)]
+        if summary:
+            sections.append(("summary", "Company summary:\n" + "\n".join(summary), True))
+
+        tables = self._tables(context)
+        if tables:
+            metrics = compute_metrics({ticker or name: tables})[ticker or name]
+            values = [f"{metric.replace('_', ' ')} {value:g}" for metric, value in metrics.items() if value is not None]
+            if values:
+                sections.append(("metrics", "Key metrics (%, pp/yr, x): " + ", ".join(values), True))
+        table_sections = [
+            (key, f"{title}:\n{tables[key].to_compact(last=self.periods)}", True) for key, title in _TABLES if key in tables
+        ]
+        sections += table_sections[:3]
+        news = self._news(context.get("news_articles") or [])
+        if news:
+            sections.append(("news", "Recent news:\n" + news, True))
+        sections += table_sections[3:]
+        if not tables and context.get("screener_data"):
+            sections.append(("screener_page", "Screener page:\n" + context["screener_data"], True))
+        return sections
+
+    @staticmethod
+    def _tables(context: Mapping[str, Any]) -> Dict[str, ScreenerTable]:
+        tables = context.get("screener_tables") or {}
+        if not tables and context.get("screener_data"):
+            return parse_screener_tables(context["screener_data"])
+        return {k: t if isinstance(t, ScreenerTable) else ScreenerTable(**t) for k, t in tables.items()}
+
+    def _news(self, articles: List[Any]) -> str:
+        """Up to ``self.news`` articles, skipping repeated URLs/titles and sentences already used."""
+        seen_keys, seen_sentences, lines = set(), set(), []
+        for article in articles:
+            title = _SPACE_RE.sub(" ", _get(article, "title", "") or "").strip()
+            keys = {_get(article, "url", "") or title, title.lower()}
+            if keys & seen_keys:
+                continue
+            seen_keys |= keys
+            sentences = []
+            for sentence in _SENTENCE_RE.split(_SPACE_RE.sub(" ", _get(article, "content", "") or "").strip()):
+                norm = sentence.lower()
+                if sentence and norm not in seen_sentences:
+                    seen_sentences.add(norm)
+                    sentences.append(sentence)
+            body = truncate_tokens(" ".join(sentences), _NEWS_ARTICLE_TOKENS)
+            lines.append(f"- {title}: {body}" if body else f"- {title}")
+            if len(lines) == self.news:
+                break
+        return "\n".join(lines)
+
+    @staticmethod
+    def _raw_tokens(context: Mapping[str, Any]) -> int:
+        """Tokens the unbounded context (full page, all news, summary) would have cost."""
+        chars = len(context.get("screener_data") or "")
+        for article in context.get("news_articles") or []:
+            chars += len(_get(article, "title", "") or "") + len(_get(article, "content", "") or "")
+        info = context.get("stocks_info")
+        chars += sum(len(str(_get(info, attr) or "")) for attr, _ in _SUMMARY_FIELDS)
+        return (chars + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+@lru_cache(maxsize=1)
+def get_context_builder() -> ContextBuilder:
+    return ContextBuilder(
+        budget=CHAT_CONTEXT_TOKENS,
+        periods=CHAT_CONTEXT_PERIODS,
+        news=CHAT_CONTEXT_NEWS,
+        cache_ttl=CHAT_CONTEXT_CACHE_TTL,
+    )
@@ -0,0 +1,112 @@
+"""Conditional GET and Content-Encoding for cached JSON responses.
+
+``etag_matches`` evaluates ``If-None-Match`` against an entry's ETag so
+unchanged analyses are answered with an empty 304. ``ResponseEncoder``
+picks gzip or brotli from ``Accept-Encoding`` for bodies worth compressing:
+a gzip-compressed cache entry is sent as it is stored, other encodings are
+made once per ETag and kept in a small LRU, so repeat pollers cost neither
+serialization nor compression. Brotli is used when the optional ``brotli``
+package is installed.
+"""
+
+import gzip
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from services.cache import CacheEntry
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag`` (weak comparison, as RFC 9110 asks)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+def negotiate(accept_encoding: Optional[str], available: Tuple[str, ...]) -> Optional[str]:
+    """The encoding of ``available`` (in server preference order) the client rates highest, or None."""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class ResponseEncoder:
+    """Chooses and produces the compressed body for a cached JSON entry."""
+
+    def __init__(
+        self, min_bytes: int = 1024, gzip_level: int = 6, brotli_quality: int = 5, max_bytes: int = 16 * 1024 * 1024
+    ):
+        self.min_bytes = min_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.max_bytes = max_bytes
+        self.encodings: Tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+        self._bodies: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._bytes = 0
+        self._counters = {"identity": 0, "stored_gzip": 0, "encoded": 0, "reused": 0, "bytes_saved": 0}
+
+    def encode(self, entry: CacheEntry, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """Return ``(body, content_encoding)``; the encoding is None for an uncompressed body."""
+        encoding = negotiate(accept_encoding, self.encodings) if entry.json_size >= self.min_bytes else None
+        if encoding is None:
+            self._counters["identity"] += 1
+            return entry.json(), None
+        if encoding == "gzip" and entry.compressed:
+            body = entry.payload
+            self._counters["stored_gzip"] += 1
+        else:
+            body = self._encoded(entry, encoding)
+        self._counters["bytes_saved"] += entry.json_size - len(body)
+        return body, encoding
+
+    def _encoded(self, entry: CacheEntry, encoding: str) -> bytes:
+        key = (entry.etag, encoding)
+        body = self._bodies.get(key)
+        if body is not None:
+            self._bodies.move_to_end(key)
+            self._counters["reused"] += 1
+            return body
+        data = entry.json()
+        if encoding == "br":
+            body = brotli.compress(data, quality=self.brotli_quality)
+        else:
+            body = gzip.compress(data, self.gzip_level, mtime=0)
+        self._counters["encoded"] += 1
+        if len(body) <= self.max_bytes:
+            self._bodies[key] = body
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._bodies.popitem(last=False)
+                self._bytes -= len(evicted)
+        return body
+
+    def clear(self) -> None:
+        self._bodies.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counters, "bodies": len(self._bodies), "bytes": self._bytes, "encodings": list(self.encodings)}
@@ -0,0 +1,360 @@
+"""Batch-analysis jobs: a bounded async worker pool with on-disk checkpoints.
+
+Each job lives in ``<jobs_dir>/<job_id>/``: ``job.json`` holds the request
+and ``results.jsonl`` gets one line per finished stock. Several processes
+(``uvicorn --workers N``) may share ``jobs_dir``: a job is run only by the
+process holding its lease in ``<jobs_dir>/leases.db``, and the others follow
+its progress from the results file. When the owner stops or dies, another
+process takes the lease over and continues from where the results file
+ends. Finished jobs are forgotten, and their directories removed,
+``retention`` seconds after they complete. File I/O runs in threads, never
+on the event loop.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from config import logger
+from services.cache import json_default
+from services.shared_cache import SQLiteCacheBackend
+from services.upstream import BATCH, set_priority
+
+Analyzer = Callable[[str], Awaitable[Tuple[Any, bool]]]
+
+# Results are read this many bytes at a time (more only to finish a longer line)
+_READ_CHUNK = 1 << 20
+
+
+@dataclass
+class Job:
+    job_id: str
+    stock_names: List[str]
+    created_at: float
+    done: Set[int] = field(default_factory=set)  # indexes into stock_names
+    failed: int = 0
+    cached: int = 0
+    finished_at: Optional[float] = None
+    version: int = 0  # bumped for every result written
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+    owned: bool = False  # this process holds the lease and runs the stocks
+    read_offset: int = 0  # bytes of results.jsonl counted into done/failed/cached
+
+    @property
+    def status(self) -> str:
+        if self.finished_at is not None:
+            return "completed"
+        return "running" if self.done else "queued"
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "total": len(self.stock_names),
+            "completed": len(self.done),
+            "failed": self.failed,
+            "cached": self.cached,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    def record(self, record: Dict[str, Any]) -> None:
+        """Count one line of results.jsonl."""
+        if record["index"] in self.done:
+            return
+        self.done.add(record["index"])
+        self.failed += record["status"] == "error"
+        self.cached += bool(record.get("cached"))
+
+
+class JobManager:
+    """Runs ``analyze`` for every stock of every job this process owns, on ``workers`` concurrent workers.
+
+    ``jobs_dir`` is rescanned every ``scan_interval`` seconds for jobs
+    submitted by other processes; an owner that dies gives its jobs up
+    after ``lease_ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        analyze: Analyzer,
+        jobs_dir: str,
+        workers: int = 8,
+        retention: float = 7 * 24 * 3600,
+        scan_interval: float = 30.0,
+        lease_ttl: float = 60.0,
+        poll_interval: float = 0.5,
+    ):
+        self.analyze = analyze
+        self.jobs_dir = jobs_dir
+        self.workers = workers
+        self.retention = retention
+        self.scan_interval = scan_interval
+        self.poll_interval = poll_interval
+        self._leases = SQLiteCacheBackend(os.path.join(jobs_dir, "leases.db"), lock_ttl=lease_ttl)
+        self._jobs: Dict[str, Job] = {}
+        self._queue: "asyncio.Queue[Tuple[str, int]]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._claims: Dict[str, asyncio.Task] = {}  # job_id -> task holding or awaiting its lease
+        self._append_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        await asyncio.to_thread(os.makedirs, self.jobs_dir, exist_ok=True)
+        await self._discover()
+        self._expire()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._scan_periodically()))
+
+    async def stop(self) -> None:
+        tasks = self._tasks + list(self._claims.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._claims = {}
+
+    async def submit(self, stock_names: List[str]) -> Job:
+        job = Job(job_id=uuid.uuid4().hex, stock_names=list(stock_names), created_at=time.time())
+        meta = {"job_id": job.job_id, "stock_names": job.stock_names, "created_at": job.created_at}
+        await asyncio.to_thread(self._write_meta, self._path(job.job_id), meta)
+        self._jobs[job.job_id] = job
+        self._claim(job)
+        logger.info("JobManager: queued job %s with %d stocks", job.job_id, len(job.stock_names))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job as this process last saw it."""
+        return self._jobs.get(job_id)
+
+    async def load(self, job_id: str) -> Optional[Job]:
+        """The job with up-to-date progress, also when another process submitted or runs it."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await self._adopt(job_id)
+        if not job.owned:
+            await self._refresh(job)
+        return job
+
+    async def results(self, job_id: str) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._read_records, self._path(job_id, "results.jsonl"))
+
+    async def stream_results(self, job_id: str) -> AsyncIterator[str]:
+        """Yield JSONL lines for finished stocks, following the job until it completes."""
+        job = self._jobs[job_id]
+        path = self._path(job_id, "results.jsonl")
+        offset = 0
+        while True:
+            # Each reader waits for a version newer than the one it read, so no write is missed
+            seen = job.version
+            if not job.owned:
+                await self._refresh(job)
+            finished = job.finished_at is not None
+            # Only complete lines are handed out; a partial write is picked up next round
+            lines = await asyncio.to_thread(self._read_lines, path, offset)
+            if lines:
+                offset += len(lines)
+                yield lines.decode("utf-8")
+                continue
+            if finished:
+                return
+            await self._changed(job, seen)
+
+    async def _changed(self, job: Job, seen: int) -> None:
+        """Wait for a result; jobs run elsewhere are polled, as no one notifies us of their writes."""
+        async with job.changed:
+            wait = job.changed.wait_for(lambda: job.version != seen)
+            try:
+                await asyncio.wait_for(wait, None if job.owned else self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self) -> None:
+        set_priority(BATCH)
+        while True:
+            job_id, i = await self._queue.get()
+            try:
+                await self._run_one(self._jobs[job_id], i)
+            except Exception as e:
+                logger.error("JobManager: worker error on %s[%d]: %s", job_id, i, e, exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _run_one(self, job: Job, i: int) -> None:
+        if i in job.done:
+            return
+        name = job.stock_names[i]
+        try:
+            state, cached = await self.analyze(name)
+            record = {"index": i, "stock_name": name, "status": "ok", "cached": cached, "data": state}
+        except Exception as e:
+            record = {"index": i, "stock_name": name, "status": "error", "error": str(e)}
+
+        line = (json.dumps(record, default=json_default) + "\n").encode("utf-8")
+        # One append at a time, so lines longer than a single write never interleave
+        async with self._append_lock:
+            await asyncio.to_thread(self._append, self._path(job.job_id, "results.jsonl"), line)
+        job.record(record)
+        if len(job.done) == len(job.stock_names):
+            job.finished_at = time.time()
+            logger.info("JobManager: job %s completed (%d failed)", job.job_id, job.failed)
+        async with job.changed:
+            job.version += 1
+            job.changed.notify_all()
+
+    def _claim(self, job: Job) -> None:
+        if job.job_id not in self._claims and job.finished_at is None:
+            task = asyncio.ensure_future(self._own(job))
+            self._claims[job.job_id] = task
+            task.add_done_callback(lambda _: self._claims.pop(job.job_id, None))
+
+    async def _own(self, job: Job) -> None:
+        """Wait for the job's lease, then queue its unfinished stocks and hold the lease until they are done."""
+        async with self._leases.lock(f"job:{job.job_id}"):
+            if not await asyncio.to_thread(os.path.exists, self._path(job.job_id, "job.json")):
+                self._jobs.pop(job.job_id, None)  # expired by the process that ran it
+                return
+            # A previous owner may have died mid-write
+            await asyncio.to_thread(self._truncate_partial_line, self._path(job.job_id, "results.jsonl"))
+            await self._refresh(job)
+            if job.finished_at is not None:
+                return
+            job.owned = True
+            pending = [i for i in range(len(job.stock_names)) if i not in job.done]
+            for i in pending:
+                self._queue.put_nowait((job.job_id, i))
+            if job.done:
+                logger.info(
+                    "JobManager: resumed job %s with %d/%d stocks left", job.job_id, len(pending), len(job.stock_names)
+                )
+            async with job.changed:
+                await job.changed.wait_for(lambda: job.finished_at is not None)
+
+    async def _refresh(self, job: Job) -> None:
+        """Count the results written since the last refresh (by whichever process runs the job)."""
+        path = self._path(job.job_id, "results.jsonl")
+        while True:
+            start = job.read_offset
+            lines = await asyncio.to_thread(self._read_lines, path, start)
+            if not lines:
+                break
+            if job.read_offset != start:
+                continue  # a concurrent refresh counted these already
+            job.read_offset = start + len(lines)
+            for line in lines.splitlines():
+                job.record(json.loads(line))
+        if job.finished_at is None and len(job.done) == len(job.stock_names):
+            job.finished_at = await asyncio.to_thread(os.path.getmtime, path)
+
+    async def _adopt(self, job_id: str) -> Optional[Job]:
+        """Load a job found in ``jobs_dir`` and start competing for its lease if it is unfinished."""
+        meta = await asyncio.to_thread(self._read_meta, self._path(job_id, "job.json"))
+        if meta is None:
+            return None
+        if job_id in self._jobs:  # adopted concurrently
+            return self._jobs[job_id]
+        job = Job(job_id=job_id, stock_names=meta["stock_names"], created_at=meta["created_at"])
+        await self._refresh(job)
+        self._jobs.setdefault(job_id, job)
+        self._claim(self._jobs[job_id])
+        return self._jobs[job_id]
+
+    async def _discover(self) -> None:
+        for job_id in sorted(await asyncio.to_thread(os.listdir, self.jobs_dir)):
+            if job_id not in self._jobs:
+                await self._adopt(job_id)
+
+    def _expire(self) -> None:
+        """Forget finished jobs older than ``retention`` and delete their checkpoints."""
+        cutoff = time.time() - self.retention
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self._jobs[job_id]
+                shutil.rmtree(self._path(job_id), ignore_errors=True)
+                logger.info("JobManager: expired job %s", job_id)
+
+    async def _scan_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.scan_interval)
+            await self._discover()
+            self._expire()
+
+    @staticmethod
+    def _write_meta(directory: str, meta: Dict[str, Any]) -> None:
+        os.makedirs(directory, exist_ok=True)
+        # Written whole and renamed, so other processes never read a partial job.json
+        tmp = os.path.join(directory, "job.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(directory, "job.json"))
+
+    @staticmethod
+    def _read_meta(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _append(path: str, line: bytes) -> None:
+        with open(path, "ab") as f:
+            f.write(line)
+
+    @staticmethod
+    def _read_lines(path: str, offset: int, limit: int = _READ_CHUNK) -> bytes:
+        """Complete lines from ``offset``: about ``limit`` bytes, more only to finish a longer line."""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return b""
+        with f:
+            f.seek(offset)
+            data = f.read(limit)
+            end = data.rfind(b"\n") + 1
+            while not end:
+                more = f.read(limit)
+                if not more:
+                    return b""
+                data += more
+                end = data.rfind(b"\n") + 1
+            return data[:end]
+
+    @classmethod
+    def _read_records(cls, path: str) -> List[Dict[str, Any]]:
+        records = []
+        offset = 0
+        while lines := cls._read_lines(path, offset):
+            offset += len(lines)
+            records.extend(json.loads(line) for line in lines.splitlines())
+        return records
+
+    @staticmethod
+    def _truncate_partial_line(path: str) -> None:
+        """Drop a half-written last line left by a crash so appends stay valid JSONL."""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            if not end:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+            # Scan back a chunk at a time for the last complete line
+            while end > 0:
+                start = max(0, end - _READ_CHUNK)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline >= 0:
+                    f.truncate(start + newline + 1)
+                    return
+                end = start
+            f.truncate(0)
+
+    def _path(self, job_id: str, *parts: str) -> str:
+        return os.path.join(self.jobs_dir, job_id, *parts)
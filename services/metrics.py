@@ -0,0 +1,201 @@
+"""Vectorized financial metrics over parsed Screener tables for many stocks at once.
+
+Each input series is gathered into an ``(n_stocks, years)`` matrix aligned by
+period label on each stock's latest fiscal year (NaN-padded), and every metric
+is a handful of NumPy operations over those matrices, so comparing hundreds of
+stocks costs about the same as comparing two.
+"""
+
+import re
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+
+from models import ScreenerTable
+
+# Row labels as they appear on Screener.in; banks/NBFCs use the alternatives
+_ROWS = {
+    "sales": ("profit_loss", ("Sales", "Revenue")),
+    "opm": ("profit_loss", ("OPM %", "Financing Margin %")),
+    "interest": ("profit_loss", ("Interest",)),
+    "pbt": ("profit_loss", ("Profit before tax",)),
+    "net_profit": ("profit_loss", ("Net Profit",)),
+    "equity_capital": ("balance_sheet", ("Equity Capital",)),
+    "reserves": ("balance_sheet", ("Reserves",)),
+    "borrowings": ("balance_sheet", ("Borrowings", "Borrowing")),
+    "cfo": ("cash_flow", ("Cash from Operating Activity",)),
+    "roce": ("ratios", ("ROCE %",)),
+}
+
+# "Mar 2024"; also "March 2024" and "Mar. 2024"
+_PERIOD_RE = re.compile(r"^([A-Za-z]{3})[a-z]*\.?\s+(\d{4})$")
+
+METRICS = (
+    "sales_growth_yoy",
+    "sales_cagr_3y",
+    "sales_cagr_5y",
+    "profit_growth_yoy",
+    "profit_cagr_3y",
+    "profit_cagr_5y",
+    "operating_margin",
+    "operating_margin_trend",
+    "net_margin",
+    "roe",
+    "roe_trend",
+    "roce",
+    "roce_trend",
+    "debt_to_equity",
+    "interest_coverage",
+    "cash_conversion",
+    "cash_conversion_3y",
+)
+
+
+def _year_end_month(tables: Mapping[str, ScreenerTable]) -> str:
+    """Month the fiscal year ends in: that of the latest annual Profit & Loss column, else March."""
+    table = tables.get("profit_loss")
+    for label in reversed(table.periods if table is not None else []):
+        match = _PERIOD_RE.match(label.strip())
+        if match:
+            return match.group(1).title()
+    return "Mar"
+
+
+def _fiscal_columns(table: ScreenerTable, month: str) -> Dict[int, int]:
+    """``{fiscal year: column}`` of the year-end columns; TTM and half-year (e.g. "Sep 2024") columns are skipped."""
+    columns = {}
+    for c, label in enumerate(table.periods):
+        match = _PERIOD_RE.match(label.strip())
+        if match and match.group(1).title() == month:
+            columns[int(match.group(2))] = c
+    return columns
+
+
+def _gather(stocks: List[Mapping[str, Any]], years: int) -> Dict[str, np.ndarray]:
+    """One ``(len(stocks), years)`` matrix per ``_ROWS`` key; the last column is each stock's latest fiscal year.
+
+    Sections are aligned on their period labels, so a Balance Sheet ending in
+    a half-year column lines up with the Profit & Loss years.
+    """
+    keys = list(_ROWS)
+    cube = np.full((len(keys), len(stocks), years), np.nan)
+    by_section: Dict[str, List[tuple]] = {}
+    for k, (section, label_options) in enumerate(_ROWS.values()):
+        by_section.setdefault(section, []).append((k, [o.lower() for o in label_options]))
+
+    for i, raw in enumerate(stocks):
+        tables = {
+            section: ScreenerTable(**table) if isinstance(table, dict) else table
+            for section in by_section
+            if (table := raw.get(section)) is not None
+        }
+        month = _year_end_month(tables)
+        columns = {section: _fiscal_columns(table, month) for section, table in tables.items()}
+        anchor = columns.get("profit_loss") or next((c for c in columns.values() if c), None)
+        if not anchor:
+            continue
+        latest = max(anchor)
+        for section, table in tables.items():
+            index = {label.lower(): r for r, label in enumerate(table.rows)}
+            ks, rs = [], []
+            for k, options in by_section[section]:
+                r = next((index[o] for o in options if o in index), None)
+                if r is not None:
+                    ks.append(k)
+                    rs.append(r)
+            placed = [(year - latest + years - 1, c) for year, c in columns[section].items()]
+            placed = [(j, c) for j, c in placed if 0 <= j < years]
+            if not ks or not placed:
+                continue
+            js, cs = zip(*placed)
+            cube[np.ix_(ks, [i], js)] = table.values[np.ix_(rs, cs)][:, None, :]
+    return dict(zip(keys, cube))
+
+
+def _ratio(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = a / b
+    r[~np.isfinite(r)] = np.nan
+    return r
+
+
+def _growth(series: np.ndarray, n: int) -> np.ndarray:
+    """Compound annual growth (%) over the last ``n`` years; NaN unless both ends are positive."""
+    if series.shape[1] <= n:
+        return np.full(series.shape[0], np.nan)
+    start, end = series[:, -1 - n], series[:, -1]
+    valid = (start > 0) & (end > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g = (np.power(end / start, 1.0 / n) - 1.0) * 100.0
+    return np.where(valid, g, np.nan)
+
+
+def _trend(series: np.ndarray) -> np.ndarray:
+    """Least-squares slope per year of each row, ignoring NaNs (needs two points)."""
+    x = np.arange(series.shape[1], dtype=np.float64)
+    present = ~np.isnan(series)
+    n = present.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = (present * x).sum(axis=1) / n
+        y_mean = np.nansum(series, axis=1) / n
+        dx = np.where(present, x - x_mean[:, None], 0.0)
+        dy = np.where(present, series - y_mean[:, None], 0.0)
+        slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+    return np.where(n >= 2, slope, np.nan)
+
+
+def compute_metrics(
+    stocks: Mapping[str, Mapping[str, Any]], years: int = 6
+) -> Dict[str, Dict[str, Optional[float]]]:
+    """Return ``{name: {metric: value}}`` for ``{name: screener_tables}``.
+
+    Growth rates, margins, ROE/ROCE and cash conversion are percentages;
+    trends are percentage points per year; ``None`` where the inputs are
+    missing or not meaningful (e.g. CAGR across a loss year).
+    """
+    names = list(stocks)
+    if not names:
+        return {}
+    tables = [stocks[name] or {} for name in names]
+    m = _gather(tables, years)
+
+    equity = m["equity_capital"] + m["reserves"]
+    roe_series = _ratio(m["net_profit"], equity) * 100.0
+    # Screener's ROCE row when present, otherwise EBIT over capital employed
+    roce_series = np.where(
+        np.isnan(m["roce"]),
+        _ratio(m["pbt"] + m["interest"], equity + np.nan_to_num(m["borrowings"])) * 100.0,
+        m["roce"],
+    )
+    last = np.s_[:, -1]
+    recent = np.s_[:, -3:]
+    np_recent = m["net_profit"][recent]
+
+    columns = {
+        "sales_growth_yoy": _growth(m["sales"], 1),
+        "sales_cagr_3y": _growth(m["sales"], 3),
+        "sales_cagr_5y": _growth(m["sales"], 5),
+        "profit_growth_yoy": _growth(m["net_profit"], 1),
+        "profit_cagr_3y": _growth(m["net_profit"], 3),
+        "profit_cagr_5y": _growth(m["net_profit"], 5),
+        "operating_margin": m["opm"][last],
+        "operating_margin_trend": _trend(m["opm"]),
+        "net_margin": _ratio(m["net_profit"][last], m["sales"][last]) * 100.0,
+        "roe": roe_series[last],
+        "roe_trend": _trend(roe_series),
+        "roce": roce_series[last],
+        "roce_trend": _trend(roce_series),
+        "debt_to_equity": _ratio(m["borrowings"][last], equity[last]),
+        "interest_coverage": _ratio(m["pbt"][last] + m["interest"][last], m["interest"][last]),
+        "cash_conversion": _ratio(m["cfo"][last], m["net_profit"][last]) * 100.0,
+        "cash_conversion_3y": np.where(
+            np.isnan(np_recent).any(axis=1) | np.isnan(m["cfo"][recent]).any(axis=1),
+            np.nan,
+            _ratio(np.nansum(m["cfo"][recent], axis=1), np.nansum(np_recent, axis=1)) * 100.0,
+        ),
+    }
+    matrix = np.round(np.column_stack([columns[name] for name in METRICS]), 2)
+    return {
+        name: {metric: (v if v == v else None) for metric, v in zip(METRICS, row)}  # NaN != NaN
+        for name, row in zip(names, matrix.tolist())
+    }
@@ -0,0 +1,100 @@
+"""Per-node result caching with node-specific TTLs."""
+
+import functools
+import inspect
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+from config import logger, NODE_CACHE_MAX_BYTES, NODE_CACHE_TTLS
+from services.cache import AnalysisCache
+
+
+def _ticker_key(state: Any) -> str:
+    return (state.TickerSymbol or "").strip().upper()
+
+
+def _stock_name_key(state: Any) -> str:
+    return (state.User_stock_name or "").strip().lower()
+
+
+# Nodes keyed by their input: ticker resolution and the news search (which
+# runs alongside it) by the raw name, the other branches by the resolved ticker.
+_KEY_FUNCS: Dict[str, Callable[[Any], str]] = {
+    "ScreenerURLNode": _stock_name_key,
+    "StockNewsNode": _stock_name_key,
+    "ScreenerExtractNode": _ticker_key,
+    "StockInfoNode": _ticker_key,
+}
+
+
+class NodeResultCache:
+    """Caches each node's partial state update under ``(node, key)``.
+
+    A workflow run then only re-executes the nodes whose entries have
+    expired; results where every field is empty (the nodes' error fallback)
+    are never cached.
+    """
+
+    def __init__(self, ttls: Dict[str, float], max_bytes: int = 32 * 1024 * 1024):
+        self.ttls = ttls
+        self._cache = AnalysisCache(max_entries=10_000, max_bytes=max_bytes, stale_ttl=0)
+
+    def lookup(self, name: str, state: Any) -> Optional[dict]:
+        """Return the cached update for node ``name`` given its input ``state``."""
+        key = _KEY_FUNCS.get(name, _ticker_key)(state)
+        if not key or not self.ttls.get(name):
+            return None
+        hit = self._cache.get(f"{name}:{key}")
+        if hit is None:
+            return None
+        logger.info("NodeResultCache: hit for %s:%s", name, key)
+        return hit[0]
+
+    def store(self, name: str, state: Any, result: Any) -> None:
+        key = _KEY_FUNCS.get(name, _ticker_key)(state)
+        ttl = self.ttls.get(name)
+        if key and ttl and isinstance(result, dict) and any(result.values()):
+            self._cache.set(f"{name}:{key}", result, ttl=ttl)
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        if not self.ttls.get(name):
+            return fn
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def cached_async_node(state):
+                hit = self.lookup(name, state)
+                if hit is not None:
+                    return hit
+                result = await fn(state)
+                self.store(name, state, result)
+                return result
+
+            return cached_async_node
+
+        @functools.wraps(fn)
+        def cached_node(state):
+            hit = self.lookup(name, state)
+            if hit is not None:
+                return hit
+            result = fn(state)
+            self.store(name, state, result)
+            return result
+
+        return cached_node
+
+    def invalidate(self, name: str, key: str) -> None:
+        self._cache.delete(f"{name}:{key}")
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._cache.stats(), "ttls": self.ttls}
+
+
+@lru_cache(maxsize=1)
+def get_node_cache() -> NodeResultCache:
+    """Return the process-wide node result cache."""
+    return NodeResultCache(NODE_CACHE_TTLS, max_bytes=NODE_CACHE_MAX_BYTES)
@@ -0,0 +1,185 @@
+"""Retrieval-augmented chat: Screener and news chunks in a ``LocalVectorIndex``.
+
+Every analysis the server produced is chunked and indexed under its ticker:
+the Screener page replaces the ticker's previous page chunks when it
+changed, news chunks accumulate (keyed by article URL). For a chat question the top ``k`` chunks
+of the stock being discussed are added to the prompt, within ``max_tokens``.
+"""
+
+import re
+import zlib
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Tuple
+
+from config import (
+    CHAT_RETRIEVAL_K,
+    CHAT_RETRIEVAL_MIN_SCORE,
+    CHAT_RETRIEVAL_TOKENS,
+    VECTOR_CHUNK_CHARS,
+    VECTOR_EXACT_LIMIT,
+    logger,
+)
+from services.context_builder import _get, estimate_tokens, truncate_tokens
+
+if TYPE_CHECKING:
+    from services.vector_index import LocalVectorIndex
+
+_SECTION_RE = re.compile(r"^(?:\[\])*#{1,6}[ \t]*(.+?)[ \t#]*$", re.MULTILINE)
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+
+def chunk_text(text: str, size: int = 800, overlap: int = 100) -> List[str]:
+    """Split ``text`` into pieces of about ``size`` characters along paragraph, then word, boundaries."""
+    chunks: List[str] = []
+    current = ""
+    for paragraph in _PARAGRAPH_RE.split(text or ""):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > size:
+            chunks.append(current)
+            current = ""
+        if len(paragraph) <= size:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+            continue
+        start = 0
+        while start < len(paragraph):
+            end = min(len(paragraph), start + size)
+            if end < len(paragraph):
+                space = paragraph.rfind(" ", start + size // 2, end)
+                end = space if space > 0 else end
+            chunks.append(paragraph[start:end].strip())
+            if end >= len(paragraph):
+                break
+            start = max(start + 1, end - overlap)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _ticker(state: Mapping[str, Any]) -> str:
+    ticker = state.get("TickerSymbol") or state.get("Stock_Ticker") or ""
+    return str(ticker).strip().upper()
+
+
+def _screener_sections(markdown: str) -> List[Tuple[str, str]]:
+    """``(heading, body)`` pairs; text before the first heading is the page summary."""
+    headings = list(_SECTION_RE.finditer(markdown))
+    sections = [("Summary", markdown[: headings[0].start()] if headings else markdown)]
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(markdown)
+        sections.append((heading.group(1).strip(), markdown[heading.end() : end]))
+    return sections
+
+
+class RetrievalIndex:
+    """Indexes analyses incrementally and retrieves passages for chat questions."""
+
+    def __init__(
+        self,
+        index: Optional["LocalVectorIndex"] = None,
+        chunk_chars: int = 800,
+        k: int = 4,
+        max_tokens: int = 600,
+        min_score: float = 0.1,
+    ):
+        if index is None:
+            from services.vector_index import LocalVectorIndex  # LangChain's VectorStore, loaded on first use
+
+            index = LocalVectorIndex()
+        self.index = index
+        self.chunk_chars = chunk_chars
+        self.k = k
+        self.max_tokens = max_tokens
+        self.min_score = min_score
+        self._page_fingerprints: Dict[str, int] = {}
+        self._counters = {"indexed_pages": 0, "indexed_articles": 0, "retrievals": 0, "passages": 0}
+
+    def index_analysis(self, state: Mapping[str, Any]) -> int:
+        """Add the chunks of one analysis state that are not indexed yet; returns how many were added."""
+        ticker = _ticker(state)
+        if not ticker:
+            return 0
+        texts: List[str] = []
+        metadatas: List[dict] = []
+        ids: List[str] = []
+
+        page = state.get("screener_data") or ""
+        fingerprint = zlib.crc32(page.encode())
+        if page and self._page_fingerprints.get(ticker) != fingerprint:
+            self.index.delete(filters={"ticker": ticker, "source": "screener"})
+            self._page_fingerprints[ticker] = fingerprint
+            self._counters["indexed_pages"] += 1
+            n = 0
+            for heading, body in _screener_sections(page):
+                for chunk in chunk_text(body, self.chunk_chars):
+                    texts.append(f"{ticker} {heading}:\n{chunk}")
+                    metadatas.append({"ticker": ticker, "source": "screener", "section": heading})
+                    ids.append(f"{ticker}:screener:{n}")
+                    n += 1
+
+        for article in state.get("news_articles") or []:
+            url = _get(article, "url", "") or ""
+            title = _get(article, "title", "") or ""
+            key = f"{ticker}:news:{zlib.crc32((url or title).encode()):08x}"
+            if not (url or title) or self.index.get_by_ids([f"{key}:0"]):
+                continue
+            self._counters["indexed_articles"] += 1
+            for n, chunk in enumerate(chunk_text(_get(article, "content", "") or "", self.chunk_chars) or [""]):
+                texts.append(f"{title}\n{chunk}".strip())
+                metadatas.append({"ticker": ticker, "source": "news", "title": title, "url": url})
+                ids.append(f"{key}:{n}")
+
+        if texts:
+            self.index.add_texts(texts, metadatas, ids=ids)
+            logger.info("RetrievalIndex: indexed %d chunks for %s (%d total)", len(texts), ticker, len(self.index))
+        return len(texts)
+
+    def retrieve(self, question: str, context: Optional[Mapping[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+        """Passages relevant to ``question`` for the stock in ``context``, and a short report.
+
+        ``context`` may come from a request body, so it only selects the
+        ticker; nothing in it is indexed.
+        """
+        if not question or not question.strip():
+            return "", {"passages": 0, "tokens": 0}
+        ticker = _ticker(context) if context else ""
+        filters = {"ticker": ticker} if ticker else None
+        hits = self.index.similarity_search_with_score(question, k=self.k, filters=filters)
+
+        parts: List[str] = []
+        sources: List[str] = []
+        remaining = self.max_tokens
+        for doc, score in hits:
+            if score < self.min_score or remaining <= 0:
+                continue
+            meta = doc.metadata
+            label = meta.get("section") if meta.get("source") == "screener" else meta.get("url") or meta.get("title")
+            text = truncate_tokens(f"[{meta.get('source')}: {label}]\n{doc.page_content}", remaining)
+            parts.append(text)
+            sources.append(doc.id)
+            remaining -= estimate_tokens(text) + 1
+        text = "\n\n".join(parts)
+        self._counters["retrievals"] += 1
+        self._counters["passages"] += len(parts)
+        return text, {"passages": len(parts), "tokens": estimate_tokens(text), "ids": sources}
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counters, "index": self.index.stats()}
+
+    def clear(self) -> None:
+        self.index.clear()
+        self._page_fingerprints.clear()
+
+
+@lru_cache(maxsize=1)
+def get_retrieval_index() -> RetrievalIndex:
+    from services.vector_index import LocalVectorIndex
+
+    return RetrievalIndex(
+        index=LocalVectorIndex(exact_limit=VECTOR_EXACT_LIMIT),
+        chunk_chars=VECTOR_CHUNK_CHARS,
+        k=CHAT_RETRIEVAL_K,
+        max_tokens=CHAT_RETRIEVAL_TOKENS,
+        min_score=CHAT_RETRIEVAL_MIN_SCORE,
+    )
@@ -0,0 +1,91 @@
+"""Parse the cleaned Screener.in markdown into numeric ``ScreenerTable``s."""
+
+import math
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models import ScreenerTable
+
+# Section key -> headings it appears under on Screener.in
+SECTIONS: Dict[str, tuple] = {
+    "quarters": ("quarterly results",),
+    "profit_loss": ("profit & loss", "profit and loss"),
+    "balance_sheet": ("balance sheet",),
+    "cash_flow": ("cash flows", "cash flow"),
+    "ratios": ("ratios",),
+    "shareholding": ("shareholding pattern",),
+}
+_SECTION_BY_HEADING = {heading: key for key, headings in SECTIONS.items() for heading in headings}
+
+# Cleaning "[(#top)](#top)" leaves "[]" glued to the next section's heading
+_HEADING_RE = re.compile(r"^(?:\[\])*#{1,6}[ \t]*(.+?)[ \t#]*$", re.MULTILINE)
+_LINK_RE = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_SEPARATOR_RE = re.compile(r"^\|?[\s:|-]+\|?$")
+_NUMBER_JUNK = str.maketrans("", "", ",%₹ \u00a0")
+
+
+def _label(cell: str) -> str:
+    """Row/period label without markdown links, emphasis or Screener's expand marker."""
+    cell = _LINK_RE.sub(r"\1", cell).replace("*", "").strip()
+    return cell[:-1].rstrip() if cell.endswith("+") else cell
+
+
+def _number(cell: str) -> float:
+    cell = cell.translate(_NUMBER_JUNK)
+    try:
+        return float(cell)
+    except ValueError:
+        return math.nan
+
+
+def _cells(line: str) -> List[str]:
+    return [c.strip() for c in line.strip().strip("|").split("|")]
+
+
+def _first_table(body: str) -> Optional[ScreenerTable]:
+    lines: List[str] = []
+    for line in body.splitlines():
+        if line.lstrip().startswith("|"):
+            lines.append(line)
+        elif lines:
+            break
+    rows = [_cells(line) for line in lines if not _SEPARATOR_RE.match(line.strip())]
+    if len(rows) < 2:
+        return None
+
+    header, data = rows[0], rows[1:]
+    periods = [_label(c) for c in header[1:]]
+    width = len(periods)
+    labels: List[str] = []
+    values: List[List[float]] = []
+    for cells in data:
+        numbers = [_number(c) for c in cells[1 : width + 1]]
+        numbers += [math.nan] * (width - len(numbers))
+        if all(math.isnan(x) for x in numbers):  # e.g. the "Raw PDF" link row
+            continue
+        labels.append(_label(cells[0]))
+        values.append(numbers)
+    if not labels:
+        return None
+    return ScreenerTable(periods=periods, rows=labels, values=np.array(values, dtype=np.float64))
+
+
+def parse_screener_tables(markdown: str) -> Dict[str, ScreenerTable]:
+    """Return the first table of each known section, keyed by ``SECTIONS`` key."""
+    markdown = markdown or ""
+    sections = [
+        (key, m)
+        for m in _HEADING_RE.finditer(markdown)
+        if (key := _SECTION_BY_HEADING.get(m.group(1).strip().lower())) is not None
+    ]
+    tables: Dict[str, ScreenerTable] = {}
+    for i, (key, heading) in enumerate(sections):
+        if key in tables:
+            continue
+        end = sections[i + 1][1].start() if i + 1 < len(sections) else len(markdown)
+        table = _first_table(markdown[heading.end() : end])
+        if table is not None:
+            tables[key] = table
+    return tables
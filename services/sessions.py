@@ -0,0 +1,84 @@
+"""Server-side chat sessions: a short ring of recent messages plus a stock reference."""
+
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from config import logger
+
+
+@dataclass
+class ChatSession:
+    session_id: str
+    stock_name: Optional[str] = None  # key of the cached analysis used as context, not a copy of it
+    messages: Deque[BaseMessage] = field(default_factory=deque)
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.monotonic)
+
+    def history(self) -> List[BaseMessage]:
+        return list(self.messages)
+
+    def add_turn(self, user: str, assistant: str) -> None:
+        self.messages.append(HumanMessage(content=user))
+        self.messages.append(AIMessage(content=assistant))
+
+    def messages_as_dicts(self) -> List[Dict[str, str]]:
+        return [
+            {"role": "user" if isinstance(m, HumanMessage) else "assistant", "content": m.content} for m in self.messages
+        ]
+
+
+class SessionStore:
+    """Sessions kept in last-used order and dropped after ``idle_ttl`` seconds without use.
+
+    Each session keeps only the last ``max_messages`` messages, counting user
+    and assistant messages separately (two exchanges by default, the same
+    window the chat prompt has always used).
+    """
+
+    def __init__(self, idle_ttl: float = 1800.0, max_sessions: int = 10_000, max_messages: int = 4):
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._counters = {"created": 0, "expired": 0, "evicted": 0}
+
+    def create(self, stock_name: Optional[str] = None) -> ChatSession:
+        self._purge()
+        session = ChatSession(session_id=uuid.uuid4().hex, stock_name=stock_name, messages=deque(maxlen=self.max_messages))
+        self._sessions[session.session_id] = session
+        self._counters["created"] += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self._counters["evicted"] += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """Return the live session and mark it used, or None if unknown or idle too long."""
+        self._purge()
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        session.last_used = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counters, "active": len(self._sessions), "idle_ttl": self.idle_ttl}
+
+    def _purge(self) -> None:
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_used > cutoff:
+                break
+            del self._sessions[session_id]
+            self._counters["expired"] += 1
+            logger.info("SessionStore: expired idle session %s", session_id)
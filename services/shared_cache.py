@@ -0,0 +1,235 @@
+"""Analysis-cache backend shared by the worker processes of one host.
+
+``uvicorn --workers N`` runs N copies of the app, each with its own
+``AnalysisCache``. With a ``SQLiteCacheBackend`` behind them, a result
+computed by one worker is read by the others from a SQLite file in WAL mode
+(readers never block the writer, no external service), and a ``locks`` table
+of expiring leases makes sure only one worker computes a given key at a
+time: the others poll until the lease is released and then read the stored
+result. The holder renews its lease while it computes, so a crashed worker
+only delays the others until the lease runs out. Calls that touch the
+database are blocking; async callers run them on the backend's single-thread
+``executor`` (``await backend.run(backend.get, key)``), as ``lock`` does.
+"""
+
+import asyncio
+import functools
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple, TypeVar
+
+from config import logger
+
+T = TypeVar("T")
+
+# Bumped when the tables change; a file with another version is recreated
+_SCHEMA_VERSION = 3
+_SCHEMA = """
+DROP TABLE IF EXISTS entries;
+CREATE TABLE entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    compressed INTEGER NOT NULL,
+    json_size INTEGER NOT NULL,
+    etag TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    drop_at REAL NOT NULL
+);
+CREATE INDEX entries_stored_at ON entries (stored_at);
+CREATE TABLE IF NOT EXISTS locks (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteCacheBackend:
+    """Entries and compute leases in one SQLite database shared by processes.
+
+    Entries are the ``AnalysisCache``'s own (possibly compressed) JSON
+    bytes, stored and returned as they are. Expiry times are wall-clock so
+    that all processes agree on them. ``max_entries``/``max_bytes`` bound
+    the file; the oldest entries are dropped first.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 1000,
+        max_bytes: int = 512 * 1024 * 1024,
+        lock_ttl: float = 120.0,
+        poll_interval: float = 0.05,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._guard = threading.Lock()
+        # One thread: SQLite calls are serialized by the guard anyway, and writes keep their order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-cache")
+        self._usage = (0, 0)  # (entries, bytes) as of this process's last write
+        self._locks_held = 0
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "locks_acquired": 0,
+            "lock_waits": 0,
+            "lock_wait_seconds": 0.0,
+        }
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run a blocking backend call on ``executor``."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(fn, *args))
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per process, opened lazily so forked workers never share one
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Checked under the write lock: workers starting together create the tables once
+                if conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                    for statement in _SCHEMA.split(";"):
+                        if statement.strip():
+                            conn.execute(statement)
+                    conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _execute(self, sql: str, params: Tuple = ()) -> sqlite3.Cursor:
+        with self._guard:
+            return self._db().execute(sql, params)
+
+    def get(self, key: str) -> Optional[Tuple[bytes, bool, int, str, float]]:
+        """Return ``(payload, compressed, json_size, etag, expires_at)``, or ``None`` when absent or past its drop time."""
+        row = self._execute(
+            "SELECT value, compressed, json_size, etag, expires_at FROM entries WHERE key = ? AND drop_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            self._counters["misses"] += 1
+            return None
+        self._counters["hits"] += 1
+        return row[0], bool(row[1]), row[2], row[3], row[4]
+
+    def set(
+        self, key: str, payload: bytes, compressed: bool, json_size: int, etag: str, ttl: float, stale_ttl: float
+    ) -> None:
+        """Store ``payload``; it is fresh for ``ttl`` seconds and kept ``stale_ttl`` more."""
+        now = time.time()
+        with self._guard:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, payload, len(payload), int(compressed), json_size, etag, now, now + ttl, now + ttl + stale_ttl),
+                )
+                db.execute("DELETE FROM entries WHERE drop_at <= ?", (now,))
+                self._evict(db)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        self._counters["writes"] += 1
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        count, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        while count > self.max_entries or size > self.max_bytes:
+            row = db.execute("SELECT key, size FROM entries ORDER BY stored_at LIMIT 1").fetchone()
+            if row is None:
+                break
+            db.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            count, size = count - 1, size - row[1]
+            self._counters["evictions"] += 1
+            logger.info("SQLiteCacheBackend: evicted '%s' (%d bytes)", row[0], row[1])
+        self._usage = (count, size)
+
+    def delete(self, key: str) -> None:
+        self._execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters of this process; never queries the database, so it is safe on the event loop."""
+        count, size = self._usage
+        return {
+            **self._counters,
+            "lock_wait_seconds": round(self._counters["lock_wait_seconds"], 3),
+            "entries": count,
+            "bytes": size,
+            "locks_held": self._locks_held,
+        }
+
+    def _try_lock(self, key: str, owner: str) -> bool:
+        now = time.time()
+        cursor = self._execute(
+            "INSERT INTO locks VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+            "owner = excluded.owner, expires_at = excluded.expires_at WHERE locks.expires_at <= ?",
+            (key, owner, now + self.lock_ttl, now),
+        )
+        return cursor.rowcount == 1
+
+    async def _renew(self, key: str, owner: str) -> None:
+        while True:
+            await asyncio.sleep(self.lock_ttl / 3)
+            await self.run(
+                self._execute,
+                "UPDATE locks SET expires_at = ? WHERE key = ? AND owner = ?",
+                (time.time() + self.lock_ttl, key, owner),
+            )
+
+    @asynccontextmanager
+    async def lock(self, key: str) -> AsyncIterator[bool]:
+        """Hold the compute lease for ``key`` across processes; yields whether we had to wait for it."""
+        owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        waited = 0.0
+        delay = self.poll_interval
+        while not await self.run(self._try_lock, key, owner):
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = min(delay * 2, 1.0)
+        if waited:
+            self._counters["lock_waits"] += 1
+            self._counters["lock_wait_seconds"] += waited
+        self._counters["locks_acquired"] += 1
+        self._locks_held += 1
+        renew = asyncio.ensure_future(self._renew(key, owner))
+        try:
+            yield waited > 0
+        finally:
+            renew.cancel()
+            self._locks_held -= 1
+            await self.run(self._execute, "DELETE FROM locks WHERE key = ? AND owner = ?", (key, owner))
+
+
+def make_cache_backend(kind: str, path: str, **options: Any) -> Optional[SQLiteCacheBackend]:
+    """The shared backend named by ``ANALYSIS_CACHE_BACKEND``; None for per-process caching."""
+    if kind in ("", "memory"):
+        return None
+    if kind == "sqlite":
+        return SQLiteCacheBackend(path, **options)
+    raise ValueError(f"Unknown analysis cache backend {kind!r}; expected 'memory' or 'sqlite'")
@@ -0,0 +1,44 @@
+"""Single-flight coalescing of concurrent identical async calls."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from config import logger
+
+
+class SingleFlight:
+    """In-flight call table: concurrent callers with the same key share one run.
+
+    The shared run is a standalone task and each caller awaits it through
+    ``asyncio.shield``, so cancelling one waiter never cancels the run the
+    other waiters depend on.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._counters = {"runs": 0, "coalesced": 0}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self._counters["runs"] += 1
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        else:
+            self._counters["coalesced"] += 1
+            logger.info("SingleFlight: joined in-flight run for '%s'", key)
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._counters, "inflight": len(self._inflight)}
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so abandoned runs don't log "never retrieved".
+        if not task.cancelled():
+            task.exception()
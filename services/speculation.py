@@ -0,0 +1,87 @@
+"""Speculative execution of ticker-dependent nodes ahead of ticker resolution."""
+
+import asyncio
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from config import logger
+from services.node_cache import get_node_cache
+from services.ticker_index import get_ticker_index
+
+
+def guess_ticker(state: Any) -> Optional[str]:
+    """Cheap ticker guess from the node cache or the local index, if any."""
+    hit = get_node_cache().lookup("ScreenerURLNode", state)
+    if hit and hit.get("TickerSymbol"):
+        return hit["TickerSymbol"]
+    match = get_ticker_index().guess(state.User_stock_name or "")
+    return match.symbol if match else None
+
+
+class Speculator:
+    """Starts a node early on a guessed ticker and hands the result over if the guess holds.
+
+    Runs are keyed by the normalized stock name; unclaimed runs older than
+    ``max_age`` seconds are cancelled.
+    """
+
+    def __init__(self, max_age: float = 120.0):
+        self.max_age = max_age
+        self._runs: Dict[str, Tuple[str, asyncio.Task, float]] = {}
+        self._counters = {"started": 0, "confirmed": 0, "cancelled": 0}
+
+    def start(self, key: str, guess: str, fn: Callable[[], Awaitable[Any]]) -> None:
+        self._prune()
+        if key in self._runs:
+            return
+        task = asyncio.ensure_future(fn())
+        self._runs[key] = (guess.upper(), task, time.monotonic())
+        self._counters["started"] += 1
+
+    async def claim(self, key: str, actual: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the speculative result when it used ``actual``; otherwise cancel it and run ``fn``."""
+        entry = self._runs.pop(key, None)
+        if entry is not None:
+            guess, task, _ = entry
+            if guess == (actual or "").upper():
+                self._counters["confirmed"] += 1
+                return await task
+            task.cancel()
+            self._counters["cancelled"] += 1
+            logger.info("Speculator: guessed %s for '%s' but resolved %s, re-running", guess, key, actual)
+        return await fn()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._counters, "pending": len(self._runs)}
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (_, _, started) in self._runs.items() if now - started > self.max_age]:
+            _, task, _ = self._runs.pop(key)
+            task.cancel()
+            self._counters["cancelled"] += 1
+
+
+def speculative_nodes(resolve: Callable, dependent: Callable, speculator: Speculator) -> Tuple[Callable, Callable]:
+    """Wrap a ticker-resolving node and a ticker-dependent node for speculation.
+
+    ``resolve`` kicks off ``dependent`` on a guessed ticker before resolving;
+    ``dependent`` reuses that run when the resolved ticker matches the guess.
+    """
+
+    @functools.wraps(resolve)
+    async def speculative_resolve(state):
+        guess = guess_ticker(state)
+        if guess:
+            key = (state.User_stock_name or "").strip().lower()
+            guessed_state = state.model_copy(update={"TickerSymbol": guess})
+            speculator.start(key, guess, lambda: dependent(guessed_state))
+        return await resolve(state)
+
+    @functools.wraps(dependent)
+    async def speculative_dependent(state):
+        key = (state.User_stock_name or "").strip().lower()
+        return await speculator.claim(key, state.TickerSymbol, lambda: dependent(state))
+
+    return speculative_resolve, speculative_dependent
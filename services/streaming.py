@@ -0,0 +1,177 @@
+"""Coalescing and backpressure for Server-Sent Event streams.
+
+LLM streams produce many small chunks. ``coalesce`` reads them in a producer
+task into a bounded queue and hands the consumer one merged string per
+``flush_interval`` or ``flush_bytes``, whichever comes first, so each SSE
+frame carries several tokens. A slow client stops the consumer, the queue
+fills up, and the producer stops pulling from the upstream stream instead
+of buffering without bound. When the consumer is closed or cancelled (Starlette
+cancels the response when the client disconnects) the producer is cancelled
+and the upstream stream closed.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+_CHUNK_PREFIX = 'data: {"status": "chunk", "content": '
+
+
+def sse_event(payload: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def sse_chunk(content: str) -> str:
+    """Same bytes as ``sse_event({"status": "chunk", "content": content})``, without building a dict."""
+    return f"{_CHUNK_PREFIX}{json.dumps(content)}}}\n\n"
+
+
+class _FrameBuffer:
+    """Chunks read ahead of the consumer, with the two wake-ups ``coalesce`` needs.
+
+    Cheaper per chunk than an ``asyncio.Queue``: appending is a list append, and
+    the consumer is woken only for the first chunk of a frame, a full frame,
+    or the end of the stream.
+    """
+
+    def __init__(self, flush_bytes: int, max_pending: int):
+        self.flush_bytes = flush_bytes
+        self.max_pending = max_pending
+        self.parts: List[str] = []
+        self.size = 0
+        self.first_at = 0.0
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.urgent = True  # consumer is waiting for the first chunk of a frame
+        self._loop = asyncio.get_running_loop()
+        self._ready: Optional[asyncio.Future] = None
+        self._space: Optional[asyncio.Future] = None
+
+    def _wake(self) -> None:
+        if self._ready is not None and not self._ready.done():
+            self._ready.set_result(None)
+
+    async def put(self, chunk: str) -> None:
+        if not self.parts:
+            self.first_at = self._loop.time()
+        self.parts.append(chunk)
+        self.size += len(chunk)
+        if self.urgent or self.size >= self.flush_bytes:
+            self._wake()
+        if len(self.parts) >= self.max_pending:
+            # Backpressure: stop reading the upstream until the consumer takes a frame
+            self._wake()
+            self._space = self._loop.create_future()
+            await self._space
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._wake()
+
+    async def wait(self, deadline: Optional[float] = None) -> None:
+        self._ready = self._loop.create_future()
+        timer = self._loop.call_at(deadline, self._wake) if deadline is not None else None
+        try:
+            await self._ready
+        finally:
+            self._ready = None
+            if timer is not None:
+                timer.cancel()
+
+    def take(self) -> str:
+        text = "".join(self.parts)
+        self.parts = []
+        self.size = 0
+        if self._space is not None and not self._space.done():
+            self._space.set_result(None)
+        return text
+
+
+async def _pump(source: AsyncIterator[str], buffer: _FrameBuffer) -> None:
+    try:
+        async for chunk in source:
+            if chunk:
+                await buffer.put(chunk)
+    except Exception as e:
+        buffer.close(e)
+    else:
+        buffer.close()
+
+
+async def coalesce(
+    source: AsyncIterator[str],
+    flush_interval: float = 0.05,
+    flush_bytes: int = 512,
+    max_pending: int = 256,
+) -> AsyncIterator[str]:
+    """Yield the text of ``source`` merged into batches.
+
+    A batch is yielded ``flush_interval`` seconds after its first chunk
+    arrived or once it holds ``flush_bytes`` characters. At most
+    ``max_pending`` chunks are read ahead of the consumer. Errors raised by
+    ``source`` are re-raised after the text received before them.
+    """
+    buffer = _FrameBuffer(flush_bytes, max(1, max_pending))
+    producer = asyncio.ensure_future(_pump(source, buffer))
+    try:
+        while True:
+            if not buffer.parts and not buffer.done:
+                buffer.urgent = True
+                await buffer.wait()
+            buffer.urgent = False
+            if buffer.parts and not buffer.done and buffer.size < flush_bytes and len(buffer.parts) < max_pending:
+                # One timer per frame rather than one wait per chunk
+                deadline = buffer.first_at + flush_interval
+                if deadline > asyncio.get_running_loop().time():
+                    await buffer.wait(deadline)
+            if buffer.parts:
+                yield buffer.take()
+            elif buffer.done:
+                if buffer.error is not None:
+                    raise buffer.error
+                return
+    finally:
+        producer.cancel()
+        try:
+            await producer
+        except asyncio.CancelledError:
+            pass
+        aclose = getattr(source, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def replay(text: str, frame_chars: int = 512) -> AsyncIterator[str]:
+    """Yield a finished answer in frames of about ``frame_chars`` characters, split after spaces."""
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + frame_chars)
+        if end < len(text):
+            space = text.rfind(" ", start + frame_chars // 2, end)
+            end = space + 1 if space > 0 else end
+        yield text[start:end]
+        start = end
+
+
+class StreamStats:
+    """Counters for the SSE streams served by this process."""
+
+    def __init__(self):
+        self._counters = {"streams": 0, "active": 0, "completed": 0, "disconnected": 0, "chunks": 0, "frames": 0}
+
+    def opened(self) -> None:
+        self._counters["streams"] += 1
+        self._counters["active"] += 1
+
+    def closed(self, completed: bool) -> None:
+        self._counters["active"] -= 1
+        self._counters["completed" if completed else "disconnected"] += 1
+
+    def add(self, chunks: int = 0, frames: int = 0) -> None:
+        self._counters["chunks"] += chunks
+        self._counters["frames"] += frames
+
+    def stats(self) -> Dict[str, Any]:
+        frames = self._counters["frames"]
+        return {**self._counters, "chunks_per_frame": round(self._counters["chunks"] / frames, 2) if frames else None}
@@ -0,0 +1,255 @@
+"""Process-wide latency, error and size metrics in Prometheus text format.
+
+``instrument_node`` wraps a LangGraph node: each call adds its duration to a
+histogram, counts its outcome (``ok``, ``empty`` for the nodes' all-empty
+error fallback, ``error``, ``cancelled``) and records the size of the text
+and list fields it returned. ``upstream_slot`` reports every Gemini/Tavily
+call together with the node it ran in, ``TelemetryMiddleware`` times HTTP
+requests per route, and registered collectors add the stats of the caches
+and other components when ``/metrics`` is scraped. Recording is a few dict
+operations per event and needs no lock: everything runs on the event loop.
+"""
+
+import asyncio
+import functools
+import inspect
+import math
+import re
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from config import TELEMETRY_ENABLED
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_METRICS: Dict[str, Tuple[str, str]] = {
+    "kys_node_duration_seconds": ("histogram", "Duration of LangGraph node calls"),
+    "kys_node_calls_total": ("counter", "LangGraph node calls by outcome"),
+    "kys_node_output_size": ("histogram", "Characters of text fields and items of list fields returned by nodes"),
+    "kys_upstream_duration_seconds": ("histogram", "Duration of Gemini/Tavily calls, excluding governor queueing"),
+    "kys_upstream_calls_total": ("counter", "Gemini/Tavily calls by calling node and outcome"),
+    "kys_http_request_duration_seconds": ("histogram", "HTTP request duration until the response body is complete"),
+    "kys_http_requests_total": ("counter", "HTTP requests by route and status"),
+}
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+# Node currently running in this task; upstream calls are attributed to it
+_current_node: ContextVar[str] = ContextVar("telemetry_node", default="")
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _value(v: float) -> str:
+    if isinstance(v, int):
+        return str(v)
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v))
+
+
+def _label_text(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _flatten(prefix: str, stats: Mapping[str, Any], out: Dict[str, float]) -> None:
+    for key, value in stats.items():
+        name = f"{prefix}_{_NAME_RE.sub('_', str(key))}"
+        if isinstance(value, Mapping):
+            _flatten(name, value, out)
+        elif isinstance(value, (int, float)):
+            out[name] = int(value) if isinstance(value, bool) else value
+
+
+class Telemetry:
+    """Counters and histograms keyed by metric name and label values."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._counters: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(int))
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = defaultdict(dict)
+        self._collectors: Dict[str, Callable[[], Mapping[str, Any]]] = {}
+
+    def inc(self, metric: str, labels: Labels, amount: float = 1) -> None:
+        self._counters[metric][labels] += amount
+
+    def observe(self, metric: str, labels: Labels, value: float, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        series = self._histograms[metric]
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = Histogram(buckets)
+        histogram.observe(value)
+
+    def register_collector(self, name: str, collect: Callable[[], Mapping[str, Any]]) -> None:
+        """Export the numeric values of ``collect()`` (nested dicts flattened) as ``kys_<name>_<key>`` gauges."""
+        self._collectors[name] = collect
+
+    def record_node(self, node: str, seconds: float, outcome: str, sizes: Optional[Mapping[str, int]] = None) -> None:
+        labels = (("node", node),)
+        self.observe("kys_node_duration_seconds", labels, seconds)
+        self.inc("kys_node_calls_total", (("node", node), ("outcome", outcome)))
+        for field, size in (sizes or {}).items():
+            self.observe("kys_node_output_size", (("node", node), ("field", field)), size, SIZE_BUCKETS)
+
+    def record_upstream(self, upstream: str, seconds: float, outcome: str) -> None:
+        self.observe("kys_upstream_duration_seconds", (("upstream", upstream),), seconds)
+        node = _current_node.get() or "none"
+        self.inc("kys_upstream_calls_total", (("upstream", upstream), ("node", node), ("outcome", outcome)))
+
+    def record_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        self.observe("kys_http_request_duration_seconds", (("method", method), ("route", route)), seconds)
+        self.inc("kys_http_requests_total", (("method", method), ("route", route), ("status", str(status))))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric, (kind, help_text) in _METRICS.items():
+            series = self._histograms.get(metric) if kind == "histogram" else self._counters.get(metric)
+            if not series:
+                continue
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            if kind == "counter":
+                for labels, value in series.items():
+                    lines.append(f"{metric}{_label_text(labels)} {_value(value)}")
+                continue
+            for labels, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{_label_text(labels + (('le', _value(float(bound))),))} {cumulative}")
+                lines.append(f"{metric}_bucket{_label_text(labels + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{metric}_sum{_label_text(labels)} {_value(histogram.sum)}")
+                lines.append(f"{metric}_count{_label_text(labels)} {histogram.count}")
+
+        for name, collect in self._collectors.items():
+            values: Dict[str, float] = {}
+            _flatten(f"kys_{_NAME_RE.sub('_', name)}", collect(), values)
+            for metric, value in values.items():
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        self._counters.clear()
+        self._histograms.clear()
+
+
+@lru_cache(maxsize=1)
+def get_telemetry() -> Telemetry:
+    return Telemetry(enabled=TELEMETRY_ENABLED)
+
+
+def _output_sizes(result: Any, fields: Optional[Sequence[str]]) -> Dict[str, int]:
+    if isinstance(result, Mapping):
+        items = result.items() if fields is None else ((f, result.get(f)) for f in fields)
+    elif fields is not None:
+        items = ((f, getattr(result, f, None)) for f in fields)
+    else:
+        return {}
+    return {field: len(value) for field, value in items if isinstance(value, (str, list))}
+
+
+def _outcome(result: Any) -> str:
+    if isinstance(result, Mapping) and result and not any(result.values()):
+        return "empty"
+    return "ok"
+
+
+def instrument_node(name: str, fn: Callable, fields: Optional[Sequence[str]] = None) -> Callable:
+    """Wrap node ``fn`` so its calls are recorded under ``name``.
+
+    ``fields`` limits the output sizes recorded to those fields (read as
+    attributes when the node returns a state object rather than a dict).
+    """
+    telemetry = get_telemetry()
+    if not telemetry.enabled:
+        return fn
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def instrumented_async_node(state):
+            token = _current_node.set(name)
+            start = time.perf_counter()
+            try:
+                result = await fn(state)
+            except asyncio.CancelledError:
+                telemetry.record_node(name, time.perf_counter() - start, "cancelled")
+                raise
+            except Exception:
+                telemetry.record_node(name, time.perf_counter() - start, "error")
+                raise
+            finally:
+                _current_node.reset(token)
+            telemetry.record_node(name, time.perf_counter() - start, _outcome(result), _output_sizes(result, fields))
+            return result
+
+        return instrumented_async_node
+
+    @functools.wraps(fn)
+    def instrumented_node(state):
+        token = _current_node.set(name)
+        start = time.perf_counter()
+        try:
+            result = fn(state)
+        except Exception:
+            telemetry.record_node(name, time.perf_counter() - start, "error")
+            raise
+        finally:
+            _current_node.reset(token)
+        telemetry.record_node(name, time.perf_counter() - start, _outcome(result), _output_sizes(result, fields))
+        return result
+
+    return instrumented_node
+
+
+class TelemetryMiddleware:
+    """ASGI middleware timing each HTTP request, labelled by its route template."""
+
+    def __init__(self, app, telemetry: Optional[Telemetry] = None):
+        self.app = app
+        self.telemetry = telemetry or get_telemetry()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.telemetry.enabled:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Unmatched paths share one label so scanners cannot grow the series without bound
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.telemetry.record_request(scope["method"], route, status, time.perf_counter() - start)
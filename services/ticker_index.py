@@ -0,0 +1,257 @@
+"""In-process NSE symbol index for resolving stock names without an LLM call."""
+
+import csv
+import re
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import logger, NSE_LISTING_PATH, NSE_LEARNED_ALIASES_PATH, TICKER_FUZZY_THRESHOLD, TICKER_MIN_PREFIX
+
+# Legal suffixes that users rarely type and that should not affect matching
+_STOP_TOKENS = {"limited", "ltd", "the", "plc", "inc"}
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+@dataclass(frozen=True)
+class TickerMatch:
+    symbol: str
+    name: str
+    method: str  # "exact", "alias", "fuzzy" or "guess"
+    score: float = 1.0
+
+
+def normalize_name(text: str) -> str:
+    """Lower-case, spell out '&', drop punctuation and legal suffixes."""
+    text = text.lower().replace("&", " and ")
+    tokens = [t for t in _NON_ALNUM.split(text) if t and t not in _STOP_TOKENS]
+    return " ".join(tokens)
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(a: str, b: str) -> float:
+    """Normalized edit similarity in [0, 1]; adjacent transpositions cost one edit."""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    before: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                d = min(d, before[j - 2] + 1)
+            cur.append(d)
+        before, prev = prev, cur
+    return 1.0 - prev[-1] / max(len(a), len(b))
+
+
+class TickerIndex:
+    """Exact, alias and fuzzy (trigram + edit-distance) symbol lookup.
+
+    A query that is only the start of a name, or a word inside one ("jindal",
+    "bank of india"), is ambiguous against the full NSE listing, so ``lookup``
+    leaves it to the LLM; ``guess`` still uses it for speculation.
+    """
+
+    def __init__(self, fuzzy_threshold: float = 0.8, learned_path: Optional[str] = None, min_prefix: int = 4):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.learned_path = learned_path
+        self.min_prefix = min_prefix
+        self._names: Dict[str, str] = {}  # symbol -> company name
+        self._keys: Dict[str, str] = {}  # normalized name -> symbol
+        self._aliases: Dict[str, str] = {}  # normalized alias -> symbol
+        self._sorted_keys: List[str] = []
+        self._sorted_inner: List[Tuple[str, str]] = []  # (key from its second word on, key)
+        self._grams: Dict[str, Set[str]] = {}  # trigram -> keys containing it
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.strip().upper() in self._names
+
+    def add(self, symbol: str, name: str, aliases: Tuple[str, ...] = ()) -> None:
+        symbol = symbol.strip().upper()
+        with self._lock:
+            self._names[symbol] = name.strip()
+            self._index_key(self._keys, normalize_name(name), symbol)
+            for alias in aliases:
+                self._index_key(self._aliases, normalize_name(alias), symbol)
+
+    def learn(self, query: str, symbol: str) -> bool:
+        """Record ``query`` as an alias of a known ``symbol`` (e.g. an LLM answer)."""
+        symbol = symbol.strip().upper()
+        key = normalize_name(query)
+        if not key or symbol not in self._names or self._aliases.get(key) == symbol:
+            return False
+        with self._lock:
+            self._index_key(self._aliases, key, symbol)
+        logger.info("TickerIndex: learned alias '%s' -> %s", key, symbol)
+        if self.learned_path:
+            try:
+                with open(self.learned_path, "a", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerow([symbol, self._names[symbol], query.strip()])
+            except OSError as e:
+                logger.warning("TickerIndex: could not persist learned alias: %s", e)
+        return True
+
+    def lookup(self, query: str) -> Optional[TickerMatch]:
+        if not query or not query.strip():
+            return None
+
+        symbol = query.strip().upper()
+        if symbol in self._names:
+            return self._match(symbol, "exact")
+
+        key = normalize_name(query)
+        if not key:
+            return None
+        if key in self._keys:
+            return self._match(self._keys[key], "exact")
+        if key in self._aliases:
+            return self._match(self._aliases[key], "alias")
+        return self._fuzzy(key)
+
+    def _match(self, symbol: str, method: str, score: float = 1.0) -> TickerMatch:
+        return TickerMatch(symbol=symbol, name=self._names[symbol], method=method, score=score)
+
+    def _symbol_for(self, key: str) -> str:
+        return self._keys.get(key) or self._aliases[key]
+
+    def _index_key(self, table: Dict[str, str], key: str, symbol: str) -> None:
+        if not key:
+            return
+        if key not in self._keys and key not in self._aliases:
+            self._sorted_keys.insert(bisect_left(self._sorted_keys, key), key)
+            for i, char in enumerate(key):
+                if char == " ":
+                    inner = (key[i + 1 :], key)
+                    self._sorted_inner.insert(bisect_left(self._sorted_inner, inner), inner)
+            for gram in _trigrams(key):
+                self._grams.setdefault(gram, set()).add(key)
+        table[key] = symbol
+
+    def _prefix_symbols(self, key: str) -> Set[str]:
+        """Symbols of the names that start with ``key``, or have a later word that does; stops at two."""
+        symbols: Set[str] = set()
+        i = bisect_left(self._sorted_keys, key)
+        while i < len(self._sorted_keys) and self._sorted_keys[i].startswith(key):
+            symbols.add(self._symbol_for(self._sorted_keys[i]))
+            if len(symbols) > 1:
+                return symbols
+            i += 1
+        i = bisect_left(self._sorted_inner, (key, ""))
+        while i < len(self._sorted_inner) and self._sorted_inner[i][0].startswith(key):
+            symbols.add(self._symbol_for(self._sorted_inner[i][1]))
+            if len(symbols) > 1:
+                return symbols
+            i += 1
+        return symbols
+
+    def guess(self, query: str) -> Optional[TickerMatch]:
+        """Best-effort match for speculation: like ``lookup``, then a unique
+        prefix or inner-word match, then the top fuzzy candidate even when it
+        is below the threshold or ambiguous."""
+        match = self.lookup(query)
+        if match is not None or not query or not query.strip():
+            return match
+        key = normalize_name(query)
+        if len(key) >= self.min_prefix:
+            prefixed = self._prefix_symbols(key)
+            if len(prefixed) == 1:
+                return self._match(prefixed.pop(), "guess")
+        scored = self._rank(key, prefixes=True)
+        if not scored or scored[0][0] < 0.5:
+            return None
+        return self._match(scored[0][1], "guess", round(scored[0][0], 3))
+
+    def _rank(self, key: str, prefixes: bool = False) -> List[Tuple[float, str]]:
+        overlap: Dict[str, int] = {}
+        for gram in _trigrams(key):
+            for candidate in self._grams.get(gram, ()):
+                overlap[candidate] = overlap.get(candidate, 0) + 1
+
+        # Rank by trigram overlap, then confirm the best few with edit distance.
+        shortlist = sorted(overlap, key=overlap.__getitem__, reverse=True)[:5]
+        scored: List[Tuple[float, str]] = []
+        for candidate in shortlist:
+            score = _similarity(key, candidate)
+            if prefixes:
+                score = max(score, 0.95 * _similarity(key, candidate[: len(key)]))
+            scored.append((score, self._symbol_for(candidate)))
+        scored.sort(reverse=True)
+        return scored
+
+    def _fuzzy(self, key: str) -> Optional[TickerMatch]:
+        scored = self._rank(key)
+        if not scored:
+            return None
+        best_score, best_symbol = scored[0]
+        if best_score < self.fuzzy_threshold:
+            return None
+        runner_up = next((s for s, sym in scored[1:] if sym != best_symbol), 0.0)
+        if best_score - runner_up < 0.05:
+            return None
+        return self._match(best_symbol, "fuzzy", round(best_score, 3))
+
+
+_LEARNED_FIELDS = ["SYMBOL", "NAME OF COMPANY", "ALIASES"]
+
+
+def _read_listing(path: str, fieldnames: Optional[List[str]] = None):
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f, fieldnames=fieldnames):
+            yield {
+                (k or "").strip().upper(): v.strip()
+                for k, v in row.items()
+                if isinstance(v, str)
+            }
+
+
+def load_ticker_index(
+    path: str, learned_path: Optional[str] = None, fuzzy_threshold: float = 0.8, min_prefix: int = 4
+) -> TickerIndex:
+    """Build an index from an NSE ``EQUITY_L.csv``-style listing.
+
+    Requires ``SYMBOL`` and ``NAME OF COMPANY`` columns; an optional
+    ``ALIASES`` column holds ``|``-separated alternative names. Aliases
+    learned at runtime are read back from ``learned_path`` when it exists.
+    """
+    index = TickerIndex(fuzzy_threshold=fuzzy_threshold, learned_path=learned_path, min_prefix=min_prefix)
+    sources = []
+    if Path(path).exists():
+        sources.append((path, None))
+    else:
+        logger.warning("TickerIndex: listing %s not found, all lookups fall back to the LLM", path)
+    if learned_path and Path(learned_path).exists():
+        sources.append((learned_path, _LEARNED_FIELDS))
+    for source, fieldnames in sources:
+        for row in _read_listing(source, fieldnames):
+            if not row.get("SYMBOL") or not row.get("NAME OF COMPANY"):
+                continue
+            aliases = tuple(a for a in row.get("ALIASES", "").split("|") if a.strip())
+            index.add(row["SYMBOL"], row["NAME OF COMPANY"], aliases)
+    logger.info("TickerIndex: loaded %d symbols from %s", len(index), path)
+    return index
+
+
+@lru_cache(maxsize=1)
+def get_ticker_index() -> TickerIndex:
+    """Return the process-wide ticker index, loading it on first use."""
+    return load_ticker_index(
+        NSE_LISTING_PATH,
+        learned_path=NSE_LEARNED_ALIASES_PATH,
+        fuzzy_threshold=TICKER_FUZZY_THRESHOLD,
+        min_prefix=TICKER_MIN_PREFIX,
+    )
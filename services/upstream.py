@@ -0,0 +1,195 @@
+"""Global rate governor for Gemini and Tavily calls with priority classes.
+
+Every upstream call runs inside ``async with upstream_slot(name)``. Each
+upstream has a token bucket (requests per second plus burst) and a
+concurrency cap; callers that cannot be admitted wait in a priority queue,
+so interactive requests are served ahead of queued batch work. The
+priority comes from a context variable set by the endpoint (or job worker)
+and is inherited by the tasks it spawns.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from config import (
+    GEMINI_MAX_CONCURRENCY,
+    GEMINI_RATE_LIMIT,
+    GEMINI_RATE_BURST,
+    TAVILY_MAX_CONCURRENCY,
+    TAVILY_RATE_LIMIT,
+    TAVILY_RATE_BURST,
+)
+from services.telemetry import get_telemetry
+
+# Priority classes; lower is served first
+INTERACTIVE = 0
+DEFAULT = 1
+BATCH = 2
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", DEFAULT: "default", BATCH: "batch"}
+
+_priority: ContextVar[int] = ContextVar("upstream_priority", default=DEFAULT)
+
+
+def set_priority(priority: int) -> None:
+    """Set the priority class for upstream calls made from the current context."""
+    _priority.set(priority)
+
+
+@contextmanager
+def upstream_priority(priority: int):
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class UpstreamGovernor:
+    """Token bucket + concurrency cap with a priority wait queue for one upstream."""
+
+    def __init__(self, name: str, rate: float, burst: int, max_concurrency: int, samples: int = 1024):
+        self.name = name
+        self.rate = rate  # tokens per second; 0 disables rate limiting
+        self.burst = max(1, burst)
+        self.max_concurrency = max_concurrency
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._waits: Dict[int, Deque[float]] = {p: deque(maxlen=samples) for p in _PRIORITY_NAMES}
+        self._counters: Dict[int, Dict[str, float]] = {
+            p: {"calls": 0, "queued": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0} for p in _PRIORITY_NAMES
+        }
+
+    async def acquire(self, priority: int) -> None:
+        start = time.monotonic()
+        self._refill()
+        if not self._waiters and self._can_admit():
+            self._admit()
+            self._record(priority, 0.0, queued=False)
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # Admitted just before the cancellation landed: give the slot back
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+        self._record(priority, time.monotonic() - start, queued=True)
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        by_priority = {}
+        for p, counters in self._counters.items():
+            samples = sorted(self._waits[p])
+            by_priority[_PRIORITY_NAMES[p]] = {
+                **counters,
+                "wait_seconds_p50": samples[len(samples) // 2] if samples else 0.0,
+                "wait_seconds_p95": samples[int(len(samples) * 0.95)] if samples else 0.0,
+            }
+        return {
+            "in_flight": self._in_flight,
+            "queued": sum(1 for _, _, fut in self._waiters if not fut.done()),
+            "tokens": round(self._tokens, 2) if self.rate else None,
+            "rate": self.rate,
+            "burst": self.burst,
+            "max_concurrency": self.max_concurrency,
+            "priorities": by_priority,
+        }
+
+    def _record(self, priority: int, waited: float, queued: bool) -> None:
+        counters = self._counters[priority]
+        counters["calls"] += 1
+        counters["queued"] += queued
+        counters["wait_seconds_total"] += waited
+        counters["wait_seconds_max"] = max(counters["wait_seconds_max"], waited)
+        self._waits[priority].append(waited)
+
+    def _refill(self) -> None:
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _can_admit(self) -> bool:
+        return self._in_flight < self.max_concurrency and (not self.rate or self._tokens >= 1)
+
+    def _admit(self) -> None:
+        self._in_flight += 1
+        if self.rate:
+            self._tokens -= 1
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._waiters:
+            _, _, fut = self._waiters[0]
+            if fut.done():  # cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+            if self._in_flight >= self.max_concurrency:
+                return
+            if self.rate and self._tokens < 1:
+                if self._timer is None:
+                    delay = (1 - self._tokens) / self.rate
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self._admit()
+            fut.set_result(None)
+
+
+_governors = {
+    "gemini": UpstreamGovernor("gemini", GEMINI_RATE_LIMIT, GEMINI_RATE_BURST, GEMINI_MAX_CONCURRENCY),
+    "tavily": UpstreamGovernor("tavily", TAVILY_RATE_LIMIT, TAVILY_RATE_BURST, TAVILY_MAX_CONCURRENCY),
+}
+
+
+def get_governor(name: str) -> UpstreamGovernor:
+    return _governors[name]
+
+
+@asynccontextmanager
+async def upstream_slot(name: str, priority: Optional[int] = None):
+    """Hold an admission slot for one call to the ``name`` upstream.
+
+    Use as ``async with upstream_slot("tavily"): ...`` around each call.
+    The call's duration and outcome are recorded in the telemetry.
+    """
+    governor = _governors[name]
+    telemetry = get_telemetry()
+    await governor.acquire(_priority.get() if priority is None else priority)
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    except BaseException:
+        outcome = "cancelled"
+        raise
+    finally:
+        governor.release()
+        if telemetry.enabled:
+            telemetry.record_upstream(name, time.perf_counter() - start, outcome)
+
+
+def governor_stats() -> Dict[str, Any]:
+    return {name: governor.stats() for name, governor in _governors.items()}
@@ -0,0 +1,58 @@
+"""Offline test setup: fake Gemini/Tavily, no rate limits, throwaway directories.
+
+The environment is set before ``config`` is first imported, and the fakes
+from ``benchmarks/fakes.py`` are installed through ``config.use_clients``,
+so no test reaches a real upstream.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+os.environ["JOBS_DIR"] = tempfile.mkdtemp(prefix="kys-test-jobs-")
+os.environ["ANALYSIS_CACHE_BACKEND"] = "memory"
+os.environ["NSE_LEARNED_ALIASES_PATH"] = ""
+os.environ["GEMINI_RATE_LIMIT"] = "0"
+os.environ["TAVILY_RATE_LIMIT"] = "0"
+os.environ["WARMUP_ON_STARTUP"] = "0"
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from benchmarks.fakes import FakeProfile, install_fakes  # noqa: E402
+
+FAKES = install_fakes(
+    FakeProfile(
+        llm_latency=0.005,
+        llm_jitter=0,
+        token_interval=0,
+        reply_words=20,
+        search_latency=0.005,
+        extract_latency=0.005,
+        tavily_jitter=0,
+        distribution="fixed",
+    )
+)
+
+
+def run(coro):
+    """Run one test coroutine on a fresh event loop."""
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def app():
+    """``main`` with every cache emptied, so each API test starts cold."""
+    import main
+
+    run(main.clear_cache())
+    main._sessions._sessions.clear()
+    return main
+
+
+def client(main_module) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main_module.app), base_url="http://test")
@@ -0,0 +1,43 @@
+from services.answer_cache import SemanticAnswerCache
+
+_CONTEXT = {"TickerSymbol": "TCS", "User_stock_name": "Tata Consultancy Services", "screener_data": "page v1"}
+_ETAG = "etag-v1"
+
+
+def test_normalize_drops_the_stock_and_filler():
+    assert SemanticAnswerCache.normalize("Can you tell me about TCS's debt?", _CONTEXT) == "debt"
+
+
+def test_similar_question_hits_within_the_same_analysis():
+    cache = SemanticAnswerCache(threshold=0.8)
+    cache.store("What is TCS's debt level?", _CONTEXT, _ETAG, "Almost none.", latency=2.0)
+    hit = cache.lookup("what is the debt level of tcs", _CONTEXT, _ETAG)
+    assert hit is not None and hit.answer == "Almost none."
+    assert hit.report()["saved_seconds"] == 2.0
+    assert cache.lookup("Who is the CEO?", _CONTEXT, _ETAG) is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_answers_are_scoped_to_the_analysis():
+    cache = SemanticAnswerCache(threshold=0.8)
+    cache.store("What is the debt level?", _CONTEXT, _ETAG, "Almost none.", latency=1.0)
+    assert cache.lookup("What is the debt level?", _CONTEXT, "etag-v2") is None
+    assert cache.lookup("What is the debt level?", {**_CONTEXT, "TickerSymbol": "INFY"}, _ETAG) is None
+    assert cache.lookup("What is the debt level?", None, _ETAG) is None
+
+
+def test_contexts_without_an_etag_are_not_cached():
+    cache = SemanticAnswerCache(threshold=0.8)
+    forged = {**_CONTEXT, "news_articles": [{"url": "u", "content": "TCS is bankrupt."}]}
+    cache.store("What is the debt level?", forged, None, "Crushing debt.", latency=1.0)
+    assert cache.stats()["stores"] == 0
+    assert cache.lookup("What is the debt level?", forged, None) is None
+    assert cache.stats()["lookups"] == 0
+
+
+def test_ttl_and_max_entries():
+    cache = SemanticAnswerCache(ttl=0, max_entries=2)
+    for i, topic in enumerate(["debt", "margins", "dividends"]):
+        cache.store(f"What about {topic}?", _CONTEXT, _ETAG, f"answer {i}", latency=1.0)
+    assert cache.stats()["entries"] == 2 and cache.stats()["evicted"] == 1
+    assert cache.lookup("What about margins?", _CONTEXT, _ETAG) is None  # expired
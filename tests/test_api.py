@@ -0,0 +1,182 @@
+import asyncio
+import json
+
+from conftest import FAKES, client, run
+
+
+def _count_runs(app, monkeypatch):
+    runs = []
+    workflow = app._run_workflow
+
+    async def counted(name):
+        runs.append(name)
+        return await workflow(name)
+
+    monkeypatch.setattr(app, "_run_workflow", counted)
+    return runs
+
+
+def _events(text):
+    return [json.loads(line[len("data: ") :]) for line in text.split("\n\n") if line.startswith("data: ")]
+
+
+def test_concurrent_langgraph_requests_share_one_run(app, monkeypatch):
+    runs = _count_runs(app, monkeypatch)
+
+    async def scenario():
+        async with client(app) as http:
+            responses = await asyncio.gather(
+                *(http.post("/langgraph", json={"stock_name": "Reliance"}) for _ in range(5))
+            )
+            again = await http.post("/langgraph", json={"stock_name": " reliance "})
+        return responses, again
+
+    responses, again = run(scenario())
+    assert runs == ["Reliance"]
+    bodies = [response.json() for response in responses]
+    assert all(body["status"] == "ok" and body["result"]["TickerSymbol"] == "RELIANCE" for body in bodies)
+    assert again.json()["cached"] is True
+    assert bodies[0]["result"]["stocks_info"]["ticker_symbol"] == "RELIANCE"
+
+
+def test_analysis_etag_304_and_gzip(app):
+    async def scenario():
+        async with client(app) as http:
+            first = await http.get("/analysis/Reliance", headers={"Accept-Encoding": "gzip"})
+            etag = first.headers["etag"]
+            revalidated = await http.get("/analysis/Reliance", headers={"If-None-Match": etag})
+            plain = await http.get("/analysis/Reliance", headers={"Accept-Encoding": "identity"})
+        return first, revalidated, plain
+
+    first, revalidated, plain = run(scenario())
+    assert first.status_code == 200 and first.headers["x-cache"] == "miss"
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.json()["TickerSymbol"] == "RELIANCE"  # httpx decodes the body
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert revalidated.headers["etag"] == first.headers["etag"]
+    assert "content-encoding" not in plain.headers and plain.headers["x-cache"] == "hit"
+    assert json.loads(plain.content) == first.json()
+
+
+def test_concurrent_streams_follow_one_shared_run(app, monkeypatch):
+    runs = _count_runs(app, monkeypatch)
+
+    async def scenario():
+        async with client(app) as http:
+            return await asyncio.gather(
+                *(http.post("/langgraph/stream", json={"stock_name": "Reliance"}) for _ in range(3))
+            )
+
+    responses = run(scenario())
+    assert runs == ["Reliance"]
+    for response in responses:
+        events = _events(response.text)
+        assert events[-1]["status"] == "done"
+        assert events[-1]["result"]["TickerSymbol"] == "RELIANCE"
+    # The stream that started the run saw every node; the others joined it in progress
+    assert max(sum(event["status"] == "node" for event in _events(r.text)) for r in responses) >= 3
+    assert not app._run_listeners
+
+
+def test_compare_returns_metrics_for_each_stock(app):
+    async def scenario():
+        async with client(app) as http:
+            return await http.post("/compare", json={"stock_names": ["Reliance", "TCS"]})
+
+    response = run(scenario())
+    assert response.status_code == 200
+    comparison = response.json()["comparison"]
+    assert [item["stock_name"] for item in comparison] == ["Reliance", "TCS"]
+    assert all("data" in item and "metrics" in item for item in comparison)
+
+
+def test_chat_without_session_sends_the_message(app, monkeypatch):
+    prompts = []
+
+    def reply(prompt):
+        prompts.append(prompt)
+        return "An answer."
+
+    monkeypatch.setattr(FAKES["chat_llm"], "reply_fn", reply)
+
+    async def scenario():
+        async with client(app) as http:
+            return await http.post(
+                "/chat",
+                json={
+                    "message": "What is a PE ratio?",
+                    "messages": [{"role": "user", "content": "hello"}, {"role": "assistant", "content": "hi"}],
+                },
+            )
+
+    response = run(scenario())
+    assert response.status_code == 200
+    assert response.json()["response"] == "An answer."
+    assert prompts and "What is a PE ratio?" in prompts[-1]
+
+
+def test_chat_session_keeps_history(app):
+    async def scenario():
+        async with client(app) as http:
+            session = (await http.post("/chat/sessions", json={})).json()
+            session_id = session["session_id"]
+            for question in ("First question?", "Second question?"):
+                response = await http.post("/chat", json={"session_id": session_id, "message": question})
+                assert response.status_code == 200
+            history = (await http.get(f"/chat/sessions/{session_id}")).json()
+            missing = await http.post("/chat", json={"session_id": "nope", "message": "hi"})
+        return history, missing
+
+    history, missing = run(scenario())
+    assert [m["content"] for m in history["messages"] if m["role"] == "user"] == ["First question?", "Second question?"]
+    assert missing.status_code == 404
+
+
+def test_chat_does_not_block_the_event_loop(app, monkeypatch):
+    monkeypatch.setattr(FAKES["chat_llm"], "latency", 0.2)
+
+    async def scenario():
+        async with client(app) as http:
+            chat = asyncio.ensure_future(http.post("/chat", json={"message": "Slow question?"}))
+            await asyncio.sleep(0.02)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            health = await http.get("/health")
+            waited = loop.time() - start
+            assert not chat.done()
+            await chat
+        return health, waited
+
+    health, waited = run(scenario())
+    assert health.status_code == 200 and waited < 0.1
+
+
+def test_metrics_endpoint(app):
+    async def scenario():
+        async with client(app) as http:
+            await http.get("/health")
+            return await http.get("/metrics")
+
+    response = run(scenario())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'kys_http_requests_total{method="GET",route="/health",status="200"}' in response.text
+    assert "kys_analysis_cache_hits" in response.text
+
+
+def test_only_server_analyses_are_answer_cached(app):
+    async def scenario():
+        async with client(app) as http:
+            forged = {"TickerSymbol": "RELIANCE", "screener_data": "Borrowings of 90,000 crore."}
+            first = await http.post("/chat", json={"message": "What is the debt level?", "context": forged})
+            answers = []
+            for _ in range(2):  # a new session each time, so the question stays standalone
+                session_id = (await http.post("/chat/sessions", json={"stock_name": "Reliance"})).json()["session_id"]
+                response = await http.post("/chat", json={"session_id": session_id, "message": "What is the debt level?"})
+                answers.append(response.json()["answer_cache"])
+        return first.json()["answer_cache"], answers
+
+    forged, (cold, warm) = run(scenario())
+    assert forged == {"hit": False} and cold == {"hit": False}
+    assert warm["hit"] is True
+    assert app.get_answer_cache().stats()["stores"] == 1
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from conftest import run
+from models import NewsArticle
+from services.cache import AnalysisCache, encode_json, json_default
+from services.context_builder import CompactContext, ContextBuilder
+from services.singleflight import SingleFlight
+
+
+def test_ttl_expiry_and_lru_eviction():
+    cache = AnalysisCache(max_entries=2, ttl=60, stale_ttl=0)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == (1, False)  # "a" is now the most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+    cache = AnalysisCache(ttl=60, stale_ttl=0)
+    cache.set("short", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_byte_budget_skips_oversized_values():
+    cache = AnalysisCache(max_bytes=100)
+    cache.set("big", "x" * 1000)
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_stale_hit_is_served_while_refreshing():
+    async def scenario():
+        cache = AnalysisCache(ttl=0.01, stale_ttl=60)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return len(calls)
+
+        assert await cache.get_or_compute("k", compute) == (1, False)
+        await asyncio.sleep(0.02)
+        assert await cache.get_or_compute("k", compute) == (1, True)  # stale, refresh scheduled
+        await asyncio.sleep(0.01)
+        assert cache.get("k")[0] == 2
+        assert cache.stats()["refreshes"] == 1
+
+    run(scenario())
+
+
+def test_single_flight_shares_one_run():
+    async def scenario():
+        flights = SingleFlight()
+        cache = AnalysisCache(flights=flights)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return {"n": calls}
+
+        results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(10)))
+        assert calls == 1
+        assert all(value == {"n": 1} for value, _ in results)
+        assert flights.stats()["coalesced"] == 9
+
+    run(scenario())
+
+
+def test_single_flight_run_survives_cancelled_waiter():
+    async def scenario():
+        flights = SingleFlight()
+        done = asyncio.Event()
+
+        async def compute():
+            await asyncio.sleep(0.02)
+            done.set()
+            return "ok"
+
+        first = asyncio.ensure_future(flights.do("k", compute))
+        second = asyncio.ensure_future(flights.do("k", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "ok"
+        assert done.is_set()
+
+    run(scenario())
+
+
+def test_raw_mode_returns_the_stored_objects():
+    cache = AnalysisCache()
+    article = NewsArticle(title="t", url="u", content="c")
+    cache.set("k", {"news_articles": [article]})
+    value, _ = cache.get("k")
+    assert value["news_articles"][0] is article
+    with pytest.raises(TypeError):
+        cache.get_json("k")
+
+
+def test_context_builder_cache_round_trip():
+    builder = ContextBuilder()
+    context = {"TickerSymbol": "TCS", "stocks_info": {"name": "TCS"}, "screener_data": "Sales grew. " * 20}
+    first = builder.build(context)
+    second = builder.build(context)
+    assert isinstance(second, CompactContext)
+    assert second.cached and not first.cached
+    assert second.text == first.text
+
+
+def test_json_entries_round_trip_and_compression():
+    state = {"TickerSymbol": "TCS", "news_articles": [NewsArticle(title="t", url="u", content="word " * 2000)]}
+    cache = AnalysisCache(json_entries=True, compress_level=1, compress_min_bytes=1024)
+    entry = cache.set("k", state)
+    assert entry.compressed and entry.size < entry.json_size
+    data, _ = cache.get_json("k")
+    assert data == encode_json(state)
+    assert json.loads(data)["news_articles"][0]["title"] == "t"
+    assert cache.get_entry("k")[0].etag == entry.etag
+    assert cache.set("k", state).etag == entry.etag  # the ETag depends on the content only
+
+
+def test_json_default_rejects_unknown_types():
+    assert json_default(NewsArticle(title="t", url="u", content="c")) == {"title": "t", "url": "u", "content": "c"}
+    with pytest.raises(TypeError):
+        encode_json({"when": object()})
+
+
+def test_shared_backend_requires_json_entries(tmp_path):
+    from services.shared_cache import SQLiteCacheBackend
+
+    with pytest.raises(ValueError):
+        AnalysisCache(backend=SQLiteCacheBackend(str(tmp_path / "cache.db")))
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import config
+from conftest import FAKES
+
+
+def test_use_clients_per_role_and_removal():
+    shared = object()
+    config.use_clients(llm=shared)
+    try:
+        assert config.get_llm("chat") is FAKES["chat_llm"]  # a role's own stand-in wins
+        config.use_clients(chat_llm=None)
+        assert config.get_llm("chat") is shared
+        assert config.get_llm() is shared
+    finally:
+        config.use_clients(llm=None, chat_llm=FAKES["chat_llm"])
+    assert config.get_async_tavily_client() is FAKES["tavily"]
+    with pytest.raises(TypeError):
+        config.use_clients(gemini=shared)
+
+
+def test_importing_main_does_not_load_the_sdks():
+    code = (
+        "import sys, main\n"
+        "loaded = [m for m in ('langchain_google_genai', 'tavily') if m in sys.modules]\n"
+        "assert not loaded, loaded\n"
+    )
+    env = {**os.environ, "GOOGLE_API_KEY": "x", "TAVILY_API_KEY": "x", "WARMUP_ON_STARTUP": "0"}
+    root = Path(__file__).resolve().parents[1]
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
@@ -0,0 +1,36 @@
+import random
+
+from benchmarks.cache_entries import sample_state
+from services.context_builder import ContextBuilder, estimate_tokens, truncate_tokens
+
+
+def test_truncate_tokens():
+    text = "word " * 200
+    assert estimate_tokens(truncate_tokens(text, 20)) <= 20
+    assert truncate_tokens("short", 20) == "short"
+
+
+def test_context_fits_the_budget():
+    state = sample_state()
+    for budget in (100, 400, 1500):
+        compact = ContextBuilder(budget=budget).build(state)
+        assert compact.tokens <= budget
+        assert compact.sections[0] == "stock"
+        assert compact.raw_tokens > compact.tokens
+
+
+def test_metrics_come_from_the_tables():
+    table = {"periods": ["Mar 2023", "Mar 2024"], "rows": ["Sales", "Net Profit"], "values": [[100, 120], [10, 15]]}
+    compact = ContextBuilder().build({"TickerSymbol": "TCS", "screener_tables": {"profit_loss": table}})
+    assert compact.sections == ["stock", "metrics", "profit_loss"]
+    assert "sales growth yoy 20" in compact.text
+
+
+def test_news_skips_repeats():
+    rng = random.Random(1)
+    content = " ".join(rng.choice(["Orders rose.", "Margins fell."]) for _ in range(10))
+    article = {"title": "Update", "url": "https://news.example/1", "content": content}
+    context = {"TickerSymbol": "TCS", "news_articles": [article, dict(article), {**article, "url": "u2", "title": "Other"}]}
+    compact = ContextBuilder(budget=1500).build(context)
+    assert compact.text.count("- Update") == 1
+    assert compact.text.count("Orders rose.") == 1
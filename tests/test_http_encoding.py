@@ -0,0 +1,43 @@
+import gzip
+
+from services.cache import AnalysisCache
+from services.http_encoding import ResponseEncoder, etag_matches, negotiate
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "other"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_negotiate():
+    assert negotiate("gzip, br", ("br", "gzip")) == "br"
+    assert negotiate("br;q=0.5, gzip", ("br", "gzip")) == "gzip"
+    assert negotiate("identity", ("gzip",)) is None
+    assert negotiate("*", ("gzip",)) == "gzip"
+    assert negotiate("gzip;q=0", ("gzip",)) is None
+    assert negotiate(None, ("gzip",)) is None
+
+
+def test_encoder_sends_stored_gzip_and_reuses_bodies():
+    state = {"TickerSymbol": "TCS", "screener_data": "Sales grew. " * 500}
+    stored = AnalysisCache(json_entries=True, compress_level=1, compress_min_bytes=0).set("k", state)
+    plain = AnalysisCache(json_entries=True, compress_level=0).set("k", state)
+    encoder = ResponseEncoder(min_bytes=1024)
+    encoder.encodings = ("gzip",)  # with or without brotli installed
+
+    body, encoding = encoder.encode(stored, "gzip")
+    assert encoding == "gzip" and body is stored.payload
+    body, encoding = encoder.encode(plain, "gzip")
+    assert encoding == "gzip" and gzip.decompress(body) == plain.json()
+    assert encoder.encode(plain, "gzip")[0] is body
+    assert encoder.encode(plain, None) == (plain.json(), None)
+    stats = encoder.stats()
+    assert (stats["stored_gzip"], stats["encoded"], stats["reused"], stats["identity"]) == (1, 1, 1, 1)
+
+
+def test_small_bodies_are_not_compressed():
+    entry = AnalysisCache(json_entries=True).set("k", {"a": 1})
+    assert ResponseEncoder(min_bytes=1024).encode(entry, "gzip") == (entry.json(), None)
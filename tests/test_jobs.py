@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+import time
+
+from conftest import run
+from services.jobs import JobManager
+
+
+async def _analyze(name):
+    await asyncio.sleep(0.005)
+    if name == "BAD":
+        raise ValueError("unknown stock")
+    return {"TickerSymbol": name}, False
+
+
+async def _wait_finished(manager, job_id):
+    while manager.get(job_id).finished_at is None:
+        await asyncio.sleep(0.005)
+
+
+def test_concurrent_streams_each_get_every_result(tmp_path):
+    names = [f"S{i}" for i in range(20)] + ["BAD"]
+
+    async def scenario():
+        manager = JobManager(_analyze, str(tmp_path), workers=4)
+        await manager.start()
+        try:
+            job = await manager.submit(names)
+
+            async def consume():
+                return "".join([chunk async for chunk in manager.stream_results(job.job_id)])
+
+            outputs = await asyncio.wait_for(asyncio.gather(*(consume() for _ in range(5))), 5)
+        finally:
+            await manager.stop()
+        return job, outputs
+
+    job, outputs = run(scenario())
+    for output in outputs:
+        records = [json.loads(line) for line in output.splitlines()]
+        assert sorted(r["index"] for r in records) == list(range(len(names)))
+    assert job.summary()["status"] == "completed"
+    assert job.summary()["failed"] == 1
+
+
+def test_resume_from_checkpoint(tmp_path):
+    calls = []
+
+    async def counting(name):
+        calls.append(name)
+        return await _analyze(name)
+
+    def first_run():
+        # What a process that crashed after one stock leaves behind
+        job_dir = tmp_path / "job1"
+        JobManager._write_meta(str(job_dir), {"job_id": "job1", "stock_names": ["A", "B", "C"], "created_at": 0})
+        (job_dir / "results.jsonl").write_text(
+            '{"index": 0, "stock_name": "A", "status": "ok", "cached": false, "data": {}}\n{"index": 1, "stock_na',
+            encoding="utf-8",
+        )
+        return "job1"
+
+    async def second_run(job_id):
+        manager = JobManager(counting, str(tmp_path), workers=2)
+        await manager.start()
+        try:
+            await asyncio.wait_for(_wait_finished(manager, job_id), 5)
+        finally:
+            await manager.stop()
+        return await manager.results(job_id)
+
+    job_id = first_run()
+    records = run(second_run(job_id))
+    assert sorted(calls) == ["B", "C"]
+    assert sorted(r["index"] for r in records) == [0, 1, 2]
+
+
+def test_finished_jobs_expire(tmp_path):
+    async def scenario():
+        manager = JobManager(_analyze, str(tmp_path), workers=1, retention=60)
+        await manager.start()
+        try:
+            job = await manager.submit(["A"])
+            await asyncio.wait_for(_wait_finished(manager, job.job_id), 5)
+        finally:
+            await manager.stop()
+        manager._expire()
+        assert manager.get(job.job_id) is not None
+        job.finished_at = time.time() - 120
+        manager._expire()
+        assert manager.get(job.job_id) is None
+        assert not os.path.exists(manager._path(job.job_id))
+
+    run(scenario())
+
+
+def test_workers_sharing_a_directory_run_each_stock_once(tmp_path):
+    calls = []
+
+    async def counting(name):
+        calls.append(name)
+        return await _analyze(name)
+
+    async def scenario():
+        managers = [JobManager(counting, str(tmp_path), workers=2, scan_interval=0.02, poll_interval=0.01) for _ in range(3)]
+        for manager in managers:
+            await manager.start()
+        try:
+            job = await managers[0].submit([f"S{i}" for i in range(10)])
+            # Another worker answers for the job and follows its results
+            assert (await managers[1].load(job.job_id)).summary()["total"] == 10
+
+            async def consume(manager):
+                await manager.load(job.job_id)
+                return "".join([chunk async for chunk in manager.stream_results(job.job_id)])
+
+            streamed = await asyncio.wait_for(asyncio.gather(*(consume(m) for m in managers)), 5)
+            await asyncio.sleep(0.1)  # give the other workers a chance to (wrongly) rerun it
+            summaries = [(await m.load(job.job_id)).summary() for m in managers]
+        finally:
+            for manager in managers:
+                await manager.stop()
+        return streamed, summaries, await managers[0].results(job.job_id)
+
+    streamed, summaries, records = run(scenario())
+    assert sorted(calls) == sorted(f"S{i}" for i in range(10))
+    assert sorted(r["index"] for r in records) == list(range(10))
+    for output in streamed:
+        assert len(output.splitlines()) == 10
+    assert {s["status"] for s in summaries} == {"completed"}
+    assert {s["completed"] for s in summaries} == {10}
+
+
+def test_another_worker_takes_over_a_stopped_owner(tmp_path):
+    async def slow(name):
+        await asyncio.sleep(0.02)
+        return {"TickerSymbol": name}, False
+
+    async def scenario():
+        owner = JobManager(slow, str(tmp_path), workers=1)
+        await owner.start()
+        job = await owner.submit([f"S{i}" for i in range(6)])
+        while len(job.done) < 2:
+            await asyncio.sleep(0.005)
+        await owner.stop()  # releases the lease
+        heir = JobManager(slow, str(tmp_path), workers=2)
+        await heir.start()
+        try:
+            await asyncio.wait_for(_wait_finished(heir, job.job_id), 5)
+        finally:
+            await heir.stop()
+        return await heir.results(job.job_id)
+
+    records = run(scenario())
+    assert sorted(r["index"] for r in records) == list(range(6))
+
+
+def test_results_are_read_in_bounded_chunks(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_bytes(b'{"index": 0}\n{"index": 1, "long": "' + b"x" * 50 + b'"}\n{"index": 2')
+    first = JobManager._read_lines(str(path), 0, limit=16)
+    assert first == b'{"index": 0}\n'
+    second = JobManager._read_lines(str(path), len(first), limit=16)  # finishes the longer line
+    assert second.startswith(b'{"index": 1') and second.endswith(b"\n")
+    assert JobManager._read_lines(str(path), len(first) + len(second), limit=16) == b""
+
+    JobManager._truncate_partial_line(str(path))
+    assert path.read_bytes() == first + second
@@ -0,0 +1,41 @@
+import json
+import time
+
+import pytest
+
+from benchmarks.fakes import FakeAsyncTavilyClient, FakeChatModel, FakeUpstreamError, stock_info_reply
+from benchmarks.load_test import _percentiles, compare_runs
+from conftest import run
+
+
+def test_fake_chat_model_latency_and_streaming():
+    model = FakeChatModel(reply="one two three", latency=0.02, jitter=0, distribution="fixed")
+    start = time.perf_counter()
+    assert model.invoke("hi").content == "one two three"
+    assert time.perf_counter() - start >= 0.02
+
+    async def stream():
+        return [chunk.content async for chunk in model.astream("hi")]
+
+    assert "".join(run(stream())) == "one two three"
+    assert model.tokens_streamed == 3
+    assert json.loads(stock_info_reply("TCS"))["ticker_symbol"] == "TCS"
+
+
+def test_fake_tavily_errors():
+    tavily = FakeAsyncTavilyClient(search_latency=0, extract_latency=0, error_rate=1.0)
+    with pytest.raises(FakeUpstreamError):
+        run(tavily.search("reliance"))
+    page = run(FakeAsyncTavilyClient(0, 0).extract(["https://www.screener.in/company/TCS/"]))
+    assert page["results"][0]["raw_content"].startswith("# Reliance")
+
+
+def test_compare_runs_flags_regressions():
+    def result(rps, p95):
+        return {"results": [{"scenario": "langgraph", "concurrency": 8, "rps": rps, "latency_ms": {"p95": p95}}]}
+
+    assert compare_runs(result(100, 50), result(100, 50), tolerance=0.1) == []
+    regressions = compare_runs(result(80, 70), result(100, 50), tolerance=0.1)
+    assert [r.split(":")[1].split()[0] for r in regressions] == ["rps", "p95"]
+    assert _percentiles([0.001 * i for i in range(1, 101)])["p50"] == pytest.approx(50, abs=1)
+    assert _percentiles([])["p95"] is None
@@ -0,0 +1,83 @@
+import pytest
+
+from models import ScreenerTable
+from services.metrics import METRICS, compute_metrics
+
+
+def _stock(sales, net_profit, opm=None, borrowings=None, equity=None):
+    periods = [f"Mar {2019 + i}" for i in range(len(sales))] + ["TTM"]
+    pl_rows, pl_values = ["Sales", "Net Profit"], [sales + [None], net_profit + [None]]
+    if opm is not None:
+        pl_rows.append("OPM %")
+        pl_values.append(opm + [None])
+    tables = {"profit_loss": ScreenerTable(periods=periods, rows=pl_rows, values=pl_values)}
+    if borrowings is not None:
+        tables["balance_sheet"] = {
+            "periods": periods[:-1],
+            "rows": ["Equity Capital", "Reserves", "Borrowings"],
+            "values": [[equity] * len(sales), [0] * len(sales), borrowings],
+        }
+    return tables
+
+
+def test_growth_margins_and_leverage():
+    result = compute_metrics(
+        {
+            "A": _stock([100, 110, 121, 133.1], [10, 11, 12.1, 13.31], opm=[10, 11, 12, 13], borrowings=[50] * 4, equity=100),
+            "B": _stock([100, 90], [-5, 4]),
+        }
+    )
+    a, b = result["A"], result["B"]
+    assert set(a) == set(METRICS)
+    assert a["sales_growth_yoy"] == pytest.approx(10.0)
+    assert a["sales_cagr_3y"] == pytest.approx(10.0)
+    assert a["sales_cagr_5y"] is None  # not enough years
+    assert a["operating_margin"] == 13.0
+    assert a["operating_margin_trend"] == pytest.approx(1.0)
+    assert a["net_margin"] == pytest.approx(10.0)
+    assert a["debt_to_equity"] == 0.5
+    assert b["sales_growth_yoy"] == pytest.approx(-10.0)
+    assert b["profit_growth_yoy"] is None  # growth from a loss is not meaningful
+    assert b["roe"] is None
+
+
+def test_empty_and_missing_tables():
+    assert compute_metrics({}) == {}
+    assert set(compute_metrics({"X": None})["X"].values()) == {None}
+
+
+def test_half_year_balance_sheet_column_is_skipped():
+    # Profit 30 on an equity of 100 at Mar 2024; the Sep 2024 half-year column must not stand in for it
+    stock = {
+        "profit_loss": {
+            "periods": ["Mar 2022", "Mar 2023", "Mar 2024", "TTM"],
+            "rows": ["Sales", "Net Profit"],
+            "values": [[200, 250, 300, 320], [20, 25, 30, 32]],
+        },
+        "balance_sheet": {
+            "periods": ["Mar 2022", "Mar 2023", "Mar 2024", "Sep 2024"],
+            "rows": ["Equity Capital", "Reserves", "Borrowings"],
+            "values": [[10, 10, 10, 10], [90, 90, 90, 990], [0, 0, 50, 0]],
+        },
+    }
+    result = compute_metrics({"A": stock})["A"]
+    assert result["roe"] == pytest.approx(30.0)
+    assert result["debt_to_equity"] == pytest.approx(0.5)
+    assert result["sales_growth_yoy"] == pytest.approx(20.0)
+
+
+def test_sections_are_aligned_by_period_label():
+    # The Balance Sheet lacks the latest year: its Mar 2023 value stays in the Mar 2023 slot
+    stock = {
+        "profit_loss": {
+            "periods": ["Mar 2023", "Mar 2024"],
+            "rows": ["Sales", "Net Profit"],
+            "values": [[100, 100], [10, 20]],
+        },
+        "balance_sheet": {
+            "periods": ["Mar 2022", "Mar 2023"],
+            "rows": ["Equity Capital", "Reserves"],
+            "values": [[100, 100], [0, 0]],
+        },
+    }
+    assert compute_metrics({"A": stock})["A"]["roe"] is None
@@ -0,0 +1,48 @@
+import json
+import time
+
+from benchmarks.fakes import stock_info_reply
+from conftest import run
+from models import StocksInfo
+from services.node_cache import NodeResultCache
+
+
+class _State:
+    def __init__(self, name="TCS", ticker="TCS"):
+        self.User_stock_name = name
+        self.TickerSymbol = ticker
+
+
+def test_node_cache_keeps_models():
+    cache = NodeResultCache({"StockInfoNode": 60})
+    info = StocksInfo(**json.loads(stock_info_reply("TCS")))
+    cache.store("StockInfoNode", _State(), {"stocks_info": info})
+    assert cache.lookup("StockInfoNode", _State())["stocks_info"] is info
+    cache.store("StockInfoNode", _State(), {"stocks_info": None})  # empty results are not cached
+    assert cache.lookup("StockInfoNode", _State())["stocks_info"] is info
+
+
+def test_node_ttls_and_keys():
+    cache = NodeResultCache({"StockNewsNode": 0.01, "ScreenerExtractNode": 60})
+    cache.store("StockNewsNode", _State(name="Tata Consultancy"), {"news_articles": ["a"]})
+    cache.store("ScreenerExtractNode", _State(name="Tata Consultancy"), {"screener_data": "page"})
+    # News is keyed by the stock name, Screener data by the resolved ticker
+    assert cache.lookup("StockNewsNode", _State(name=" tata consultancy ")) is not None
+    assert cache.lookup("ScreenerExtractNode", _State(name="TCS Ltd", ticker="tcs")) == {"screener_data": "page"}
+    assert cache.lookup("StockInfoNode", _State()) is None  # no TTL: never cached
+    time.sleep(0.02)
+    assert cache.lookup("StockNewsNode", _State(name="Tata Consultancy")) is None
+
+
+def test_wrap_skips_the_node_on_a_hit():
+    cache = NodeResultCache({"StockInfoNode": 60})
+    calls = []
+
+    async def node(state):
+        calls.append(state.TickerSymbol)
+        return {"stocks_info": "info"}
+
+    wrapped = cache.wrap("StockInfoNode", node)
+    assert run(wrapped(_State())) == run(wrapped(_State())) == {"stocks_info": "info"}
+    assert calls == ["TCS"]
+    assert cache.wrap("ScreenerURLNode", node) is node
@@ -0,0 +1,44 @@
+import math
+import random
+
+from benchmarks.screener_cleaner import fuzz_page, legacy_clean, screener_page
+from nodes.screener_extract_node import _clean_screener_content, _screener_update
+from services.screener_tables import parse_screener_tables
+
+
+def test_cleaner_matches_the_legacy_regexes():
+    rng = random.Random(7)
+    pages = [screener_page(rng)] + [fuzz_page(rng) for _ in range(50)]
+    for page in pages:
+        assert _clean_screener_content(page) == legacy_clean(page)
+
+
+def test_parse_screener_tables():
+    markdown = "\n".join(
+        [
+            "## Profit & Loss",
+            "| | Mar 2023 | Mar 2024 | TTM |",
+            "|---|---|---|---|",
+            "| [Sales +](/x) | 1,000 | 1,200 | 1,250 |",
+            "| OPM % | 20% | 22% | |",
+            "| Raw PDF | | | |",
+            "[]## Balance Sheet",
+            "| | Mar 2024 |",
+            "|---|---|",
+            "| Borrowings | 300 |",
+        ]
+    )
+    tables = parse_screener_tables(markdown)
+    assert set(tables) == {"profit_loss", "balance_sheet"}
+    pl = tables["profit_loss"]
+    assert pl.periods == ["Mar 2023", "Mar 2024", "TTM"]
+    assert pl.rows == ["Sales", "OPM %"]
+    assert pl.values[0].tolist() == [1000.0, 1200.0, 1250.0]
+    assert math.isnan(pl.values[1, 2])
+    assert tables["balance_sheet"].values[0, 0] == 300.0
+
+
+def test_screener_update_parses_a_full_page():
+    update = _screener_update(screener_page(random.Random(3)))
+    assert update["screener_data"]
+    assert {"profit_loss", "balance_sheet", "cash_flow"} <= set(update["screener_tables"])
@@ -0,0 +1,31 @@
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from services.sessions import SessionStore
+
+
+def test_sessions_keep_the_last_messages():
+    store = SessionStore(max_messages=4)
+    session = store.create("TCS")
+    for i in range(3):
+        session.add_turn(f"q{i}", f"a{i}")
+    history = store.get(session.session_id).history()
+    assert [m.content for m in history] == ["q1", "a1", "q2", "a2"]
+    assert isinstance(history[0], HumanMessage) and isinstance(history[1], AIMessage)
+    assert session.messages_as_dicts()[0] == {"role": "user", "content": "q1"}
+    assert store.delete(session.session_id) and store.get(session.session_id) is None
+
+
+def test_idle_sessions_expire_and_the_oldest_is_evicted():
+    store = SessionStore(idle_ttl=0.01, max_sessions=2)
+    idle = store.create()
+    time.sleep(0.02)
+    assert store.get(idle.session_id) is None
+    assert store.stats()["expired"] == 1
+
+    store = SessionStore(max_sessions=2)
+    first, second, third = store.create(), store.create(), store.create()
+    assert store.get(first.session_id) is None
+    assert store.get(second.session_id) and store.get(third.session_id)
+    assert store.stats()["evicted"] == 1
@@ -0,0 +1,72 @@
+import asyncio
+
+from conftest import run
+from services.cache import AnalysisCache
+from services.shared_cache import SQLiteCacheBackend, make_cache_backend
+
+
+def test_two_caches_on_one_file_compute_once(tmp_path):
+    path = str(tmp_path / "cache.db")
+    loaded = []
+
+    async def scenario():
+        # Either cache may win the lease; the other loads the winner's entry
+        first, second = (
+            AnalysisCache(
+                json_entries=True, backend=SQLiteCacheBackend(path, poll_interval=0.01), on_shared_load=loaded.append
+            )
+            for _ in range(2)
+        )
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"TickerSymbol": "TCS", "calls": calls}
+
+        results = await asyncio.gather(first.get_or_compute("tcs", compute), second.get_or_compute("tcs", compute))
+        assert calls == 1
+        assert [value for value, _ in results] == [{"TickerSymbol": "TCS", "calls": 1}] * 2
+        assert second.backend.stats()["lock_waits"] + first.backend.stats()["lock_waits"] == 1
+
+    run(scenario())
+    assert len(loaded) == 1 and loaded[0].etag
+
+
+def test_fetch_falls_back_to_the_shared_backend(tmp_path):
+    path = str(tmp_path / "cache.db")
+
+    async def scenario():
+        writer = AnalysisCache(json_entries=True, backend=SQLiteCacheBackend(path))
+        reader = AnalysisCache(json_entries=True, backend=SQLiteCacheBackend(path))
+        await writer.store("k", {"a": 1})
+        assert reader.get("k") is None  # sync lookups stay local
+        assert await reader.fetch("k") == ({"a": 1}, False)
+        assert reader.get("k") == ({"a": 1}, False)
+
+    run(scenario())
+
+
+def test_lease_is_exclusive(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), poll_interval=0.01)
+    order = []
+
+    async def hold(name):
+        async with backend.lock("k") as waited:
+            order.append((name, "in", waited))
+            await asyncio.sleep(0.03)
+            order.append((name, "out", waited))
+
+    async def scenario():
+        await asyncio.gather(hold("a"), hold("b"))
+
+    run(scenario())
+    assert [step for _, step, _ in order] == ["in", "out", "in", "out"]
+    assert [waited for _, step, waited in order if step == "in"] == [False, True]
+    assert backend.stats()["locks_held"] == 0
+
+
+def test_make_cache_backend(tmp_path):
+    assert make_cache_backend("memory", "unused") is None
+    assert isinstance(make_cache_backend("sqlite", str(tmp_path / "cache.db")), SQLiteCacheBackend)
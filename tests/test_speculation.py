@@ -0,0 +1,43 @@
+import asyncio
+
+from conftest import run
+from services.speculation import Speculator
+
+
+def test_confirmed_guess_reuses_the_run():
+    async def scenario():
+        speculator = Speculator()
+        calls = []
+
+        async def fetch(ticker):
+            calls.append(ticker)
+            await asyncio.sleep(0.01)
+            return ticker
+
+        speculator.start("tcs", "tcs", lambda: fetch("TCS"))
+        assert await speculator.claim("tcs", "TCS", lambda: fetch("TCS")) == "TCS"
+        assert calls == ["TCS"]
+        assert speculator.stats() == {"started": 1, "confirmed": 1, "cancelled": 0, "pending": 0}
+
+    run(scenario())
+
+
+def test_wrong_guess_is_cancelled_and_rerun():
+    async def scenario():
+        speculator = Speculator()
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+
+        async def fetch():
+            return "TATAMOTORS"
+
+        speculator.start("tata", "TATASTEEL", slow)
+        await started.wait()
+        assert await speculator.claim("tata", "TATAMOTORS", fetch) == "TATAMOTORS"
+        assert speculator.stats()["cancelled"] == 1
+        assert await speculator.claim("unknown", "X", fetch) == "TATAMOTORS"  # nothing started
+
+    run(scenario())
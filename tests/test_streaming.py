@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from conftest import run
+from services.streaming import coalesce, replay, sse_chunk, sse_event
+
+
+async def _tokens(words, delay=0.0, error=None):
+    for word in words:
+        await asyncio.sleep(delay)
+        yield word
+    if error is not None:
+        raise error
+
+
+async def _collect(stream):
+    return [frame async for frame in stream]
+
+
+def test_sse_chunk_matches_sse_event():
+    assert sse_chunk('say "hi"\n') == sse_event({"status": "chunk", "content": 'say "hi"\n'})
+
+
+def test_coalesce_merges_chunks_into_fewer_frames():
+    words = [f"w{i} " for i in range(50)]
+    frames = run(_collect(coalesce(_tokens(words, delay=0.001), flush_interval=0.02, flush_bytes=10_000)))
+    assert "".join(frames) == "".join(words)
+    assert 1 < len(frames) < len(words)
+
+
+def test_coalesce_flushes_at_flush_bytes():
+    words = ["abcd"] * 20
+    frames = run(_collect(coalesce(_tokens(words), flush_interval=10, flush_bytes=16)))
+    assert "".join(frames) == "abcd" * 20
+    assert all(len(frame) <= 16 + 4 for frame in frames)
+
+
+def test_coalesce_reraises_after_the_text_so_far():
+    async def scenario():
+        frames = []
+        with pytest.raises(RuntimeError):
+            async for frame in coalesce(_tokens(["a", "b"], error=RuntimeError("boom")), flush_interval=0.01):
+                frames.append(frame)
+        return frames
+
+    assert "".join(run(scenario())) == "ab"
+
+
+def test_coalesce_backpressure_bounds_read_ahead():
+    async def scenario():
+        produced = 0
+
+        async def source():
+            nonlocal produced
+            for i in range(100):
+                produced += 1
+                yield f"{i} "
+
+        stream = coalesce(source(), flush_interval=10, flush_bytes=10_000, max_pending=8)
+        first = await stream.__anext__()
+        await asyncio.sleep(0.01)  # the consumer stalls
+        assert produced <= 8 * 2 + 1
+        await stream.aclose()
+        return first
+
+    assert run(scenario())
+
+
+def test_replay_splits_after_spaces():
+    text = " ".join(f"word{i}" for i in range(200))
+    frames = run(_collect(replay(text, frame_chars=64)))
+    assert "".join(frames) == text
+    assert all(len(frame) <= 64 for frame in frames)
+    assert all(frame.endswith(" ") for frame in frames[:-1])
@@ -0,0 +1,38 @@
+from conftest import run
+from services.telemetry import Telemetry, get_telemetry, instrument_node
+
+
+def test_render_prometheus_text():
+    telemetry = Telemetry()
+    telemetry.record_request("GET", "/analysis/{stock_name}", 200, 0.03)
+    telemetry.record_upstream("tavily", 0.2, "ok")
+    telemetry.register_collector("cache", lambda: {"hits": 3, "shared": {"hit_rate": 0.5}, "name": "skipped"})
+    text = telemetry.render()
+    assert "# TYPE kys_http_request_duration_seconds histogram" in text
+    assert 'kys_http_requests_total{method="GET",route="/analysis/{stock_name}",status="200"} 1' in text
+    assert 'kys_http_request_duration_seconds_bucket{method="GET",route="/analysis/{stock_name}",le="+Inf"} 1' in text
+    assert 'kys_upstream_calls_total{upstream="tavily",node="none",outcome="ok"} 1' in text
+    assert "kys_cache_hits 3" in text and "kys_cache_shared_hit_rate 0.5" in text
+    assert "skipped" not in text
+    assert text.endswith("\n")
+
+
+def test_instrumented_node_records_outcome_and_sizes():
+    telemetry = get_telemetry()
+    telemetry.clear()
+
+    async def news_node(state):
+        return {"news_articles": [1, 2, 3]}
+
+    def failing_node(state):
+        raise ValueError("boom")
+
+    run(instrument_node("NewsNode", news_node, fields=["news_articles"])({}))
+    try:
+        instrument_node("FailingNode", failing_node)({})
+    except ValueError:
+        pass
+    text = telemetry.render()
+    assert 'kys_node_calls_total{node="NewsNode",outcome="ok"} 1' in text
+    assert 'kys_node_output_size_count{node="NewsNode",field="news_articles"} 1' in text
+    assert 'kys_node_calls_total{node="FailingNode",outcome="error"} 1' in text
@@ -0,0 +1,63 @@
+from services.ticker_index import TickerIndex, load_ticker_index, normalize_name
+
+
+def _index(**options) -> TickerIndex:
+    index = TickerIndex(**options)
+    index.add("RELIANCE", "Reliance Industries Limited", ("RIL",))
+    index.add("HDFCBANK", "HDFC Bank Limited")
+    index.add("ICICIBANK", "ICICI Bank Limited")
+    index.add("TCS", "Tata Consultancy Services Limited")
+    index.add("TATAMOTORS", "Tata Motors Limited")
+    return index
+
+
+def test_normalize_name():
+    assert normalize_name("Larsen & Toubro Ltd.") == "larsen and toubro"
+
+
+def test_exact_and_alias_lookups():
+    index = _index()
+    assert index.lookup("tcs").method == "exact"
+    assert index.lookup("Reliance Industries Ltd").symbol == "RELIANCE"
+    match = index.lookup("ril")
+    assert (match.symbol, match.method) == ("RELIANCE", "alias")
+
+
+def test_prefix_and_inner_word_matches_are_left_to_the_llm():
+    index = _index()
+    assert index.lookup("reli") is None
+    assert index.lookup("tata mot") is None
+    assert index.lookup("consultancy") is None
+
+
+def test_partial_names_against_the_shipped_listing():
+    index = load_ticker_index("data/nse_equity_list.csv")
+    # Each is part of a listed name but names a different company
+    assert index.lookup("bank of india") is None
+    assert index.lookup("birla") is None
+    assert index.lookup("jindal") is None
+    assert index.lookup("State Bank of India").symbol == "SBIN"
+
+
+def test_guess_uses_unique_prefixes():
+    index = _index()
+    assert index.guess("reli").symbol == "RELIANCE"
+    assert index.guess("tata mot").symbol == "TATAMOTORS"
+    assert index.guess("consultancy").symbol == "TCS"
+
+
+def test_fuzzy_typo():
+    match = _index().lookup("relaince industries")
+    assert (match.symbol, match.method) == ("RELIANCE", "fuzzy")
+    assert _index().lookup("zomato") is None
+
+
+def test_learned_aliases_are_persisted(tmp_path):
+    listing = tmp_path / "EQUITY_L.csv"
+    listing.write_text("SYMBOL,NAME OF COMPANY\nINFY,Infosys Limited\n", encoding="utf-8")
+    learned = tmp_path / "learned.csv"
+    index = load_ticker_index(str(listing), learned_path=str(learned))
+    assert index.learn("the bangalore it major", "INFY")
+    assert not index.learn("anything", "UNKNOWN")
+    reloaded = load_ticker_index(str(listing), learned_path=str(learned))
+    assert reloaded.lookup("bangalore it major").symbol == "INFY"
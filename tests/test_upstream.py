@@ -0,0 +1,63 @@
+import asyncio
+
+from conftest import run
+from services.upstream import BATCH, INTERACTIVE, UpstreamGovernor
+
+
+def test_concurrency_cap_and_priority_order():
+    async def scenario():
+        governor = UpstreamGovernor("test", rate=0, burst=1, max_concurrency=2)
+        running = peak = 0
+        order = []
+
+        async def call(name, priority):
+            nonlocal running, peak
+            await governor.acquire(priority)
+            running += 1
+            peak = max(peak, running)
+            order.append(name)
+            await asyncio.sleep(0.01)
+            running -= 1
+            governor.release()
+
+        tasks = [asyncio.ensure_future(call(f"batch{i}", BATCH)) for i in range(4)]
+        await asyncio.sleep(0)  # two batch calls are admitted, two wait
+        tasks.append(asyncio.ensure_future(call("interactive", INTERACTIVE)))
+        await asyncio.gather(*tasks)
+
+        assert peak == 2
+        assert order.index("interactive") == 2  # ahead of the batch calls that queued first
+        stats = governor.stats()
+        assert stats["in_flight"] == 0
+        assert stats["priorities"]["batch"]["calls"] == 4
+        assert stats["priorities"]["interactive"]["queued"] == 1
+
+    run(scenario())
+
+
+def test_rate_limit_spaces_out_calls():
+    async def scenario():
+        governor = UpstreamGovernor("test", rate=100, burst=1, max_concurrency=10)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(4):
+            await governor.acquire(INTERACTIVE)
+            governor.release()
+        assert loop.time() - start >= 0.025  # three refills at 10 ms each
+
+    run(scenario())
+
+
+def test_cancelled_waiter_releases_nothing():
+    async def scenario():
+        governor = UpstreamGovernor("test", rate=0, burst=1, max_concurrency=1)
+        await governor.acquire(BATCH)
+        waiter = asyncio.ensure_future(governor.acquire(BATCH))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        governor.release()
+        assert governor.stats()["in_flight"] == 0
+        await asyncio.wait_for(governor.acquire(INTERACTIVE), 0.1)
+
+    run(scenario())
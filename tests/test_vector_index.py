@@ -0,0 +1,84 @@
+import numpy as np
+
+from services.retrieval import RetrievalIndex, chunk_text
+from services.vector_index import HashingEmbeddings, LocalVectorIndex
+
+_TOPICS = ["refinery margins crude", "retail stores footfall", "telecom subscribers tariff", "bank deposits loans"]
+
+
+def _corpus(n):
+    rng = np.random.default_rng(0)
+    texts, metadatas = [], []
+    for i in range(n):
+        topic = _TOPICS[i % len(_TOPICS)]
+        words = " ".join(rng.choice(["quarter", "growth", "guidance", "outlook"], size=5))
+        texts.append(f"{topic} {words} {i}")
+        metadatas.append({"topic": topic.split()[0], "doc": i})
+    return texts, metadatas
+
+
+def test_embeddings_are_normalized():
+    vector = HashingEmbeddings(dim=64).embed("refinery margins improved")
+    assert vector.shape == (64,) and abs(np.linalg.norm(vector) - 1) < 1e-5
+
+
+def test_exact_search_filters_and_delete():
+    index = LocalVectorIndex()
+    texts, metadatas = _corpus(40)
+    ids = index.add_texts(texts, metadatas, ids=[f"d{i}" for i in range(40)])
+    assert len(index) == 40 and ids[0] == "d0"
+    top = index.similarity_search("refinery margins crude", k=3)
+    assert all(doc.metadata["topic"] == "refinery" for doc in top)
+    filtered = index.similarity_search("refinery margins", k=5, filters={"topic": "bank"})
+    assert len(filtered) == 5 and {doc.metadata["topic"] for doc in filtered} == {"bank"}
+    index.delete(filters={"topic": "refinery"})
+    assert len(index) == 30
+    assert all(doc.metadata["topic"] != "refinery" for doc in index.similarity_search("refinery margins crude", k=5))
+    assert index.get_by_ids(["d1"])[0].page_content == texts[1]
+    assert index.stats()["exact_searches"] == 3
+
+
+def test_ivf_search_finds_what_exact_search_finds():
+    texts, metadatas = _corpus(400)
+    exact = LocalVectorIndex()
+    ivf = LocalVectorIndex(exact_limit=50, n_lists=8, nprobe=8)
+    for index in (exact, ivf):
+        index.add_texts(texts, metadatas, ids=[f"d{i}" for i in range(len(texts))])
+    for query in ("telecom subscribers tariff 7", "bank deposits loans"):
+        expected = [score for _, score in exact.similarity_search_with_score(query, k=5)]
+        found = [score for _, score in ivf.similarity_search_with_score(query, k=5)]
+        assert np.allclose(found, expected)  # every list probed; equal scores may tie in either order
+    assert ivf.stats()["ivf_lists"] == 8 and ivf.stats()["ivf_searches"] == 2
+    # Rows added after the build are scanned exactly until the index doubles
+    ivf.add_texts(["brand new refinery commissioning"], [{"topic": "refinery"}], ids=["new"])
+    assert ivf.similarity_search("brand new refinery commissioning", k=1)[0].id == "new"
+
+
+def test_chunk_text_overlaps():
+    chunks = chunk_text("sentence number one. " * 100, size=200, overlap=50)
+    assert len(chunks) > 1 and all(len(chunk) <= 200 for chunk in chunks)
+
+
+def test_retrieval_index_is_incremental():
+    retrieval = RetrievalIndex(index=LocalVectorIndex(), min_score=0.0)
+    state = {
+        "TickerSymbol": "TCS",
+        "screener_data": "## Profit & Loss\nSales grew 12% on strong deal wins.\n\n## Ratios\nROCE improved.",
+        "news_articles": [{"title": "TCS wins deal", "url": "https://news.example/1", "content": "A large deal win."}],
+    }
+    added = retrieval.index_analysis(state)
+    assert added >= 2
+    assert retrieval.index_analysis(state) == 0  # nothing new
+    text, report = retrieval.retrieve("What drove sales growth?", {"TickerSymbol": "TCS"})
+    assert report["passages"] >= 1 and "TCS" in text
+    assert retrieval.retrieve("sales", {"TickerSymbol": "INFY"})[1]["passages"] == 0
+
+
+def test_retrieve_does_not_index_the_client_context():
+    retrieval = RetrievalIndex(index=LocalVectorIndex(), min_score=0.0)
+    retrieval.index_analysis({"TickerSymbol": "TCS", "screener_data": "## Balance Sheet\nBorrowings are nil."})
+    forged = {"TickerSymbol": "TCS", "screener_data": "## Balance Sheet\nBorrowings of 90,000 crore."}
+    for _ in range(3):
+        text, _ = retrieval.retrieve("What are the borrowings?", forged)
+    assert "nil" in text and "90,000" not in text
+    assert len(retrieval.index) == 1
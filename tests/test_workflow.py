@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+from conftest import FAKES, run
+
+
+def test_workflow_runs_overlap_on_one_event_loop(app, monkeypatch):
+    import workflows
+    from services.node_cache import get_node_cache
+
+    for fake in ("ticker_llm", "stock_info_llm"):
+        monkeypatch.setattr(FAKES[fake], "latency", 0.05)
+    monkeypatch.setattr(FAKES["tavily"], "search_latency", 0.05)
+    monkeypatch.setattr(FAKES["tavily"], "extract_latency", 0.05)
+    names = ["Reliance Industries", "Tata Consultancy Services", "Infosys", "HDFC Bank"]
+
+    async def timed(*stock_names):
+        get_node_cache().clear()
+        start = time.perf_counter()
+        states = await asyncio.gather(
+            *(workflows.get_workflow().ainvoke({"User_stock_name": name}) for name in stock_names)
+        )
+        return time.perf_counter() - start, states
+
+    workflows.get_workflow()  # compile outside the timings
+    one, _ = run(timed(names[0]))
+    together, states = run(timed(*names))
+    assert all(state["screener_data"] and state["stocks_info"] for state in states)
+    assert together < 2 * one  # four runs overlap instead of taking four times as long
@@ -1,4 +1,26 @@
-from .workflow import workflow
-from .chat_workflow import chat_workflow
+"""LangGraph workflows.
 
-__all__ = ["workflow", "chat_workflow"]
+Importing the package is cheap: the graphs, and the node modules and
+LangGraph/LangChain imports behind them, load on first attribute access.
+"""
+
+from importlib import import_module
+
+_EXPORTS = {
+    "workflow": ".workflow",
+    "get_workflow": ".workflow",
+    "chat_workflow": ".chat_workflow",
+    "get_chat_workflow": ".chat_workflow",
+    "run_batch_comparison": ".compare_workflow",
+}
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value  # the graph, not the submodule of the same name, on later lookups
+    return value
+
+
+__all__ = list(_EXPORTS)
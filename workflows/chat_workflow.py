@@ -1,13 +1,25 @@
 """Chat workflow: START -> ChatNode -> END."""
 
+from functools import lru_cache
+
 from langgraph.graph import StateGraph, START, END
 
 from models import ChatState
 from nodes import chat_node
+from services import instrument_node
+
+
+@lru_cache(maxsize=1)
+def get_chat_workflow():
+    """The chat graph, compiled on first use."""
+    graph = StateGraph(state_schema=ChatState)
+    graph.add_node("ChatNode", instrument_node("ChatNode", chat_node, fields=("response",)))
+    graph.add_edge(START, "ChatNode")
+    graph.add_edge("ChatNode", END)
+    return graph.compile()
 
-_graph = StateGraph(state_schema=ChatState)
-_graph.add_node("ChatNode", chat_node)
-_graph.add_edge(START, "ChatNode")
-_graph.add_edge("ChatNode", END)
 
-chat_workflow = _graph.compile()
+def __getattr__(name: str):
+    if name == "chat_workflow":
+        return get_chat_workflow()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,84 @@
+"""Batched comparison pipeline for several stocks at once.
+
+All names are resolved in one step, every Screener page is fetched with a
+single Tavily extract and ``StocksInfo`` for all tickers comes from one
+structured LLM call; only news is searched per stock. Node-cache hits are
+reused and fresh results are written back.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+from config import logger
+from models import State
+from nodes.screener_url_node import resolve_ticker_symbols, screener_url
+from nodes.screener_extract_node import extract_screener_batch
+from nodes.stock_info_node import get_stock_info_batch
+from services import get_node_cache
+from workflows.get_nodes import get_nodes
+
+_nodes = get_nodes()
+
+
+async def run_batch_comparison(stock_names: List[str]) -> Dict[str, Optional[dict]]:
+    """Return ``{stock_name: state}``; ``None`` marks items the caller should re-run individually."""
+    node_cache = get_node_cache()
+    states = {name: State(User_stock_name=name) for name in stock_names}
+
+    # 1. Ticker resolution: node cache, then one batched index/LLM lookup
+    unresolved = []
+    for name, state in states.items():
+        hit = node_cache.lookup("ScreenerURLNode", state)
+        if hit:
+            state.ScreenerURL, state.TickerSymbol = hit["ScreenerURL"], hit["TickerSymbol"]
+        else:
+            unresolved.append(name)
+    for name, ticker_symbol in (await resolve_ticker_symbols(unresolved)).items():
+        update = {"ScreenerURL": screener_url(ticker_symbol), "TickerSymbol": ticker_symbol}
+        node_cache.store("ScreenerURLNode", states[name], update)
+        states[name].ScreenerURL, states[name].TickerSymbol = update["ScreenerURL"], ticker_symbol
+
+    resolved = [s for s in states.values() if s.TickerSymbol]
+    by_ticker: Dict[str, State] = {s.TickerSymbol.upper(): s for s in resolved}
+
+    # 2. Fan-out: cached parts first, the rest as one extract + one LLM call
+    pages: Dict[str, dict] = {}
+    infos: Dict[str, object] = {}
+    for ticker_symbol, state in by_ticker.items():
+        extract_hit = node_cache.lookup("ScreenerExtractNode", state)
+        if extract_hit:
+            pages[state.ScreenerURL] = extract_hit
+        info_hit = node_cache.lookup("StockInfoNode", state)
+        if info_hit:
+            infos[ticker_symbol] = info_hit["stocks_info"]
+
+    missing_urls = [s.ScreenerURL for s in by_ticker.values() if s.ScreenerURL not in pages]
+    missing_tickers = [t for t in by_ticker if t not in infos]
+    fetched_pages, fetched_infos, news = await asyncio.gather(
+        extract_screener_batch(missing_urls),
+        get_stock_info_batch(missing_tickers),
+        asyncio.gather(*(_nodes["StockNewsNode"](s) for s in resolved)),
+    )
+    pages.update(fetched_pages)
+    infos.update(fetched_infos)
+
+    for ticker_symbol, state in by_ticker.items():
+        if state.ScreenerURL in fetched_pages:
+            node_cache.store("ScreenerExtractNode", state, fetched_pages[state.ScreenerURL])
+        if ticker_symbol in fetched_infos:
+            node_cache.store("StockInfoNode", state, {"stocks_info": fetched_infos[ticker_symbol]})
+
+    # 3. Assemble; anything incomplete is left to the per-stock workflow
+    results: Dict[str, Optional[dict]] = {name: None for name in stock_names}
+    for state, update in zip(resolved, news):
+        state.news_articles = update.get("news_articles", [])
+        page = pages.get(state.ScreenerURL, {})
+        state.screener_data = page.get("screener_data", "")
+        state.screener_tables = page.get("screener_tables") or {}
+        state.stocks_info = infos.get(state.TickerSymbol.upper())
+        if state.screener_data and state.stocks_info is not None:
+            results[state.User_stock_name] = dict(state)
+
+    done = sum(r is not None for r in results.values())
+    logger.info("compare_workflow: batch completed %d/%d stocks", done, len(stock_names))
+    return results
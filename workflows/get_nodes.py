@@ -6,13 +6,23 @@ from nodes import (
     get_screener_url_and_ticker_symbol,
     get_stock_info,
 )
+from services import get_node_cache, instrument_node
 
 
-def get_nodes() -> dict:
-    """Returns a dictionary mapping node names to their callable functions."""
-    return {
+def get_nodes(cached: bool = True) -> dict:
+    """Returns a dictionary mapping node names to their callable functions.
+
+    With ``cached`` each node is wrapped in the per-node result cache, so a
+    re-run only executes the nodes whose results have expired. Every node is
+    instrumented; cache hits show up as near-zero durations.
+    """
+    nodes = {
         "StockNewsNode": get_stock_news,
         "ScreenerExtractNode": extract_screener_data,
         "ScreenerURLNode": get_screener_url_and_ticker_symbol,
         "StockInfoNode": get_stock_info,
     }
+    if cached:
+        node_cache = get_node_cache()
+        nodes = {name: node_cache.wrap(name, fn) for name, fn in nodes.items()}
+    return {name: instrument_node(name, fn) for name, fn in nodes.items()}
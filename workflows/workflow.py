@@ -1,27 +1,63 @@
 """Main stock-analysis workflow.
 
-START -> ScreenerURLNode -> [StockInfoNode, ScreenerExtractNode, StockNewsNode] -> END
+START -> [TickerBranch, StockNewsNode] -> END
+TickerBranch: ScreenerURLNode -> [StockInfoNode, ScreenerExtractNode]
+
+The news search only needs the user's stock name, so it runs in parallel
+with the whole ticker-dependent branch. That branch is a subgraph because
+LangGraph waits for every node of a step before starting the next one; as
+plain sibling nodes a slow news search would hold back StockInfoNode and
+ScreenerExtractNode. In speculative mode StockInfoNode also starts on a
+guessed ticker and is re-run only if the resolved ticker differs.
 """
 
+from functools import lru_cache
+from typing import Optional
+
 from langgraph.graph import StateGraph, START, END
 
-from models import State
+from config import SPECULATIVE_EXECUTION
+from models import State, TickerBranchState
+from services import Speculator, speculative_nodes
 from workflows.get_nodes import get_nodes
 
-_nodes = get_nodes()
+speculator = Speculator()
+
+
+def build_workflow(speculative: bool = False, nodes: Optional[dict] = None):
+    """Compile the analysis graph, optionally with speculative StockInfoNode execution."""
+    nodes = nodes or get_nodes()
+    resolve, stock_info = nodes["ScreenerURLNode"], nodes["StockInfoNode"]
+    if speculative:
+        resolve, stock_info = speculative_nodes(resolve, stock_info, speculator)
+
+    branch = StateGraph(state_schema=TickerBranchState)
+    branch.add_node("ScreenerURLNode", resolve)
+    branch.add_node("StockInfoNode", stock_info)
+    branch.add_node("ScreenerExtractNode", nodes["ScreenerExtractNode"])
+    branch.add_edge(START, "ScreenerURLNode")
+    branch.add_edge("ScreenerURLNode", "StockInfoNode")
+    branch.add_edge("ScreenerURLNode", "ScreenerExtractNode")
+    branch.add_edge("StockInfoNode", END)
+    branch.add_edge("ScreenerExtractNode", END)
+
+    graph = StateGraph(state_schema=State)
+    graph.add_node("TickerBranch", branch.compile())
+    graph.add_node("StockNewsNode", nodes["StockNewsNode"])
+    graph.add_edge(START, "TickerBranch")
+    graph.add_edge(START, "StockNewsNode")
+    graph.add_edge("TickerBranch", END)
+    graph.add_edge("StockNewsNode", END)
+    return graph.compile()
+
 
-_graph = StateGraph(state_schema=State)
-_graph.add_node("ScreenerURLNode", _nodes["ScreenerURLNode"])
-_graph.add_node("StockInfoNode", _nodes["StockInfoNode"])
-_graph.add_node("ScreenerExtractNode", _nodes["ScreenerExtractNode"])
-_graph.add_node("StockNewsNode", _nodes["StockNewsNode"])
+@lru_cache(maxsize=1)
+def get_workflow():
+    """The analysis graph the API serves, compiled on first use."""
+    return build_workflow(speculative=SPECULATIVE_EXECUTION)
 
-_graph.add_edge(START, "ScreenerURLNode")
-_graph.add_edge("ScreenerURLNode", "StockInfoNode")
-_graph.add_edge("ScreenerURLNode", "ScreenerExtractNode")
-_graph.add_edge("ScreenerURLNode", "StockNewsNode")
-_graph.add_edge("StockInfoNode", END)
-_graph.add_edge("ScreenerExtractNode", END)
-_graph.add_edge("StockNewsNode", END)
 
-workflow = _graph.compile()
+def __getattr__(name: str):
+    if name == "workflow":
+        return get_workflow()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")